@@ -0,0 +1,83 @@
+"""Compare the single-pass convert_to_unicode with sequential replacements.
+
+The titles of tests/test_format_title.py (and of the title snapshot, if it
+exists) are converted to text as in format_title. The previous
+implementation applied one str.replace per rule in the order of
+UNICODE_REPLACEMENTS; both must give identical output for all titles.
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+TESTS_DIR = os.path.join(os.path.dirname(__file__), "..", "tests")
+
+
+def sequential_convert_to_unicode(text):
+    """Apply the replacements one after the other, as done before."""
+    for latex, unicode_text in cds_paper_bot.UNICODE_REPLACEMENTS.items():
+        text = text.replace(latex, unicode_text)
+    return text
+
+
+def corpus_titles():
+    """Return the input titles of the format_title tests and the snapshot."""
+    with open(os.path.join(TESTS_DIR, "test_format_title.py")) as test_file:
+        tree = ast.parse(test_file.read())
+    titles = [
+        node.elts[0].value
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Tuple)
+        and len(node.elts) == 2
+        and all(
+            isinstance(x, ast.Constant) and isinstance(x.value, str) for x in node.elts
+        )
+    ]
+    snapshot_file = os.path.join(TESTS_DIR, "title_snapshot.jsonl")
+    if os.path.isfile(snapshot_file):
+        with open(snapshot_file, encoding="utf-8") as json_file:
+            json_file.readline()  # header
+            titles += [json.loads(line)["title"] for line in json_file if line.strip()]
+    return titles
+
+
+def latex_to_text(title):
+    """Return the text passed to convert_to_unicode by format_title."""
+    try:
+        return cds_paper_bot.LatexNodes2Text().latex_to_text(title)
+    except cds_paper_bot.LatexWalkerError:
+        return title
+
+
+def main():
+    """Check the output on the corpus and print the time per title."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=20)
+    args = parser.parse_args()
+    titles = corpus_titles()
+    # both the raw titles and the converted ones, which contain more ^ and _
+    texts = titles + [latex_to_text(title) for title in titles]
+    n_different = sum(
+        sequential_convert_to_unicode(x) != cds_paper_bot.convert_to_unicode(x)
+        for x in texts
+    )
+    print(f"{len(texts)} texts, {n_different} with different output")
+    for label, function in (
+        ("sequential str.replace", sequential_convert_to_unicode),
+        ("single pass", cds_paper_bot.convert_to_unicode),
+    ):
+        elapsed = min(
+            timeit.repeat(
+                lambda: [function(x) for x in texts], number=1, repeat=args.repeat
+            )
+        )
+        print(f"{label:<24} {elapsed / len(texts) * 1e6:>8.2f} us/title")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare time and peak memory of feedparser and the streaming CDS RSS parser.
+
+Pass recorded CDS feeds (XML files) as arguments, otherwise a synthetic feed
+resembling the CDS RSS output is generated.
+"""
+import argparse
+import email.utils
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+import feedparser
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+ITEM_TEMPLATE = """<item>
+<title>Search for new physics in final states with $\\mathrm{{t}}\\bar{{\\mathrm{{t}}}}$ at $\\sqrt{{s}} = 13~\\mathrm{{TeV}}$ ({index})</title>
+<link>https://cds.cern.ch/record/{record}</link>
+<description>{description}</description>
+<pubDate>{date}</pubDate>
+<dc:source>CMS-PAS-EXO-23-{index:03d}</dc:source>
+<dc:creator>CMS Collaboration</dc:creator>
+{media}
+</item>
+"""
+
+
+def synthetic_feed(n_items=100, n_media=40):
+    """Create a CDS-like RSS feed with n_items items and n_media media each."""
+    items = []
+    for index in range(n_items):
+        record = 2000000 + n_items - index
+        media = "\n".join(
+            f'<media:content url="https://cds.cern.ch/record/{record}/files/'
+            f'Figure_{fig:03d}.png" type="image/png" medium="image" />'
+            for fig in range(n_media)
+        )
+        items.append(
+            ITEM_TEMPLATE.format(
+                index=n_items - index,
+                record=record,
+                date=email.utils.formatdate(1696932000 - 60 * index, usegmt=True),
+                description="Lorem ipsum dolor sit amet. " * 40,
+                media=media,
+            )
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/">\n<channel>\n'
+        "<title>CDS: synthetic feed</title>\n" + "".join(items) + "</channel>\n</rss>\n"
+    ).encode("utf-8")
+
+
+def measure(function, repeat):
+    """Return the best wall time and the peak memory of function()."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("feeds", nargs="*", help="recorded CDS RSS files")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "-n", "--new", type=int, default=5, help="number of items above the watermark"
+    )
+    args = parser.parse_args()
+
+    if args.feeds:
+        feeds = {}
+        for feed_path in args.feeds:
+            with open(feed_path, "rb") as feed_file:
+                feeds[os.path.basename(feed_path)] = feed_file.read()
+    else:
+        feeds = {"synthetic": synthetic_feed()}
+
+    print(f"{'feed':<30} {'parser':<22} {'time [ms]':>10} {'peak [kB]':>10}")
+    for name, content in feeds.items():
+        entries = cds_paper_bot.parse_cds_rss(content)["entries"]
+        watermark = None
+        if len(entries) > args.new:
+            watermark = (
+                cds_paper_bot.entry_timestamp(entries[args.new]),
+                {entries[args.new].get("dc_source")},
+            )
+        candidates = {
+            "feedparser": lambda: feedparser.parse(BytesIO(content)),
+            "lxml": lambda: cds_paper_bot.parse_cds_rss(content),
+            f"lxml, stop after {args.new}": lambda: cds_paper_bot.parse_cds_rss(
+                content, watermark=watermark
+            ),
+        }
+        for label, function in candidates.items():
+            elapsed, peak = measure(function, args.repeat)
+            print(f"{name:<30} {label:<22} {elapsed * 1e3:>10.1f} {peak / 1e3:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare the wall time of the requests and httpx engines for one post.
+
+A local server answers with a fixed latency per request, resembling a
+round trip to CDS. It serves the feed and the figures of a post: either
+responses recorded with --record (pass the fixture directory), or a
+synthetic post with 20 figures.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+FEED_PATH = "/rss?cc=CMS%20Physics%20Analysis%20Summaries"
+
+
+def synthetic_post(n_figures=20, figure_size=150000):
+    """Return the responses of a post with n_figures figures by path."""
+    responses = {FEED_PATH: b"<rss><channel></channel></rss>" * 1000}
+    for index in range(1, n_figures + 1):
+        path = f"/record/2000000/files/Figure_{index:03d}.png"
+        responses[path] = os.urandom(figure_size)
+    return responses
+
+
+def recorded_post(fixture_dir):
+    """Return the recorded responses of a fixture directory by path."""
+    responses = {}
+    for meta_path in glob.glob(os.path.join(fixture_dir, "*.json")):
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        if meta["status"] != 200:
+            continue
+        parts = urllib.parse.urlsplit(meta["url"])
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        with open(meta_path[: -len(".json")] + ".body", "rb") as body_file:
+            responses[path] = body_file.read()
+    return responses
+
+
+def make_server(responses, latency):
+    """Create a server answering with the responses after latency seconds."""
+
+    class Handler(BaseHTTPRequestHandler):
+        """Serve the responses."""
+
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """Answer a GET request."""
+            time.sleep(latency)
+            body = responses.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            """Do not log requests."""
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.request_queue_size = 64
+    server.daemon_threads = True
+    return server
+
+
+def fetch_post(base_url, paths, out_dir):
+    """Fetch the pages and download all figures like the bot does for a post."""
+    # feeds and pages are requested one after the other
+    for path in paths:
+        if "/files/" not in path:
+            cds_paper_bot.http_get(base_url + path)
+    downloads = [
+        (base_url + x, os.path.join(out_dir, f"{index}"))
+        for index, x in enumerate(y for y in paths if "/files/" in y)
+    ]
+    assert all(cds_paper_bot.download_files(downloads))
+
+
+def main():
+    """Run the benchmark and print the wall times."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("fixtures", nargs="?", help="directory created with --record")
+    parser.add_argument(
+        "-l", "--latency", type=float, default=0.1, help="seconds per request"
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("-o", "--out-dir", default="bench_http_engines_out")
+    args = parser.parse_args()
+
+    responses = recorded_post(args.fixtures) if args.fixtures else synthetic_post()
+    n_figures = sum("/files/" in x for x in responses)
+    print(f"{len(responses)} responses, {n_figures} figures, latency {args.latency} s")
+    server = make_server(responses, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    for engine in cds_paper_bot.HTTP_ENGINES:
+        if engine == "httpx" and cds_paper_bot.httpx is None:
+            print("httpx is not installed, skipping the httpx engine")
+            continue
+        cds_paper_bot._HTTP_SESSION = None  # pylint: disable=protected-access
+        cds_paper_bot.configure_http(engine=engine)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fetch_post(base_url, sorted(responses), args.out_dir)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        cds_paper_bot.close_http()
+        print(f"{engine:<10} {best:>8.2f} s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
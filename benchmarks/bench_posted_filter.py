@@ -0,0 +1,88 @@
+"""Measure lookups of never-posted identifiers in a large posting history.
+
+A synthetic history of one million identifiers is written to a state file.
+For a fresh process (a new run of the bot), the time to answer the first
+lookups is compared for scanning the file line by line (the original
+check_id_exists), reading all identifiers into a set (posted_ids) and the
+stored Bloom filter (posted_filter), which only reads the full history for
+probable hits.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+FEED_ID = "CMS_PAS_FEED"
+PREFIX = "TWITTER_"
+
+
+def scan(identifier):
+    """Look up an identifier by reading the file line by line."""
+    with open(f"{PREFIX}{FEED_ID}.txt") as txt_file:
+        for line in txt_file:
+            if identifier == line.strip("\n"):
+                return True
+    return False
+
+
+def fresh_run():
+    """Forget everything kept in memory, as for a new run."""
+    cds_paper_bot._POSTED_IDS.clear()  # pylint: disable=protected-access
+    cds_paper_bot._POSTED_FILTERS.clear()  # pylint: disable=protected-access
+
+
+def measure(label, function, lookups):
+    """Print the time of the first and of all following lookups."""
+    fresh_run()
+    start = time.perf_counter()
+    function(lookups[0])
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for identifier in lookups[1:]:
+        function(identifier)
+    rest = (time.perf_counter() - start) / max(1, len(lookups) - 1)
+    print(f"{label:<24} first {first * 1e3:>10.2f} ms, then {rest * 1e6:>10.2f} us")
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=1000000)
+    parser.add_argument("-l", "--lookups", type=int, default=100)
+    args = parser.parse_args()
+    lookups = [f"CMS-PAS-NEW-25-{i:06d}" for i in range(args.lookups)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        with open(f"{PREFIX}{FEED_ID}.txt", "w") as txt_file:
+            txt_file.writelines(f"CMS-PAS-HIG-{i:08d}\n" for i in range(args.number))
+        start = time.perf_counter()
+        bloom = cds_paper_bot.posted_filter(FEED_ID, PREFIX)
+        print(
+            f"Building the filter for {args.number} identifiers took "
+            f"{time.perf_counter() - start:.1f} s, "
+            f"{len(bloom.bits) / 1e6:.1f} MB, {bloom.n_hashes} hashes"
+        )
+        false_positives = sum(
+            f"CMS-PAS-TOP-{i:08d}" in bloom for i in range(args.number // 10)
+        )
+        print(f"False positive rate: {false_positives / (args.number // 10):.4f}")
+
+        measure("line-by-line scan", scan, lookups)
+        measure(
+            "posted_ids set",
+            lambda x: x in cds_paper_bot.posted_ids(FEED_ID, PREFIX),
+            lookups,
+        )
+        measure(
+            "check_id_exists (Bloom)",
+            lambda x: cds_paper_bot.check_id_exists(x, FEED_ID, PREFIX),
+            lookups,
+        )
+
+
+if __name__ == "__main__":
+    main()
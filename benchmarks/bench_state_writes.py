@@ -0,0 +1,60 @@
+"""Measure the cost of storing posted identifiers.
+
+Compares appending to the state file directly for every identifier (the
+previous store_id, and --no-journal) with the journal, both with a commit
+(one fsync) per identifier and with a commit per batch of identifiers.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+def append_per_write(identifiers):
+    """Open, append and close the state file for every identifier."""
+    cds_paper_bot._STATE_JOURNAL = None  # pylint: disable=protected-access
+    for identifier in identifiers:
+        cds_paper_bot.append_state("TWITTER_", "CMS_PAS_FEED", identifier)
+
+
+def journal(identifiers, batch_size):
+    """Append through the journal with a commit every batch_size identifiers."""
+    state_journal = cds_paper_bot.StateJournal()
+    for i, identifier in enumerate(identifiers):
+        state_journal.append("TWITTER_", "CMS_PAS_FEED", identifier)
+        if (i + 1) % batch_size == 0:
+            state_journal.commit()
+    state_journal.close()
+
+
+def main():
+    """Run the benchmark and print the cost per identifier."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    parser.add_argument("-b", "--batch-size", type=int, default=3)
+    args = parser.parse_args()
+    identifiers = [f"CMS-PAS-EXO-23-{i:05d}" for i in range(args.number)]
+    cds_paper_bot.JOURNAL_CHECKPOINT = args.number + 1
+    results = {
+        "--no-journal, no fsync": lambda: append_per_write(identifiers),
+        "journal, fsync per write": lambda: journal(identifiers, 1),
+        f"journal, fsync per {args.batch_size}": lambda: journal(
+            identifiers, args.batch_size
+        ),
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        for label, function in results.items():
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            os.remove("TWITTER_CMS_PAS_FEED.txt")
+            print(f"{label:<30} {elapsed / len(identifiers) * 1e6:>10.2f} us/write")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Measure the per-entry cost of handling publication dates.
+
+Compares the previous approach, where maya parsed the publication date for
+sorting, logging and for every conference, with a single RFC 822 parse per
+entry followed by integer comparisons. maya is only needed for the former.
+"""
+import argparse
+import email.utils
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+try:
+    import maya
+except ImportError:
+    maya = None
+
+
+def sample_dates(n_dates):
+    """Return RSS publication dates spread over the last years."""
+    random.seed(42)
+    start = cds_paper_bot.date_to_timestamp("2019-01-01")
+    end = cds_paper_bot.date_to_timestamp("2025-01-01")
+    return [
+        email.utils.formatdate(random.randint(start, end), usegmt=True)
+        for _ in range(n_dates)
+    ]
+
+
+def per_entry_maya(published, conferences):
+    """Date handling per entry as done before."""
+    maya.parse(published).datetime()  # sort key
+    maya.parse(published).datetime()  # log message
+    for conf in conferences:
+        conf[0] <= maya.parse(published) <= conf[1]  # pylint: disable=pointless-statement
+
+
+def per_entry_fast(published, conferences):
+    """Date handling per entry with a single parse."""
+    timestamp = cds_paper_bot.parse_rfc822(published)
+    for conf in conferences:
+        conf.is_now(timestamp)
+
+
+def main():
+    """Run the benchmark and print the cost per entry."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    args = parser.parse_args()
+    dates = sample_dates(args.number)
+
+    def run_fast_parse():
+        for published in dates:
+            cds_paper_bot.parse_rfc822(published)
+
+    def run_fast_entry():
+        for published in dates:
+            per_entry_fast(published, cds_paper_bot.CONFERENCES)
+
+    results = {
+        "parse_rfc822, single parse": run_fast_parse,
+        "parse_rfc822, per entry": run_fast_entry,
+    }
+    if maya is not None:
+        maya_conferences = [
+            (maya.MayaDT(conf.start), maya.MayaDT(conf.end))
+            for conf in cds_paper_bot.CONFERENCES
+        ]
+
+        def run_maya_parse():
+            for published in dates:
+                maya.parse(published)
+
+        def run_maya_entry():
+            for published in dates:
+                per_entry_maya(published, maya_conferences)
+
+        results["maya.parse, single parse"] = run_maya_parse
+        results["maya.parse, per entry"] = run_maya_entry
+    else:
+        print("maya is not installed, skipping the previous implementation")
+
+    for label, function in results.items():
+        elapsed = min(timeit.repeat(function, number=1, repeat=3))
+        print(f"{label:<28} {elapsed / len(dates) * 1e6:>10.2f} us/entry")
+
+
+if __name__ == "__main__":
+    main()
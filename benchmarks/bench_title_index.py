@@ -0,0 +1,79 @@
+"""Measure looking up the posted titles similar to the title of a new entry.
+
+Compares computing the similarity to every posted title with the MinHash
+index, for a synthetic history of posted titles, and the time it takes to
+build the index with and without stored signatures.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+WORDS = (
+    "search measurement observation study of for in with the a and at to "
+    "Higgs boson top quark W Z bosons pair production decaying final states "
+    "leptons jets photons tau muons electrons missing transverse momentum "
+    "heavy resonances dark matter supersymmetry vector-like quarks cross "
+    "section proton-proton collisions √(s) = 13 13.6 TeV lead-lead "
+    "differential inclusive associated charged neutral scalar new physics"
+).split()
+
+
+def synthetic_titles(n_titles):
+    """Return random titles made of typical words."""
+    random.seed(42)
+    return [
+        " ".join(random.choices(WORDS, k=random.randint(8, 16)))
+        for _ in range(n_titles)
+    ]
+
+
+def main():
+    """Run the benchmark and print the time per lookup."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=10000)
+    parser.add_argument("-l", "--lookups", type=int, default=200)
+    args = parser.parse_args()
+    titles = synthetic_titles(args.number)
+    words = [cds_paper_bot.title_words(title) for title in titles]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "titles.pickle")
+        for label in ("computing", "stored"):
+            start = time.perf_counter()
+            index = cds_paper_bot.MinHashIndex(path)
+            for i, title_words in enumerate(words):
+                index.add(i, title_words)
+            index.store()
+            elapsed = time.perf_counter() - start
+            print(f"Loading {args.number} titles ({label} signatures): {elapsed:.2f} s")
+            start = time.perf_counter()
+            index.query(words[0], cds_paper_bot.TITLE_SIMILARITY)
+            elapsed = time.perf_counter() - start
+            print(f"{'first lookup':<24} {elapsed * 1e3:>8.3f} ms")
+    queries = words[: args.lookups]
+
+    start = time.perf_counter()
+    for query in queries:
+        [
+            i
+            for i, other in enumerate(words)
+            if cds_paper_bot.title_similarity(query, other)
+            >= cds_paper_bot.TITLE_SIMILARITY
+        ]
+    elapsed = (time.perf_counter() - start) / len(queries)
+    print(f"{'compare to all titles':<24} {elapsed * 1e3:>8.3f} ms/lookup")
+
+    start = time.perf_counter()
+    for query in queries:
+        index.query(query, cds_paper_bot.TITLE_SIMILARITY)
+    elapsed = (time.perf_counter() - start) / len(queries)
+    print(f"{'MinHash index':<24} {elapsed * 1e3:>8.3f} ms/lookup")
+
+
+if __name__ == "__main__":
+    main()
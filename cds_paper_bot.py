@@ -3,25 +3,49 @@
 from __future__ import print_function
 
 import argparse
+import array
+import asyncio
+import calendar
 import configparser
+import datetime
+import email.utils
+import fcntl
+import glob
+import hashlib
+import importlib.util
+import json
 import logging
+import math
 import os
+import pickle
+import queue
+import random
 import re
 import shutil
+import signal
+import socket
+import sqlite3
 import subprocess
 import sys
+import threading
 import time
+import urllib.parse
 import zipfile
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from io import BytesIO
 from pathlib import Path
 
 import daiquiri
 import feedparser
 import lxml.html as lh
+from lxml import etree
 import mastodon
-import maya
 import requests
 import tweepy
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
 
 # Assuming atproto is installed
 from atproto import Client as BlueskyClient
@@ -32,10 +56,88 @@ from pylatexenc.latexwalker import LatexWalkerError
 from wand.exceptions import CorruptImageError  # pylint: disable=no-name-in-module
 from wand.image import Color, Image
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 # Maximum image dimension (both x and y)
 MAX_IMG_DIM = 1000  # could be 1280
 MAX_IMG_DIM_AREA = 1280 * 720  # 1 megapixel
 MAX_IMG_SIZE = 5242880
+# maximum length of image descriptions on Mastodon
+MASTODON_MAX_ALT_TEXT = 1500
+# directory for the conditional-GET feed cache
+FEED_CACHE_DIR = ".feed_cache"
+# directory of the state segments written by individual runs
+STATE_DIR = "state"
+# write-ahead journal of the lines appended to the state files
+STATE_JOURNAL = ".state_journal"  # followed by the host name and process ID
+JOURNAL_CHECKPOINT = 64  # lines kept in the journal before applying them
+# directory of the Bloom filters of the posted identifiers
+BLOOM_DIR = ".bloom"
+BLOOM_ERROR_RATE = 0.01  # false positive rate
+BLOOM_MIN_CAPACITY = 10000
+BLOOM_TAIL_SIZE = 4096  # bytes before the covered offset checked for changes
+MINHASH_DIR = ".minhash"
+# HTTP client settings shared by all requests
+HTTP_TIMEOUT = 10  # seconds, for both connecting and reading
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_BACKOFF_JITTER = 0.5  # seconds, randomises retries of parallel fetches
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_POOL_HOSTS = 8  # number of hosts to keep connection pools for
+HTTP_POOL_MAXSIZE = 4  # maximum number of connections per host
+HTTP_ENGINES = ["requests", "httpx"]
+# the httpx engine uses HTTP/2 if the h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# consecutive failures after which requests to a host fail fast
+CIRCUIT_FAILURES = 3
+CIRCUIT_RESET = 300  # seconds until a request to a failing host is tried again
+HTTP_USER_AGENT = "cds_paper_bot (+https://github.com/clelange/cds_paper_bot)"
+# XML tags of the CDS RSS fields used by the streaming parser
+DC_SOURCE_TAG = "{http://purl.org/dc/elements/1.1/}source"
+MEDIA_CONTENT_TAG = "{http://search.yahoo.com/mrss/}content"
+FEED_PARSERS = ["feedparser", "lxml"]
+# polling intervals in seconds for watch mode
+WATCH_MIN_INTERVAL = 120
+WATCH_MAX_INTERVAL = 1800
+WATCH_CONFERENCE_INTERVAL = 300
+# state file prefixes of the platforms
+PLATFORM_PREFIXES = ["TWITTER_", "MASTODON_", "BLUESKY_"]
+LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    identifier TEXT NOT NULL,
+    feed_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    post_id TEXT,
+    thread_id TEXT,
+    published INTEGER,
+    posted_at INTEGER,
+    duration REAL,
+    n_images INTEGER,
+    PRIMARY KEY (identifier, feed_id, platform)
+);
+CREATE INDEX IF NOT EXISTS posts_by_feed ON posts (feed_id, platform);
+CREATE TABLE IF NOT EXISTS leases (
+    identifier TEXT NOT NULL,
+    feed_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (identifier, feed_id, platform)
+);
+"""
+# status of a feed entry compared to the last time it was handled
+ENTRY_NEW = "new"
+ENTRY_UPDATED = "updated"
+ENTRY_UNCHANGED = "unchanged"
+# number of records per page when catching up on a feed
+CATCHUP_PAGE_SIZE = 50
+# number of feeds fetched in parallel
+FEED_FETCH_WORKERS = 4
+# maximum wall time in seconds to wait for any single feed
+FEED_FETCH_DEADLINE = 3 * HTTP_TIMEOUT
 # TODO: tag actual experiment?
 # TODO: Make certain keywords tags
 # collection could be: Higgs, NewPhysics, 13TeV/8TeV, StandardModel,
@@ -62,6 +164,89 @@ CADI_TO_HASHTAG["HIN"] = "#HeavyIons"
 
 # identifiers for preliminary results
 PRELIM = ["CMS-PAS", "ATLAS-CONF", "LHCb-CONF"]
+# wrong PAS names, e.g. CMS-PAS-XXX-HIG-23-001-YYY instead of CMS-PAS-HIG-23-001
+PAS_NAME_PATTERN = re.compile(r"(CMS-PAS-).{3}-([A-Z]{3}-\d{2}-\d{3})-.*")
+# record ID in CDS record links
+CDS_RECORD_PATTERN = re.compile(r"/record/(\d+)")
+# CADI analysis codes in links to the CMS results pages
+CADI_CODE_PATTERN = re.compile(r".*ancode=(\w{3}-\d{2}-\d{3})")
+# CADI analysis codes in (fixed) PAS identifiers
+PAS_CODE_PATTERN = re.compile(r"CMS-PAS-(\w{3}-\d{2}-\d{3})$")
+# analyses of the identity index named after their CADI code
+ANALYSIS_CODE_PATTERN = re.compile(r"\w{3}-\d{2}-\d{3}$")
+# sub- and superscripts left by LatexNodes2Text and their unicode replacements
+UNICODE_REPLACEMENTS = {
+    "_S^0": "⁰_S ",
+    "^0_S": "⁰_S ",
+    # s quarks
+    "_(s)^0": "⁰_s ",
+    "^0_(s)": "⁰_s ",
+    "_s^*±": "*^±_s ",
+    "_s^0": "⁰_s ",
+    "^0_s": "⁰_s ",
+    "_s^+": "⁺_s ",
+    "^+_s": "⁺_s ",
+    "_s^-": "⁻_s ",
+    "^-_s": "⁻_s ",
+    "_s^±": "^±_s ",
+    # b quarks
+    "_b^*±": "*^±_b ",
+    "_b^0": "⁰_b ",
+    "^0_b": "⁰_b ",
+    "_b^+": "⁺_b ",
+    "^+_b": "⁺_b ",
+    "_b^-": "⁻_b ",
+    "^-_b": "⁻_b ",
+    "_b^±": "^±_b ",
+    # c quarks
+    "_c^*±": "*^±_c ",
+    "_c^0": "⁰_c ",
+    "^0_c": "⁰_c ",
+    "_c^+": "⁺_c ",
+    "^+_c": "⁺_c ",
+    "_c^-": "⁻_c ",
+    "^-_c": "⁻_c ",
+    "_c^±": "^±_c ",
+    # more complicated combinations
+    "_cc^+": "⁺_cc ",
+    "(770)^0": "⁰(770)",
+    "(892)^0": "⁰(892)",
+    "_c(4312)^+": "⁺_c(4312)",
+    "_c(4450)^+": "⁺_c(4450)",
+    "^-1": "⁻¹",
+    "^-2": "⁻²",
+    "^∗+": "*⁺",
+    "^+*": "⁺*",
+    "^∗-": "*⁻",
+    "^-*": "⁻*",
+    "^∗0": "*⁰",
+    "^0*": "⁰*",
+    "^*0": "*⁰",
+    "^*±": "*^±",
+    "^++": "⁺⁺",
+    "^+": "⁺",
+    "^--": "⁻⁻",
+    "^-": "⁻",
+    "_-": "₊",
+    "^0": "⁰",
+    "_0": "₀",
+    "^*": "*",
+    # Remove parentheses for pp centre-of-mass energy
+    "√(s)": "√s",
+}
+# longest match first
+UNICODE_PATTERN = re.compile(
+    "|".join(re.escape(x) for x in sorted(UNICODE_REPLACEMENTS, key=len, reverse=True))
+)
+# minimum Jaccard similarity of the title words of entries of one analysis
+TITLE_SIMILARITY = 0.8
+# MinHash signatures of titles are split into bands for finding similar ones
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
+# state file with the formatted titles and IDs of all posts
+POSTED_TITLES = "POSTED_TITLES"
+# list of the downloaded images in a kept image directory
+IMAGE_LIST_FILE = "images.txt"
 
 
 class Conference(object):
@@ -70,56 +255,133 @@ class Conference(object):
     __slots__ = ["name", "start", "end"]
 
     def __init__(self, name, start, end):
-        """Initialise with conf name, start and end dates."""
+        """Initialise with conf name, start and end dates (YYYY-MM-DD, UTC)."""
         self.name = name
-        self.start = start
-        self.end = end
+        self.start = date_to_timestamp(start)
+        self.end = date_to_timestamp(end)
 
-    def is_now(self, pub_date):
-        """Return conference name if publication date is within date range."""
-        if self.start <= maya.parse(pub_date) <= self.end:
-            # return f"#{self.name}{maya.now().year}"
+    def is_now(self, timestamp):
+        """Return conference name if publication time is within date range."""
+        if self.is_ongoing(timestamp):
+            # return f"#{self.name}{time.gmtime().tm_year}"
             return f"#{self.name}"
         return ""
 
+    def is_ongoing(self, timestamp):
+        """Return True if the timestamp (seconds since the epoch) is within date range."""
+        return timestamp is not None and self.start <= timestamp <= self.end
+
+
+def date_to_timestamp(date_string):
+    """Convert a YYYY-MM-DD date to seconds since the epoch at midnight UTC."""
+    return calendar.timegm(time.strptime(date_string, "%Y-%m-%d"))
+
+
+def parse_rfc822(date_string):
+    """Convert an RFC 822 date as used in RSS to seconds since the epoch."""
+    if not date_string:
+        return None
+    parsed_date = email.utils.parsedate_tz(date_string)
+    if not parsed_date:
+        return None
+    return email.utils.mktime_tz(parsed_date)
+
+
+def format_timestamp(timestamp):
+    """Return a timestamp as human-readable UTC date."""
+    if timestamp is None:
+        return "unknown"
+    return str(datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc))
+
+
+class FeedEntry(object):
+    """Normalised feed entry holding only the fields needed for posting."""
+
+    __slots__ = [
+        "identifier",
+        "source",
+        "feed_id",
+        "title",
+        "link",
+        "published",
+        "timestamp",
+        "prelim",
+        "media_urls",
+        "cadi_code",
+    ]
+
+    def __init__(self, source, feed_id, title, link, published, timestamp, media_urls):
+        """Initialise from the raw feed fields and derive the others once."""
+        self.source = source
+        self.feed_id = feed_id
+        self.title = title
+        self.link = link
+        self.published = published
+        self.timestamp = timestamp
+        self.media_urls = media_urls
+        self.identifier = source
+        # fix wrong PAS name
+        parse_result = PAS_NAME_PATTERN.match(source)
+        if parse_result:
+            self.identifier = parse_result.group(1) + parse_result.group(2)
+        self.prelim = any(item in self.identifier for item in PRELIM)
+        self.cadi_code = None
+        for media_url in media_urls:
+            if media_url.find("cadi?ancode=") >= 0:
+                parse_result = CADI_CODE_PATTERN.match(media_url)
+                if parse_result:
+                    self.cadi_code = parse_result.group(1)
+
+    @classmethod
+    def from_feed(cls, entry, feed_id):
+        """Create from a feedparser entry, dropping everything else."""
+        return cls(
+            source=entry["dc_source"],
+            feed_id=feed_id,
+            title=entry.get("title", ""),
+            link=entry.get("link", ""),
+            published=entry.get("published", ""),
+            timestamp=entry_timestamp(entry),
+            media_urls=[
+                media["url"]
+                for media in entry.get("media_content", [])
+                if media.get("url")
+            ],
+        )
+
+    def __repr__(self):
+        """Return representation for debugging."""
+        return f"FeedEntry({self.identifier!r}, {self.feed_id!r}, {self.published!r})"
+
+
+def entry_timestamp(entry):
+    """Return the publication time of a feed entry in seconds since the epoch.
+
+    The date already parsed by feedparser is used if available.
+    """
+    published_parsed = entry.get("published_parsed")
+    if not published_parsed:
+        return parse_rfc822(entry.get("published"))
+    return calendar.timegm(published_parsed)
+
 
 CONFERENCES = []
 CONFERENCES.append(
     Conference(
         "Moriond",
-        maya.parse(f"{maya.now().year}-03-23"),
-        maya.parse(f"{maya.now().year}-04-11"),
-    )
-)
-CONFERENCES.append(
-    Conference(
-        "EPSHEP2023 EPSHEP23", maya.parse("2023-08-20"), maya.parse("2023-08-30")
+        f"{time.gmtime().tm_year}-03-23",
+        f"{time.gmtime().tm_year}-04-11",
     )
 )
-CONFERENCES.append(
-    Conference("LeptonPhoton23", maya.parse("2023-07-16"), maya.parse("2023-07-26"))
-)
-CONFERENCES.append(
-    Conference("topq2023", maya.parse("2023-09-23"), maya.parse("2023-10-03"))
-)
-CONFERENCES.append(
-    Conference("HiggsCouplings", maya.parse("2019-09-29"), maya.parse("2019-10-06"))
-)
-CONFERENCES.append(
-    Conference("Higgs2023", maya.parse("2023-11-26"), maya.parse("2023-12-06"))
-)
-CONFERENCES.append(
-    Conference("QM2023", maya.parse("2023-09-01"), maya.parse("2023-09-11"))
-)
-CONFERENCES.append(
-    Conference("LHCP #LHCP2024", maya.parse("2024-06-01"), maya.parse("2024-06-10"))
-)
-CONFERENCES.append(
-    Conference("ICHEP2024", maya.parse("2024-07-16"), maya.parse("2024-07-26"))
-)
-CONFERENCES.append(
-    Conference("BOOST2024", maya.parse("2023-07-27"), maya.parse("2023-08-07"))
-)
+CONFERENCES.append(Conference("EPSHEP2023 EPSHEP23", "2023-08-20", "2023-08-30"))
+CONFERENCES.append(Conference("LeptonPhoton23", "2023-07-16", "2023-07-26"))
+CONFERENCES.append(Conference("topq2023", "2023-09-23", "2023-10-03"))
+CONFERENCES.append(Conference("HiggsCouplings", "2019-09-29", "2019-10-06"))
+CONFERENCES.append(Conference("Higgs2023", "2023-11-26", "2023-12-06"))
+CONFERENCES.append(Conference("QM2023", "2023-09-01", "2023-09-11"))
+CONFERENCES.append(Conference("LHCP #LHCP2024", "2024-06-01", "2024-06-10"))
+CONFERENCES.append(Conference("ICHEP2024", "2024-07-16", "2024-07-26"))
+CONFERENCES.append(Conference("BOOST2024", "2023-07-27", "2023-08-07"))
 
 daiquiri.setup(level=logging.INFO)
 logger = daiquiri.getLogger()  # pylint: disable=invalid-name
@@ -153,26 +415,908 @@ def get_twitter_conn_v2(
     return client
 
 
-def read_feed(rss_url):
-    """read the RSS feed and return dictionary"""
+_HTTP_SESSION = None
+_HTTP_ENGINE = None  # AsyncHTTPEngine, if the httpx engine is used
+# identifiers in the state files by absolute path, see posted_ids
+_POSTED_IDS = {}
+# Bloom filters and the covered parts of the state files by absolute path, see
+# posted_filter
+_POSTED_FILTERS = {}
+_LEDGER = None  # Ledger, if used instead of the state files
+_STATE_SEGMENT = None  # name of the state segments of this run, if used
+# segments of other runs found at the start of this run, see state_file_stats
+_SEGMENT_LISTINGS = {}
+_STATE_JOURNAL = None  # StateJournal, if used
+_POST_INDEX = None  # PostIndex, if used
+
+
+class CircuitOpen(requests.ConnectionError):
+    """Raised instead of sending a request to a host that keeps failing."""
+
+
+class CircuitBreaker(object):
+    """Keep track of failing hosts so that requests to them fail fast.
+
+    After max_failures consecutive failures (connection errors, timeouts
+    or server errors) the circuit of a host opens and requests raise
+    CircuitOpen. After reset_after seconds, a single request is let
+    through again; its outcome closes or reopens the circuit.
+    """
+
+    __slots__ = ["max_failures", "reset_after", "failures", "opened", "lock"]
+
+    def __init__(self, max_failures=CIRCUIT_FAILURES, reset_after=CIRCUIT_RESET):
+        """Initialise with the failure threshold and the reset time in seconds."""
+        self.max_failures = max_failures
+        self.reset_after = reset_after
+        self.failures = {}
+        self.opened = {}
+        self.lock = threading.Lock()
+
+    def allow(self, host):
+        """Return True if a request to host may be sent."""
+        with self.lock:
+            opened = self.opened.get(host)
+            if opened is None:
+                return True
+            if time.monotonic() - opened < self.reset_after:
+                return False
+            # let one request through, others fail fast until it returns
+            self.opened[host] = time.monotonic()
+            return True
+
+    def record_success(self, host):
+        """Close the circuit of host."""
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened.pop(host, None)
+
+    def record_failure(self, host):
+        """Count a failure of host and open its circuit at the threshold."""
+        with self.lock:
+            self.failures[host] = self.failures.get(host, 0) + 1
+            if self.failures[host] >= self.max_failures:
+                if host not in self.opened:
+                    logger.warning(
+                        f"{host} failed {self.failures[host]} times in a row, "
+                        f"not contacting it for {self.reset_after} s"
+                    )
+                self.opened[host] = time.monotonic()
+
+
+_CIRCUIT_BREAKER = CircuitBreaker()
+
+
+def create_http_session():
+    """Create an HTTP session with connection pooling and retries."""
+    retry = Retry(
+        total=HTTP_RETRIES,
+        # read timeouts are not retried so that they surface as ReadTimeout
+        read=False,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.headers["User-Agent"] = HTTP_USER_AGENT
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fixture_paths(fixture_dir, url):
+    """Return the paths of the body and metadata files of a recorded URL."""
+    url_hash = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    base_path = os.path.join(fixture_dir, url_hash)
+    return f"{base_path}.body", f"{base_path}.json"
+
+
+def make_raw_response(body, status, headers, reason=None):
+    """Create a urllib3 response serving body from memory."""
+    # the stored body is already decoded
+    headers = {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in ("content-encoding", "transfer-encoding")
+    }
+    headers["Content-Length"] = str(len(body))
+    return HTTPResponse(
+        body=BytesIO(body),
+        headers=headers,
+        status=status,
+        reason=reason,
+        preload_content=False,
+    )
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that stores every response in a fixture directory."""
+
+    def __init__(self, fixture_dir, **kwargs):
+        """Initialise with the directory to store the responses in."""
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """Send the request and record the response."""
+        response = super().send(request, **kwargs)
+        body = response.raw.read(decode_content=True)
+        headers = dict(response.headers)
+        # do not let a conditional request replace a recorded body
+        if response.status_code != 304:
+            body_path, meta_path = fixture_paths(self.fixture_dir, request.url)
+            with open(body_path, "wb") as body_file:
+                body_file.write(body)
+            with open(meta_path, "w") as meta_file:
+                json.dump(
+                    {
+                        "url": request.url,
+                        "status": response.status_code,
+                        "reason": response.reason,
+                        "headers": headers,
+                    },
+                    meta_file,
+                    indent=1,
+                )
+            logger.debug(f"Recorded {request.url}")
+        response.raw = make_raw_response(
+            body, response.status_code, headers, response.reason
+        )
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter that serves responses from a fixture directory."""
+
+    def __init__(self, fixture_dir, **kwargs):
+        """Initialise with the directory containing the recorded responses."""
+        self.fixture_dir = fixture_dir
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """Return the recorded response, or 404 if there is none."""
+        body_path, meta_path = fixture_paths(self.fixture_dir, request.url)
+        if not os.path.isfile(meta_path):
+            logger.warning(f"No recorded response for {request.url}")
+            return self.build_response(
+                request, make_raw_response(b"", 404, {}, "Not Recorded")
+            )
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        etag = meta["headers"].get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            raw = make_raw_response(b"", 304, {"ETag": etag}, "Not Modified")
+        else:
+            with open(body_path, "rb") as body_file:
+                body = body_file.read()
+            raw = make_raw_response(
+                body, meta["status"], meta["headers"], meta["reason"]
+            )
+        return self.build_response(request, raw)
+
+
+def to_requests_response(response):
+    """Convert an httpx response to a requests response."""
+    headers = dict(response.headers)
+    requests_response = requests.Response()
+    requests_response.status_code = response.status_code
+    requests_response.headers = requests.structures.CaseInsensitiveDict(headers)
+    requests_response.encoding = requests.utils.get_encoding_from_headers(
+        requests_response.headers
+    )
+    requests_response.reason = response.reason_phrase
+    requests_response.url = str(response.url)
+    requests_response.raw = make_raw_response(
+        response.content, response.status_code, headers, response.reason_phrase
+    )
+    return requests_response
+
+
+class AsyncHTTPEngine(object):
+    """Send requests through an httpx.AsyncClient running in its own thread.
+
+    get() blocks like requests.get, get_many() sends several requests
+    concurrently. Connections are shared through HTTP/2 if available.
+    Responses and errors are converted to their requests counterparts, so
+    that callers do not depend on the engine in use.
+    """
+
+    def __init__(self):
+        """Start the event loop and create the client."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="http-engine", daemon=True
+        )
+        self.thread.start()
+        self.client = self.run(self.create_client())
+
+    @staticmethod
+    async def create_client():
+        """Create the client with the same limits as the requests session."""
+        limits = httpx.Limits(
+            max_connections=HTTP_POOL_HOSTS * HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=HTTP_POOL_HOSTS * HTTP_POOL_MAXSIZE,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE, limits=limits, retries=HTTP_RETRIES
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            headers={"User-Agent": HTTP_USER_AGENT},
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+        )
+
+    def run(self, coroutine):
+        """Run a coroutine in the event loop and return its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def fetch(self, url, headers=None, timeout=HTTP_TIMEOUT, **kwargs):
+        """GET url, the body is always read completely (ignoring stream).
+
+        As with the requests session, responses with a status in
+        HTTP_RETRY_STATUSES are retried up to HTTP_RETRIES times with
+        exponential backoff. Connection errors are retried by the transport.
+        """
+        for attempt in range(HTTP_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(
+                    HTTP_BACKOFF_FACTOR * 2 ** (attempt - 1)
+                    + random.uniform(0, HTTP_BACKOFF_JITTER)
+                )
+            try:
+                response = await self.client.get(url, headers=headers, timeout=timeout)
+            except httpx.ConnectTimeout as http_error:
+                raise requests.ConnectTimeout(str(http_error)) from http_error
+            except httpx.TimeoutException as http_error:
+                raise requests.ReadTimeout(str(http_error)) from http_error
+            except httpx.TransportError as http_error:
+                raise requests.ConnectionError(str(http_error)) from http_error
+            except httpx.HTTPError as http_error:
+                raise requests.RequestException(str(http_error)) from http_error
+            if response.status_code not in HTTP_RETRY_STATUSES:
+                break
+            logger.debug(f"Retrying {url} after status {response.status_code}")
+        return to_requests_response(response)
+
+    async def fetch_many(self, urls, **kwargs):
+        """GET all urls concurrently, returning responses or exceptions."""
+        return await asyncio.gather(
+            *(self.fetch(url, **kwargs) for url in urls), return_exceptions=True
+        )
+
+    def get(self, url, **kwargs):
+        """GET url and return a requests.Response."""
+        return self.run(self.fetch(url, **kwargs))
+
+    def get_many(self, urls, **kwargs):
+        """GET urls concurrently, return a response or exception per URL."""
+        return self.run(self.fetch_many(urls, **kwargs))
+
+    def close(self):
+        """Close the client and stop the event loop."""
+        self.run(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def configure_http(record_dir=None, replay_dir=None, engine="requests"):
+    """Select the HTTP engine, record all HTTP responses to record_dir or
+    serve them from replay_dir."""
+    global _HTTP_ENGINE
+    if engine == "httpx":
+        if record_dir or replay_dir:
+            logger.warning("Recording and replaying use the requests engine")
+        elif httpx is None:
+            logger.error("httpx is not installed, using the requests engine")
+        else:
+            logger.info(f"Using the httpx engine (HTTP/2: {HTTP2_AVAILABLE})")
+            # httpx logs every request at INFO level
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            _HTTP_ENGINE = AsyncHTTPEngine()
+    session = get_http_session()
+    adapter = None
+    if replay_dir:
+        logger.info(f"Replaying HTTP responses from {replay_dir}")
+        adapter = ReplayAdapter(replay_dir)
+    elif record_dir:
+        logger.info(f"Recording HTTP responses to {record_dir}")
+        adapter = RecordingAdapter(
+            record_dir,
+            pool_connections=HTTP_POOL_HOSTS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=session.get_adapter("https://").max_retries,
+            pool_block=True,
+        )
+    if adapter:
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+
+def close_http():
+    """Close the connections of the HTTP session and engine."""
+    global _HTTP_ENGINE
+    if _HTTP_ENGINE is not None:
+        _HTTP_ENGINE.close()
+        _HTTP_ENGINE = None
+    get_http_session().close()
+
+
+def get_http_session():
+    """Return the HTTP session shared by all network calls."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        _HTTP_SESSION = create_http_session()
+    return _HTTP_SESSION
+
+
+def check_circuit(url):
+    """Return the host of url, raise CircuitOpen if it should not be contacted."""
+    host = urllib.parse.urlsplit(url).netloc
+    if not _CIRCUIT_BREAKER.allow(host):
+        raise CircuitOpen(f"Not contacting {host} after repeated failures")
+    return host
+
+
+def record_outcome(host, result):
+    """Update the circuit breaker with a response or a raised exception."""
+    if isinstance(result, (requests.ConnectionError, requests.Timeout)) or (
+        isinstance(result, requests.Response) and result.status_code >= 500
+    ):
+        _CIRCUIT_BREAKER.record_failure(host)
+    elif isinstance(result, requests.Response):
+        _CIRCUIT_BREAKER.record_success(host)
+
+
+def http_get(url, **kwargs):
+    """GET url through the shared session or engine using the default timeout.
+
+    Raises CircuitOpen without sending the request if the host has failed
+    repeatedly before, see CircuitBreaker.
+    """
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    host = check_circuit(url)
+    try:
+        if _HTTP_ENGINE is not None:
+            response = _HTTP_ENGINE.get(url, **kwargs)
+        else:
+            response = get_http_session().get(url, **kwargs)
+    except requests.RequestException as request_exception:
+        record_outcome(host, request_exception)
+        raise
+    record_outcome(host, response)
+    return response
+
+
+def select_media(experiment, media_url, record_link):
+    """Return whether to download a media file and whether it is an image."""
+    media_found = False
+    media_isimage = False
+    # consider only attached figures and main doc
+    if experiment == "CMS":
+        # CMS follows a certain standard
+        # but figures can be both PDF and PNG
+        if re.search(r"/files\/.*[Ff]igures?_", media_url):
+            media_found = True
+            media_isimage = True
+    elif experiment == "ATLAS":
+        # ATLAS seems to only use PNG format for plots
+        if media_url.lower().endswith(".png"):
+            media_found = True
+            media_isimage = True
+        elif re.search(
+            r"^"
+            + re.escape(urllib.parse.urlsplit(record_link).path)
+            + r"/files/(?![Ff]ig).*\.pdf$",
+            urllib.parse.urlsplit(media_url).path,
+        ):
+            # compare paths only, the record export may use another host
+            media_found = True
+    elif experiment == "LHCb":
+        # LHCb attaches figures as a ZIP file
+        if media_url.lower().endswith(".zip"):
+            logger.info("Found ZIP file for LHCb: " + media_url)
+            media_found = True
+            media_isimage = True  # Treat ZIP as images for now
+    return media_found, media_isimage
+
+
+def record_manifest(record_link):
+    """Return the files attached to a CDS record.
+
+    The list is read from the MARCXML export of the record, so that the
+    exact file names and the figure captions, which are used as alt text,
+    are known before anything is downloaded. Icons and other subformats are
+    skipped. Returns None if the record cannot be read.
+    """
+    parse_result = CDS_RECORD_PATTERN.search(record_link)
+    if not parse_result:
+        return None
+    xml_url = f"{record_link[: parse_result.end()]}?of=xm"
     try:
-        response = requests.get(rss_url, timeout=10)
-    except requests.ReadTimeout:
-        logger.error("Timeout when reading RSS %s", rss_url)
+        response = http_get(xml_url)
+    except requests.RequestException as request_exception:
+        logger.warning(f"Could not read record {xml_url}: {request_exception}")
+        return None
+    if response.status_code != 200:
+        logger.warning(f"Could not read record {xml_url}: {response.status_code}")
+        return None
+    try:
+        root = etree.fromstring(response.content)
+    except etree.XMLSyntaxError as xml_error:
+        logger.warning(f"Could not parse record {xml_url}: {xml_error}")
+        return None
+    manifest = []
+    for datafield in root.iter("{*}datafield"):
+        if datafield.get("tag") != "856" or datafield.get("ind1") != "4":
+            continue
+        subfields = {
+            subfield.get("code"): (subfield.text or "").strip()
+            for subfield in datafield.iter("{*}subfield")
+        }
+        url = subfields.get("u", "")
+        if "/files/" not in url or "subformat=" in url or subfields.get("x"):
+            continue
+        manifest.append(
+            {
+                "url": url,
+                "name": url.rsplit("/", 1)[1],
+                # captions are prefixed with a sort key, e.g. "00001 Caption"
+                "caption": re.sub(r"^\d{5}\s*", "", subfields.get("y", "")),
+            }
+        )
+    return manifest
+
+
+def image_alt_text(image_path, captions, default, max_length=None):
+    """Return the caption of an image from the CDS record, or default.
+
+    captions maps the downloaded file names without extension to the
+    captions of the record (see record_manifest). The processed images carry
+    a trailing underscore (see process_images).
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    alt_text = (captions or {}).get(stem.rstrip("_")) or default
+    if max_length and len(alt_text) > max_length:
+        alt_text = alt_text[: max_length - 3] + "..."
+    return alt_text
+
+
+def download_file(url, out_path):
+    """Download url to out_path, return True if successful."""
+    try:
+        response = http_get(url, stream=True)
+    except requests.RequestException as request_exception:
+        logger.error(f"media: {url} could not be downloaded: {request_exception}")
+        return False
+    return save_response(url, response, out_path)
+
+
+def download_files(downloads):
+    """Download a list of (url, out_path), return a list of success flags.
+
+    With the httpx engine, the files are downloaded concurrently.
+    """
+    if _HTTP_ENGINE is None:
+        return [download_file(url, out_path) for url, out_path in downloads]
+    results = [None] * len(downloads)
+    pending = {}
+    for index, (url, _) in enumerate(downloads):
+        try:
+            pending[index] = check_circuit(url)
+        except CircuitOpen as request_exception:
+            results[index] = request_exception
+    responses = _HTTP_ENGINE.get_many(
+        [downloads[index][0] for index in pending], timeout=HTTP_TIMEOUT
+    )
+    for index, response in zip(pending, responses):
+        record_outcome(pending[index], response)
+        results[index] = response
+    saved = []
+    for (url, out_path), result in zip(downloads, results):
+        if isinstance(result, Exception):
+            logger.error(f"media: {url} could not be downloaded: {result}")
+            saved.append(False)
+        else:
+            saved.append(save_response(url, result, out_path))
+    return saved
+
+
+def save_response(url, response, out_path):
+    """Write the body of a media response to out_path, return True if successful."""
+    # closing the response returns the connection to the pool
+    with response:
+        if response.status_code != 200:
+            logger.error("media: " + url + " does not exist!")
+            return False
+        with open(out_path, "wb") as file_handler:
+            response.raw.decode_content = True
+            shutil.copyfileobj(response.raw, file_handler)
+    return True
+
+
+def feed_cache_path(cache_dir, rss_url):
+    """Return the path of the cache file for a given feed URL."""
+    url_hash = hashlib.sha1(rss_url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{url_hash}.pickle")
+
+
+def load_feed_cache(cache_dir, rss_url):
+    """Load cached validators and entries for a feed, return None if not cached."""
+    cache_file = feed_cache_path(cache_dir, rss_url)
+    if not os.path.isfile(cache_file):
+        return None
+    try:
+        with open(cache_file, "rb") as cache_handler:
+            cached = pickle.load(cache_handler)
+    except (OSError, EOFError, AttributeError, pickle.UnpicklingError) as cache_error:
+        logger.warning(f"Ignoring unreadable feed cache {cache_file}: {cache_error}")
+        return None
+    if not isinstance(cached, dict) or cached.get("url") != rss_url:
+        return None
+    return cached
+
+
+def store_feed_cache(cache_dir, rss_url, etag, modified, entries):
+    """Store validators and parsed entries of a feed in the cache."""
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = feed_cache_path(cache_dir, rss_url)
+    cached = {"url": rss_url, "etag": etag, "modified": modified, "entries": entries}
+    # write to a temporary file first so that an interrupted run cannot
+    # leave a truncated cache behind
+    tmp_file = f"{cache_file}.tmp"
+    try:
+        with open(tmp_file, "wb") as cache_handler:
+            pickle.dump(cached, cache_handler, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except (OSError, pickle.PicklingError) as cache_error:
+        logger.warning(f"Could not write feed cache {cache_file}: {cache_error}")
+
+
+def parse_cds_rss(content, watermark=None):
+    """Parse a CDS RSS feed keeping only the fields used by the bot.
+
+    This is a lightweight alternative to feedparser: items are parsed one at
+    a time and discarded after their title, link, publication date,
+    identifier (dc_source) and media URLs have been extracted. CDS lists the
+    newest records first, so parsing stops at the first item that is
+    strictly older than the watermark (see load_watermark), but only after
+    an item handled at the watermark time, so that a record listed out of
+    order does not hide newer ones. Items published at the watermark time
+    are kept, as they may not all have been handled. The result then has
+    truncated set, and must not be cached.
+    """
+    oldest, known = watermark if watermark else (None, set())
+    reached_known = False
+    truncated = False
+    entries = []
+    context = etree.iterparse(
+        BytesIO(content), events=("end",), tag="item", recover=True
+    )
+    for _, item in context:
+        entry = feedparser.FeedParserDict()
+        entry["title"] = (item.findtext("title") or "").strip()
+        entry["link"] = (item.findtext("link") or "").strip()
+        published = item.findtext("pubDate")
+        timestamp = None
+        if published:
+            entry["published"] = published.strip()
+            timestamp = parse_rfc822(entry["published"])
+            if timestamp is not None:
+                entry["published_parsed"] = time.gmtime(timestamp)
+        dc_source = item.findtext(DC_SOURCE_TAG)
+        if dc_source:
+            entry["dc_source"] = dc_source.strip()
+        entry["media_content"] = [
+            {"url": media.get("url")}
+            for media in item.iter(MEDIA_CONTENT_TAG)
+            if media.get("url")
+        ]
+        # free the memory of the items already processed
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+        if entry.get("dc_source") in known:
+            reached_known = True
+        if (
+            reached_known
+            and oldest is not None
+            and timestamp is not None
+            and timestamp < oldest
+        ):
+            truncated = True
+            break
+        entries.append(entry)
+    del context
+    return feedparser.FeedParserDict(entries=entries, truncated=truncated)
+
+
+def read_feed(rss_url, cache_dir=None, parser="feedparser", watermark=None):
+    """read the RSS feed and return dictionary
+
+    If cache_dir is given, a conditional GET is performed using the ETag and
+    Last-Modified headers of the previous response, and the cached entries
+    are returned without parsing if the server replies 304 Not Modified.
+    With parser="lxml", the feed is read with parse_cds_rss, which stops at
+    the first entry older than the watermark. Such a partial feed is not
+    cached, as it would be served to later runs without a watermark.
+
+    If the feed cannot be fetched, the entries of the last successful
+    response are returned from the cache instead, if available, so that a
+    degraded CDS does not hold up the rest of the run.
+    """
+    cached = None
+    headers = {}
+    if cache_dir:
+        cached = load_feed_cache(cache_dir, rss_url)
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["modified"]:
+                headers["If-Modified-Since"] = cached["modified"]
+    try:
+        response = http_get(rss_url, headers=headers)
+    except requests.RequestException as feed_exception:
+        logger.error(f"Error reading RSS {rss_url}: {feed_exception}")
+        response = None
+    if response is not None and response.status_code == 304 and cached:
+        logger.info(f"Feed {rss_url} not modified, using cached entries")
+        return feedparser.FeedParserDict(entries=cached["entries"])
+    if response is None or response.status_code != 200:
+        if response is not None:
+            logger.error(f"Reading RSS {rss_url} failed: {response.status_code}")
+        if cached:
+            logger.warning(f"Using last cached entries of {rss_url}")
+            return feedparser.FeedParserDict(entries=cached["entries"])
         return
-    # Turn stream into memory stream object for universal feedparser
-    content = BytesIO(response.content)
-    # Parse content
-    feed = feedparser.parse(content)
+    if parser == "lxml":
+        feed = parse_cds_rss(response.content, watermark=watermark)
+    else:
+        # Turn stream into memory stream object for universal feedparser
+        content = BytesIO(response.content)
+        # Parse content
+        feed = feedparser.parse(content)
+    if cache_dir and not feed.get("truncated"):
+        # also cache feeds without validators as fallback for failed fetches
+        store_feed_cache(
+            cache_dir,
+            rss_url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            feed["entries"],
+        )
     return feed
 
 
+class FetchPool(object):
+    """Small thread pool whose worker threads are daemon threads.
+
+    ThreadPoolExecutor joins its workers when the interpreter exits, so a
+    fetch hanging past FEED_FETCH_DEADLINE would still hold up the end of
+    the run. Here the workers are abandoned instead.
+    """
+
+    __slots__ = ("tasks", "workers")
+
+    def __init__(self, max_workers):
+        """Start max_workers daemon threads that wait for tasks."""
+        self.tasks = queue.SimpleQueue()
+        self.workers = [
+            threading.Thread(target=self.work, name="feed-fetch", daemon=True)
+            for _ in range(max_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def work(self):
+        """Run tasks until a None task is received."""
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, function, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except BaseException as task_exception:  # pylint: disable=broad-except
+                future.set_exception(task_exception)
+
+    def submit(self, function, *args):
+        """Queue function(*args) and return a Future for its result."""
+        future = Future()
+        self.tasks.put((future, function, args))
+        return future
+
+    def shutdown(self):
+        """Cancel queued tasks and let idle workers exit without waiting."""
+        while True:
+            try:
+                task = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                task[0].cancel()
+        for _ in self.workers:
+            self.tasks.put(None)
+
+
+def fetch_feeds(
+    feed_dict,
+    cache_dir=None,
+    max_workers=FEED_FETCH_WORKERS,
+    parser="feedparser",
+    watermarks=None,
+    content_hashes=None,
+):
+    """Fetch all feeds concurrently and return their entries as FeedEntry list.
+
+    The entries are merged in the order of feed_dict, independent of which
+    feed finishes first. A feed that does not finish within
+    FEED_FETCH_DEADLINE is skipped without holding back the others. Entries
+    covered by the watermark of their feed (see load_watermark) are dropped,
+    unless their media changed according to content_hashes (see
+    diff_entries), so that their figures can be posted again.
+    """
+    if watermarks is None:
+        watermarks = {}
+    if content_hashes is None:
+        content_hashes = {}
+    feed_entries = []
+    if not feed_dict:
+        return feed_entries
+    executor = FetchPool(min(max_workers, len(feed_dict)))
+    futures = {}
+    for key in feed_dict:
+        logger.info(f"Getting feed for {key}")
+        futures[key] = executor.submit(
+            read_feed, feed_dict[key], cache_dir, parser, watermarks.get(key)
+        )
+    deadline = time.monotonic() + FEED_FETCH_DEADLINE
+    for key in feed_dict:
+        this_feed = None
+        try:
+            this_feed = futures[key].result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            logger.error(f"Giving up on feed {key} after {FEED_FETCH_DEADLINE} s")
+        except Exception as feed_exception:  # pylint: disable=broad-except
+            logger.error(f"Error reading feed {key}: {feed_exception}")
+        if this_feed:
+            this_feed_entries = this_feed["entries"]
+            logger.info("Found %d items for feed %s" % (len(this_feed_entries), key))
+            stored_hashes = content_hashes.get(key, {})
+            n_entries = 0
+            for entry in this_feed_entries:
+                if key not in watermarks or above_watermark(entry, watermarks[key]):
+                    feed_entries.append(FeedEntry.from_feed(entry, key))
+                    n_entries += 1
+                    continue
+                feed_entry = FeedEntry.from_feed(entry, key)
+                stored = stored_hashes.get(feed_entry.source)
+                if media_changed(stored, content_hash(feed_entry)):
+                    logger.info(f"The media of {feed_entry.source} have changed")
+                    feed_entries.append(feed_entry)
+            if key in watermarks:
+                logger.info(f"{n_entries} items are newer than the watermark")
+        else:
+            logger.warning(f"Found no items for feed {key}")
+    # do not wait for feeds that ran into the deadline
+    executor.shutdown()
+    return feed_entries
+
+
+def feed_page_url(rss_url, page, page_size=CATCHUP_PAGE_SIZE):
+    """Return the URL of a page of a CDS feed using the rg and jrec parameters."""
+    parts = urllib.parse.urlsplit(rss_url)
+    query = [
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if key not in ("rg", "jrec")
+    ]
+    query += [("rg", str(page_size)), ("jrec", str(page * page_size + 1))]
+    return urllib.parse.urlunsplit(
+        parts._replace(
+            query=urllib.parse.urlencode(query, quote_via=urllib.parse.quote)
+        )
+    )
+
+
+class CatchupIncomplete(Exception):
+    """Raised by catchup_feed if a page could not be read."""
+
+
+def catchup_feed(
+    feed_id,
+    rss_url,
+    watermark,
+    is_known,
+    max_pages,
+    parser="feedparser",
+    max_workers=FEED_FETCH_WORKERS,
+):
+    """Page through a CDS feed until entries that were handled before are reached.
+
+    This picks up entries that dropped out of the RSS window, e.g. after
+    the bot was down or during large conferences. Pages are fetched
+    max_workers at a time and the new entries are yielded as FeedEntry
+    lists page by page. Paging stops at the first page that reaches the
+    watermark, or, if there is no watermark yet, that contains an entry
+    for which is_known returns True, and after at most max_pages pages.
+    A page that cannot be read is tried once more before CatchupIncomplete
+    is raised, as the entries of the pages after it would be missing.
+    """
+    seen_sources = set()
+    executor = FetchPool(max_workers)
+    try:
+        for first_page in range(0, max_pages, max_workers):
+            pages = range(first_page, min(first_page + max_workers, max_pages))
+            futures = [
+                executor.submit(
+                    read_feed, feed_page_url(rss_url, page), None, parser, watermark
+                )
+                for page in pages
+            ]
+            for page, future in zip(pages, futures):
+                try:
+                    this_feed = future.result()
+                except Exception as feed_exception:  # pylint: disable=broad-except
+                    logger.error(
+                        f"Error reading page {page} of {feed_id}: {feed_exception}"
+                    )
+                    this_feed = None
+                if this_feed is None:
+                    # read_feed returns None if the request failed
+                    logger.warning(f"Could not read page {page} of {feed_id}, retrying")
+                    this_feed = read_feed(
+                        feed_page_url(rss_url, page), None, parser, watermark
+                    )
+                if this_feed is None:
+                    raise CatchupIncomplete(f"Could not read page {page} of {feed_id}")
+                if not this_feed["entries"]:
+                    logger.info(f"Reached the end of {feed_id} at page {page}")
+                    return
+                page_entries = []
+                reached_known = False
+                for entry in this_feed["entries"]:
+                    source = entry.get("dc_source")
+                    # records may move to the next page while paging
+                    if not source or source in seen_sources:
+                        continue
+                    seen_sources.add(source)
+                    if not above_watermark(entry, watermark):
+                        reached_known = True
+                        continue
+                    feed_entry = FeedEntry.from_feed(entry, feed_id)
+                    if watermark[0] is None and is_known(feed_entry):
+                        reached_known = True
+                        continue
+                    page_entries.append(feed_entry)
+                logger.info(
+                    f"Found {len(page_entries)} new items on page {page} of {feed_id}"
+                )
+                yield page_entries
+                if reached_known:
+                    return
+        logger.warning(f"Stopped catching up on {feed_id} after {max_pages} pages")
+    finally:
+        executor.shutdown()
+
+
 def read_html(html_url):
     """read the HTML page and return dictionary"""
     try:
-        response = requests.get(html_url, timeout=10)
-    except requests.ReadTimeout:
-        logger.error("Timeout when reading HTML %s", html_url)
+        response = http_get(html_url)
+    except requests.RequestException as html_exception:
+        logger.error(f"Error reading HTML {html_url}: {html_exception}")
         return
     # Turn stream into memory stream object for universal feedparser
     content = BytesIO(response.content)
@@ -183,68 +1327,13 @@ def read_html(html_url):
 
 
 def convert_to_unicode(text):
-    """Convert some standard sub- and superscripts to unicode."""
+    """Convert some standard sub- and superscripts to unicode.
+
+    All replacements are done in a single pass, taking the longest match at
+    each position.
+    """
     # Check https://github.com/svenkreiss/unicodeit in the long run
-    unicode_text = text
-    unicode_text = unicode_text.replace("_S^0", "⁰_S ")
-    unicode_text = unicode_text.replace("^0_S", "⁰_S ")
-    # s quarks
-    unicode_text = unicode_text.replace("_(s)^0", "⁰_s ")
-    unicode_text = unicode_text.replace("^0_(s)", "⁰_s ")
-    unicode_text = unicode_text.replace("_s^*±", "*^±_s ")
-    unicode_text = unicode_text.replace("_s^0", "⁰_s ")
-    unicode_text = unicode_text.replace("^0_s", "⁰_s ")
-    unicode_text = unicode_text.replace("_s^+", "⁺_s ")
-    unicode_text = unicode_text.replace("^+_s", "⁺_s ")
-    unicode_text = unicode_text.replace("_s^-", "⁻_s ")
-    unicode_text = unicode_text.replace("^-_s", "⁻_s ")
-    unicode_text = unicode_text.replace("_s^±", "^±_s ")
-    # b quarks
-    unicode_text = unicode_text.replace("_b^*±", "*^±_b ")
-    unicode_text = unicode_text.replace("_b^0", "⁰_b ")
-    unicode_text = unicode_text.replace("^0_b", "⁰_b ")
-    unicode_text = unicode_text.replace("_b^+", "⁺_b ")
-    unicode_text = unicode_text.replace("^+_b", "⁺_b ")
-    unicode_text = unicode_text.replace("_b^-", "⁻_b ")
-    unicode_text = unicode_text.replace("^-_b", "⁻_b ")
-    unicode_text = unicode_text.replace("_b^±", "^±_b ")
-    # c quarks
-    unicode_text = unicode_text.replace("_c^*±", "*^±_c ")
-    unicode_text = unicode_text.replace("_c^0", "⁰_c ")
-    unicode_text = unicode_text.replace("^0_c", "⁰_c ")
-    unicode_text = unicode_text.replace("_c^+", "⁺_c ")
-    unicode_text = unicode_text.replace("^+_c", "⁺_c ")
-    unicode_text = unicode_text.replace("_c^-", "⁻_c ")
-    unicode_text = unicode_text.replace("^-_c", "⁻_c ")
-    unicode_text = unicode_text.replace("_c^±", "^±_c ")
-    # more complicated combinations
-    unicode_text = unicode_text.replace("_cc^+", "⁺_cc ")
-    unicode_text = unicode_text.replace("(770)^0", "⁰(770)")
-    unicode_text = unicode_text.replace("(892)^0", "⁰(892)")
-    unicode_text = unicode_text.replace("_c(4312)^+", "⁺_c(4312)")
-    unicode_text = unicode_text.replace("_c(4450)^+", "⁺_c(4450)")
-    unicode_text = unicode_text.replace("^-1", "⁻¹")
-    unicode_text = unicode_text.replace("^-2", "⁻²")
-    unicode_text = unicode_text.replace("^∗+", "*⁺")
-    unicode_text = unicode_text.replace("^+*", "⁺*")
-    unicode_text = unicode_text.replace("^∗-", "*⁻")
-    unicode_text = unicode_text.replace("^-*", "⁻*")
-    unicode_text = unicode_text.replace("^∗0", "*⁰")
-    unicode_text = unicode_text.replace("^0*", "⁰*")
-    unicode_text = unicode_text.replace("^*0", "*⁰")
-    unicode_text = unicode_text.replace("^*±", "*^±")
-    unicode_text = unicode_text.replace("^++", "⁺⁺")
-    unicode_text = unicode_text.replace("^+", "⁺")
-    unicode_text = unicode_text.replace("^--", "⁻⁻")
-    unicode_text = unicode_text.replace("^-", "⁻")
-    unicode_text = unicode_text.replace("_-", "₊")
-    unicode_text = unicode_text.replace("_-", "₋")
-    unicode_text = unicode_text.replace("^0", "⁰")
-    unicode_text = unicode_text.replace("_0", "₀")
-    unicode_text = unicode_text.replace("^*", "*")
-    # Remove parentheses for pp centre-of-mass energy
-    unicode_text = unicode_text.replace("√(s)", "√s")
-    return unicode_text
+    return UNICODE_PATTERN.sub(lambda match: UNICODE_REPLACEMENTS[match.group(0)], text)
 
 
 def format_title(title):
@@ -625,8 +1714,11 @@ def twitter_upload_images(twitter, image_list, post_gif):
     return image_ids
 
 
-def mastodon_upload_images(mastodon_client, image_list, post_gif):
-    """Upload images to Mastodon and return locations."""
+def mastodon_upload_images(mastodon_client, image_list, post_gif, captions=None):
+    """Upload images to Mastodon and return locations.
+
+    Figure captions (see image_alt_text) are used as image descriptions.
+    """
     logger.info("Uploading images to Mastodon.")
     image_ids = []
     # loop over sorted images to get the plots in the right order
@@ -649,7 +1741,12 @@ def mastodon_upload_images(mastodon_client, image_list, post_gif):
             try:
                 response = mastodon_client.media_post(
                     media_file=image_path,
-                    description=f"Image for {image_path.split('/')[0]}",
+                    description=image_alt_text(
+                        image_path,
+                        captions,
+                        f"Image for {image_path.split('/')[0]}",
+                        MASTODON_MAX_ALT_TEXT,
+                    ),
                 )
             except mastodon.MastodonError as mastodon_exception:
                 logger.error(
@@ -662,8 +1759,13 @@ def mastodon_upload_images(mastodon_client, image_list, post_gif):
     return image_ids
 
 
-def bluesky_upload_media(bluesky_client, media_list, identifier_for_alt_text):
-    """Upload media (images or video) to BlueSky and return blob references."""
+def bluesky_upload_media(
+    bluesky_client, media_list, identifier_for_alt_text, captions=None
+):
+    """Upload media (images or video) to BlueSky and return blob references.
+
+    Figure captions (see image_alt_text) are used as alt text of the images.
+    """
     if not bluesky_client:
         return []
 
@@ -705,8 +1807,10 @@ def bluesky_upload_media(bluesky_client, media_list, identifier_for_alt_text):
             with open(image_path, "rb") as f:
                 img_data = f.read()
 
-            alt_text = (
-                f"Image for {identifier_for_alt_text}: {os.path.basename(image_path)}"
+            alt_text = image_alt_text(
+                image_path,
+                captions,
+                f"Image for {identifier_for_alt_text}: {os.path.basename(image_path)}",
             )
             # Truncate alt text if too long
             max_alt_text_len = 500
@@ -820,8 +1924,14 @@ def tweet(
     image_ids,
     post_gif,
     bot_handle,
+    thread=None,
 ):
-    """tweet the new results with title and link and pictures taking care of length limitations."""
+    """tweet the new results with title and link and pictures taking care of length limitations.
+
+    If a dictionary is passed as thread, the ID of the first tweet is stored
+    as thread["root"]. If it contains "reply_to", the first tweet is a reply
+    to that tweet.
+    """
     # type_hashtag: title (identifier) link conf_hashtags
     logger.info("Creating tweet ...")
     # https://dev.twitter.com/rest/reference/get/help/configuration
@@ -838,6 +1948,9 @@ def tweet(
     )
     first_message = True
     previous_status_id = None
+    if thread:
+        # continue the thread of an earlier post of the same analysis
+        previous_status_id = thread.get("reply_to")
     response = {}
     for i, message in enumerate(message_list):
         logger.info(message)
@@ -849,10 +1962,14 @@ def tweet(
                 try:
                     if image_ids:
                         response = twitter.create_tweet(
-                            text=message, media_ids=image_ids
+                            text=message,
+                            media_ids=image_ids,
+                            in_reply_to_tweet_id=previous_status_id,
                         )
                     else:
-                        response = twitter.create_tweet(text=message)
+                        response = twitter.create_tweet(
+                            text=message, in_reply_to_tweet_id=previous_status_id
+                        )
                 except tweepy.TweepyException as tweepy_exception:
                     logger.error(
                         f"TweepyException during first message (GIF) tweet: {tweepy_exception}"
@@ -891,6 +2008,8 @@ def tweet(
                 logger.error(f"Response state: {response}")
                 return None
             logger.debug(response)
+        if i == 0 and thread is not None:
+            thread["root"] = response_post_id(response)
     return response
 
 
@@ -905,8 +2024,14 @@ def toot(
     image_ids,
     post_gif,
     bot_handle,
+    thread=None,
 ):
-    """toot the new results with title and link and pictures taking care of length limitations."""
+    """toot the new results with title and link and pictures taking care of length limitations.
+
+    If a dictionary is passed as thread, the ID of the first toot is stored
+    as thread["root"]. If it contains "reply_to", the first toot is a reply
+    to that toot.
+    """
     # type_hashtag: title (identifier) link conf_hashtags
     logger.info("Creating toot ...")
     toot_allowed_length = 500
@@ -922,6 +2047,9 @@ def toot(
     )
     first_message = True
     previous_status_id = None
+    if thread:
+        # continue the thread of an earlier post of the same analysis
+        previous_status_id = thread.get("reply_to")
     response = {}
     for i, message in enumerate(message_list):
         logger.info(message)
@@ -933,10 +2061,14 @@ def toot(
                 try:
                     if image_ids:
                         response = mastodon_client.status_post(
-                            status=message, media_ids=image_ids
+                            status=message,
+                            media_ids=image_ids,
+                            in_reply_to_id=previous_status_id,
                         )
                     else:
-                        response = mastodon_client.status_post(status=message)
+                        response = mastodon_client.status_post(
+                            status=message, in_reply_to_id=previous_status_id
+                        )
                 except mastodon.MastodonError as mastodon_exception:
                     logger.error(
                         f"MastodonError during first message (GIF) toot: {mastodon_exception}"
@@ -975,6 +2107,8 @@ def toot(
                 logger.error(f"Response state: {response}")
                 return None
             logger.debug(response)
+        if i == 0 and thread is not None:
+            thread["root"] = response_post_id(response)
     return response
 
 
@@ -990,8 +2124,13 @@ def skeet(
     bot_handle,
     previous_skeet_ref=None,  # StrongRef of the previous skeet in a thread
     root_skeet_ref=None,  # StrongRef of the root skeet in a thread
+    thread=None,
 ):
-    """Post (skeet) the new results to BlueSky."""
+    """Post (skeet) the new results to BlueSky.
+
+    If a dictionary is passed as thread, the URI of the first skeet is stored
+    as thread["root"].
+    """
     if (
         not bluesky_client
         or BlueskyClient is None
@@ -1184,6 +2323,9 @@ def skeet(
             else:
                 return None  # Stop trying for this item
 
+        if i == 0 and thread is not None:
+            thread["root"] = response_post_id(response_summary)
+
         # If there are more messages, wait a bit before posting the next part of the thread
         if i < len(message_list) - 1:
             time.sleep(2)  # Short delay for threading
@@ -1267,36 +2409,1251 @@ def skeet_with_media(
     return response_summary
 
 
-def check_id_exists(identifier, feed_id, prefix=""):
-    """Check with ID of the analysis already exists in text file to avoid tweeting again."""
-    txt_file_name = f"{prefix}{feed_id}.txt"
+def enable_state_segments():
+    """Write state to segment files unique to this run instead of the base files.
+
+    State files only ever grow (sets of identifiers, content hashes and
+    watermarks, which are merged by taking the newest), so readers can
+    merge the segments of all runs in any order and concurrent runs never
+    write to the same file. compact_state folds them into the base files.
+    """
+    global _STATE_SEGMENT
+    _STATE_SEGMENT = "{}-{}-{}".format(
+        time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()),
+        socket.gethostname(),
+        os.getpid(),
+    )
+    logger.info(f"Writing state to segments {_STATE_SEGMENT}")
+
+
+def state_file_stats(prefix, feed_id):
+    """Return the existing state files of a feed with their os.stat results.
+
+    The base file <prefix><feed_id>.txt comes first, followed by the
+    segments in STATE_DIR/<prefix><feed_id>/, oldest first. Segments pile up
+    between compactions, so those of other runs are listed only once per
+    run (see reset_segment_listings). Only the base file and the segment of
+    this run are checked on every call.
+    """
+    name = f"{prefix}{feed_id}"
+    stats = []
+    if os.path.isfile(f"{name}.txt"):
+        stats.append((f"{name}.txt", os.stat(f"{name}.txt")))
+    segment_dir = os.path.join(STATE_DIR, name)
+    own_segment = None
+    if _STATE_SEGMENT is not None:
+        own_segment = os.path.join(segment_dir, f"{_STATE_SEGMENT}.txt")
+    listing_key = (os.path.abspath(segment_dir), _STATE_SEGMENT)
+    if listing_key not in _SEGMENT_LISTINGS:
+        _SEGMENT_LISTINGS[listing_key] = [
+            (txt_file_name, os.stat(txt_file_name))
+            for txt_file_name in sorted(glob.glob(os.path.join(segment_dir, "*.txt")))
+            if txt_file_name != own_segment
+        ]
+    stats += _SEGMENT_LISTINGS[listing_key]
+    if own_segment is not None and os.path.isfile(own_segment):
+        stats.append((own_segment, os.stat(own_segment)))
+    return stats
+
+
+def state_files(prefix, feed_id):
+    """Return the existing state files of a feed, see state_file_stats."""
+    return [txt_file_name for txt_file_name, _ in state_file_stats(prefix, feed_id)]
+
+
+def reset_segment_listings():
+    """List the state segments of other runs again, e.g. before the next poll."""
+    _SEGMENT_LISTINGS.clear()
+
+
+def state_file(prefix, feed_id):
+    """Return the state file of a feed to write to."""
+    if _STATE_SEGMENT is None:
+        return f"{prefix}{feed_id}.txt"
+    segment_dir = os.path.join(STATE_DIR, f"{prefix}{feed_id}")
+    os.makedirs(segment_dir, exist_ok=True)
+    return os.path.join(segment_dir, f"{_STATE_SEGMENT}.txt")
+
+
+def read_state(prefix, feed_id):
+    """Return the lines of all state files of a feed, see state_files.
+
+    Lines still waiting in the journal come last.
+    """
+    lines = []
+    for txt_file_name in state_files(prefix, feed_id):
+        with open(txt_file_name) as txt_file:
+            lines += txt_file.readlines()
+    if _STATE_JOURNAL is not None:
+        lines += _STATE_JOURNAL.pending_lines(f"{prefix}{feed_id}")
+    return lines
+
+
+def write_state(txt_file_name, lines):
+    """Replace the content of a state file.
+
+    The new content is synced to disk before it is renamed over the old
+    file, so that a crash leaves either the old or the new content.
+    """
+    tmp_file_name = f"{txt_file_name}.tmp"
+    with open(tmp_file_name, "w") as txt_file:
+        txt_file.writelines(f"{line}\n" for line in lines)
+        txt_file.flush()
+        os.fsync(txt_file.fileno())
+    os.replace(tmp_file_name, txt_file_name)
+
+
+def append_state(prefix, feed_id, line):
+    """Append a line to the state file of a feed, through the journal if used."""
+    if _STATE_JOURNAL is not None:
+        _STATE_JOURNAL.append(prefix, feed_id, line)
+        return
+    with open(state_file(prefix, feed_id), "a") as txt_file:
+        txt_file.write(f"{line}\n")
+
+
+def state_signature(prefix, feed_id):
+    """Return names, sizes and modification times of the state files of a feed.
+
+    The number of lines still waiting in the journal is included as well.
+    """
+    signature = []
+    for txt_file_name, stat in state_file_stats(prefix, feed_id):
+        signature.append((txt_file_name, stat.st_mtime_ns, stat.st_size))
+    if _STATE_JOURNAL is not None:
+        n_pending = len(_STATE_JOURNAL.pending_lines(f"{prefix}{feed_id}"))
+        signature.append((_STATE_JOURNAL.path, n_pending))
+    return tuple(signature)
+
+
+def apply_state_lines(records):
+    """Append (txt_file_name, line) records to the state files and sync them.
+
+    A line torn by a crash is terminated first, so that it cannot swallow
+    the next identifier.
+    """
+    lines_by_file = {}
+    for txt_file_name, line in records:
+        lines_by_file.setdefault(txt_file_name, []).append(line)
+    for txt_file_name, lines in lines_by_file.items():
+        with open(txt_file_name, "a+b") as txt_file:
+            if txt_file.tell() > 0:
+                txt_file.seek(-1, os.SEEK_END)
+                if txt_file.read(1) != b"\n":
+                    txt_file.write(b"\n")
+            txt_file.write("".join(f"{line}\n" for line in lines).encode())
+            txt_file.flush()
+            os.fsync(txt_file.fileno())
+
+
+class StateJournal(object):
+    """Write-ahead journal for the lines appended to the state files.
+
+    Appended lines are buffered in the journal file, and commit makes all of
+    them durable with a single fsync. At a checkpoint, they are written to
+    the state files and the journal is emptied. If the bot is killed in
+    between, replay_journal applies the committed lines on the next start;
+    a record torn by the crash was never committed and is dropped.
+
+    Each process has its own journal, named after its host and process ID,
+    and keeps it locked while it runs, so that concurrent runs never apply
+    or remove each other's records.
+    """
+
+    __slots__ = ["path", "journal_file", "pending", "synced"]
+
+    def __init__(self, path=None):
+        """Open and lock the journal of this process, by default in the
+        working directory."""
+        self.path = path or f"{STATE_JOURNAL}-{worker_id()}"
+        self.journal_file = open(self.path, "ab")
+        fcntl.flock(self.journal_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # (state name, state file, line) not yet written to the state files
+        self.pending = []
+        # False while lines have been appended since the last fsync
+        self.synced = True
+
+    def append(self, prefix, feed_id, line):
+        """Buffer a line for the state file of a feed."""
+        txt_file_name = state_file(prefix, feed_id)
+        record = json.dumps({"file": txt_file_name, "line": line})
+        self.journal_file.write(f"{record}\n".encode())
+        self.pending.append((f"{prefix}{feed_id}", txt_file_name, line))
+        self.synced = False
+
+    def pending_lines(self, name):
+        """Return the lines waiting for the state files of prefix + feed ID name."""
+        return [f"{line}\n" for state, _, line in self.pending if state == name]
+
+    def commit(self):
+        """Make all lines appended so far durable.
+
+        Nothing is synced if no line has been appended since the last commit.
+        """
+        if not self.synced:
+            self.journal_file.flush()
+            os.fsync(self.journal_file.fileno())
+            self.synced = True
+        if len(self.pending) >= JOURNAL_CHECKPOINT:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write the pending lines to the state files and empty the journal."""
+        if not self.pending:
+            # the journal is empty already
+            return
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+        apply_state_lines([(x[1], x[2]) for x in self.pending])
+        self.pending = []
+        self.journal_file.truncate(0)
+        os.fsync(self.journal_file.fileno())
+        self.synced = True
+
+    def close(self):
+        """Checkpoint and remove the journal."""
+        self.checkpoint()
+        # remove before unlocking, so that nobody replays the empty journal
+        os.remove(self.path)
+        self.journal_file.close()
+
+
+def replay_journal(directory="."):
+    """Apply the committed lines of the journals left behind by killed runs.
+
+    A journal that can be locked belongs to a process that has died, as the
+    lock is released with the process. Journals of running processes are
+    left alone. Returns the number of lines applied.
+    """
+    n_replayed = 0
+    for path in sorted(glob.glob(os.path.join(directory, f"{STATE_JOURNAL}*"))):
+        records = []
+        with open(path, "rb") as journal_file:
+            try:
+                fcntl.flock(journal_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            # another process may have replayed and removed it in the meantime
+            if not os.path.isfile(path) or not os.path.samestat(
+                os.stat(path), os.fstat(journal_file.fileno())
+            ):
+                continue
+            for raw_record in journal_file:
+                if not raw_record.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(raw_record)
+                except ValueError:
+                    break
+                records.append((record["file"], record["line"]))
+            apply_state_lines(records)
+            os.remove(path)
+        if records:
+            logger.warning(f"Replayed {len(records)} lines of a killed run from {path}")
+        n_replayed += len(records)
+    return n_replayed
+
+
+def open_state_journal(path=None):
+    """Replay leftover journals and journal all state appends from now on."""
+    global _STATE_JOURNAL
+    replay_journal(os.path.dirname(path) if path else ".")
+    _STATE_JOURNAL = StateJournal(path)
+    return _STATE_JOURNAL
+
+
+def close_state_journal():
+    """Write all journaled lines to the state files and stop journaling."""
+    global _STATE_JOURNAL
+    if _STATE_JOURNAL is not None:
+        _STATE_JOURNAL.close()
+        _STATE_JOURNAL = None
+
+
+def compact_state():
+    """Fold all state segments into the base files and remove them.
+
+    This must not run concurrently with the bot. Returns the number of
+    segments removed.
+    """
+    n_segments = 0
+    for segment_dir in sorted(glob.glob(os.path.join(STATE_DIR, "*"))):
+        name = os.path.basename(segment_dir)
+        segments = sorted(glob.glob(os.path.join(segment_dir, "*.txt")))
+        if not segments:
+            continue
+        if name.startswith("WATERMARK_"):
+            published, identifiers = load_watermark(name[len("WATERMARK_") :])
+            lines = [f"{published} {x}" for x in sorted(identifiers)]
+        elif name.startswith("CONTENT_"):
+            content_hashes = load_content_hashes(name[len("CONTENT_") :])
+            lines = [f"{key} {value}" for key, value in content_hashes.items()]
+        else:
+            # keep the order in which identifiers were first stored
+            lines = list(dict.fromkeys(x.strip("\n") for x in read_state(name, "")))
+        write_state(f"{name}.txt", lines)
+        for txt_file_name in segments:
+            os.remove(txt_file_name)
+        logger.info(f"Compacted {len(segments)} segments into {name}.txt")
+        n_segments += len(segments)
+    reset_segment_listings()
+    return n_segments
+
+
+def posted_ids(feed_id, prefix=""):
+    """Return the set of identifiers stored in the text files of a feed.
+
+    The files are only read again if they changed, e.g. after merging the
+    state of another run.
+    """
+    txt_file_name = os.path.abspath(f"{prefix}{feed_id}.txt")
     # create file if it doesn't exist yet
     if not os.path.isfile(txt_file_name):
         open(txt_file_name, "a").close()
-    with open(txt_file_name) as txt_file:
-        for line in txt_file:
-            if identifier == line.strip("\n"):
-                return True
+    signature = state_signature(prefix, feed_id)
+    cached = _POSTED_IDS.get(txt_file_name)
+    if cached is None or cached[0] != signature:
+        lines = read_state(prefix, feed_id)
+        cached = (signature, {line.strip("\n") for line in lines})
+        _POSTED_IDS[txt_file_name] = cached
+    return cached[1]
+
+
+class BloomFilter(object):
+    """Set of strings answering membership without false negatives.
+
+    Sized for capacity items with a false positive rate of error_rate, using
+    double hashing of a BLAKE2 digest.
+    """
+
+    __slots__ = ["capacity", "n_bits", "n_hashes", "n_items", "bits"]
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        """Create an empty filter."""
+        self.capacity = capacity
+        self.n_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.n_items = 0
+        self.bits = bytearray((self.n_bits + 7) // 8)
+
+    def positions(self, item):
+        """Return the bit positions of an item."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.n_bits for i in range(self.n_hashes)]
+
+    def add(self, item):
+        """Add an item."""
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.n_items += 1
+
+    def __contains__(self, item):
+        """Return False if item has not been added, True if it probably has."""
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+    def to_dict(self):
+        """Return the filter as dictionary of built-in types for pickling."""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, filter_dict):
+        """Create from the output of to_dict."""
+        bloom = cls.__new__(cls)
+        for key in cls.__slots__:
+            setattr(bloom, key, filter_dict[key])
+        bloom.bits = bytearray(bloom.bits)
+        return bloom
+
+
+def load_posted_filter(bloom_file_name):
+    """Return a stored Bloom filter and the parts of the state files it covers.
+
+    Returns None if there is no usable filter.
+    """
+    if not os.path.isfile(bloom_file_name):
+        return None
+    try:
+        with open(bloom_file_name, "rb") as bloom_file:
+            stored = pickle.load(bloom_file)
+        bloom, covered = BloomFilter.from_dict(stored["filter"]), stored["covered"]
+    except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError) as error:
+        logger.warning(f"Ignoring unreadable Bloom filter {bloom_file_name}: {error}")
+        return None
+    if not all(isinstance(x, tuple) for x in covered.values()):
+        # stored without the digests of the covered parts
+        return None
+    return bloom, covered
+
+
+def store_posted_filter(bloom_file_name, bloom, covered):
+    """Write a Bloom filter and the parts of the state files it covers."""
+    os.makedirs(os.path.dirname(bloom_file_name), exist_ok=True)
+    tmp_file = f"{bloom_file_name}.tmp"
+    try:
+        with open(tmp_file, "wb") as bloom_file:
+            pickle.dump(
+                {"filter": bloom.to_dict(), "covered": covered},
+                bloom_file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_file, bloom_file_name)
+    except OSError as error:
+        logger.warning(f"Could not write Bloom filter {bloom_file_name}: {error}")
+
+
+def read_appended_lines(prefix, feed_id, covered):
+    """Return the lines appended to the state files of a feed since covered.
+
+    covered maps state files to the number of bytes already read, the
+    inode, modification time and size of the file at that time, and a
+    digest of the last BLOOM_TAIL_SIZE bytes read. It is updated. Files
+    whose stat results did not change are skipped. Returns None if the
+    file is shorter or those bytes have changed, i.e. the file has been
+    rewritten rather than appended to.
+    """
+    lines = []
+    for txt_file_name, stat in state_file_stats(prefix, feed_id):
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        offset, old_signature, digest = covered.get(txt_file_name, (0, None, None))
+        if signature == old_signature:
+            continue
+        if stat.st_size < offset:
+            return None
+        with open(txt_file_name, "rb") as txt_file:
+            tail_start = max(0, offset - BLOOM_TAIL_SIZE)
+            txt_file.seek(tail_start)
+            tail = txt_file.read(offset - tail_start)
+            if offset and hashlib.blake2b(tail, digest_size=16).digest() != digest:
+                return None
+            data = txt_file.read(stat.st_size - offset)
+        # a line still being written is read next time
+        n_complete = data.rfind(b"\n") + 1
+        lines += data[:n_complete].decode("utf-8").split("\n")[:-1]
+        tail += data[max(0, n_complete - BLOOM_TAIL_SIZE) : n_complete]
+        digest = hashlib.blake2b(tail[-BLOOM_TAIL_SIZE:], digest_size=16).digest()
+        covered[txt_file_name] = (offset + n_complete, signature, digest)
+    return [line for line in lines if line]
+
+
+def posted_filter(feed_id, prefix=""):
+    """Return a Bloom filter of the identifiers in the state files of a feed.
+
+    The filter is stored in BLOOM_DIR with the parts of the state files it
+    covers, so that only lines appended since have to be read. It is
+    rebuilt from all files when it is full or a file has been rewritten.
+    """
+    name = f"{prefix}{feed_id}"
+    bloom_file_name = os.path.abspath(os.path.join(BLOOM_DIR, f"{name}.bloom"))
+    cached = _POSTED_FILTERS.get(bloom_file_name)
+    is_new = cached is None
+    if is_new:
+        cached = load_posted_filter(bloom_file_name)
+    bloom, covered = cached if cached else (None, {})
+    lines = read_appended_lines(prefix, feed_id, covered)
+    if bloom is None or lines is None or bloom.n_items + len(lines) > bloom.capacity:
+        is_new = True
+        covered = {}
+        lines = read_appended_lines(prefix, feed_id, covered)
+        bloom = BloomFilter(max(BLOOM_MIN_CAPACITY, 2 * len(lines)))
+    for line in lines:
+        bloom.add(line)
+    if lines:
+        store_posted_filter(bloom_file_name, bloom, covered)
+    if is_new and _STATE_JOURNAL is not None:
+        # store_id adds to the filter in memory afterwards
+        for line in _STATE_JOURNAL.pending_lines(name):
+            bloom.add(line.strip("\n"))
+    _POSTED_FILTERS[bloom_file_name] = (bloom, covered)
+    return bloom
+
+
+def platform_name(prefix):
+    """Return the platform name used in the ledger for a state file prefix."""
+    return prefix.rstrip("_").lower()
+
+
+class Ledger(object):
+    """SQLite database recording every post.
+
+    There is one row per identifier, feed and platform with the ID of the
+    last post of the thread, the ID of its first post, the publication
+    time of the entry, the time of posting, the time it took to post and
+    the number of images. It can replace the TWITTER_/MASTODON_/BLUESKY_
+    text files, which can be imported and exported for compatibility.
+    Bots sharing the ledger lease their posts in the leases table.
+    """
+
+    __slots__ = ["path", "connection"]
+
+    def __init__(self, path):
+        """Open or create the ledger at path."""
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(LEDGER_SCHEMA)
+
+    def exists(self, identifier, feed_id, platform):
+        """Return True if the analysis has been posted on platform."""
+        cursor = self.connection.execute(
+            "SELECT 1 FROM posts WHERE identifier = ? AND feed_id = ? AND platform = ?",
+            (identifier, feed_id, platform),
+        )
+        return cursor.fetchone() is not None
+
+    def get(self, identifier, feed_id, platform):
+        """Return the row of a post as dictionary, or None."""
+        cursor = self.connection.execute(
+            "SELECT * FROM posts WHERE identifier = ? AND feed_id = ? AND platform = ?",
+            (identifier, feed_id, platform),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def record(
+        self,
+        identifier,
+        feed_id,
+        platform,
+        post_id=None,
+        thread_id=None,
+        published=None,
+        duration=None,
+        n_images=None,
+    ):
+        """Record a post, replacing an earlier one of the same analysis."""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    identifier,
+                    feed_id,
+                    platform,
+                    post_id,
+                    thread_id,
+                    published,
+                    int(time.time()),
+                    duration,
+                    n_images,
+                ),
+            )
+
+    def claim(self, identifier, feed_id, platform, worker, duration, check_posted=True):
+        """Lease posting an analysis on platform to worker for duration seconds.
+
+        Returns True if worker holds the lease and, if check_posted is True,
+        the analysis has not been posted yet. A lease held by another worker
+        is only taken over once it has expired, e.g. because that worker
+        crashed.
+        """
+        now = time.time()
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO leases VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (identifier, feed_id, platform) DO UPDATE"
+                " SET worker = excluded.worker, expires = excluded.expires"
+                " WHERE leases.expires < ? OR leases.worker = excluded.worker",
+                (identifier, feed_id, platform, worker, now + duration, now),
+            )
+        if cursor.rowcount != 1:
+            return False
+        # the lease is released only after the post has been recorded
+        if check_posted and self.exists(identifier, feed_id, platform):
+            self.release(identifier, feed_id, platform, worker)
+            return False
+        return True
+
+    def release(self, identifier, feed_id, platform, worker):
+        """Release the lease of worker, if it still holds it."""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM leases WHERE identifier = ? AND feed_id = ?"
+                " AND platform = ? AND worker = ?",
+                (identifier, feed_id, platform, worker),
+            )
+
+    def last_post(self, identifiers, platform):
+        """Return the ID of the last post of any of identifiers on platform, or None."""
+        placeholders = ", ".join("?" * len(identifiers))
+        cursor = self.connection.execute(
+            "SELECT post_id FROM posts WHERE platform = ? AND post_id IS NOT NULL"
+            f" AND identifier IN ({placeholders})"
+            " ORDER BY posted_at DESC, rowid DESC LIMIT 1",
+            [platform] + list(identifiers),
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def import_text_files(self, directory="."):
+        """Import the state text files in directory, return the number of new rows."""
+        n_imported = 0
+        with self.connection:
+            for prefix in PLATFORM_PREFIXES:
+                pattern = os.path.join(directory, f"{prefix}*.txt")
+                for txt_file_name in sorted(glob.glob(pattern)):
+                    feed_id = os.path.basename(txt_file_name)[len(prefix) : -4]
+                    with open(txt_file_name) as txt_file:
+                        rows = [
+                            (line.strip("\n"), feed_id, platform_name(prefix))
+                            for line in txt_file
+                            if line.strip()
+                        ]
+                    cursor = self.connection.executemany(
+                        "INSERT OR IGNORE INTO posts (identifier, feed_id, platform)"
+                        " VALUES (?, ?, ?)",
+                        rows,
+                    )
+                    n_imported += cursor.rowcount
+        return n_imported
+
+    def export_text_files(self, directory="."):
+        """Append all identifiers missing in the state text files in directory.
+
+        Returns the number of identifiers written.
+        """
+        identifiers = {}
+        for platform, feed_id, identifier in self.connection.execute(
+            "SELECT platform, feed_id, identifier FROM posts ORDER BY posted_at, rowid"
+        ):
+            identifiers.setdefault((platform, feed_id), []).append(identifier)
+        n_exported = 0
+        for (platform, feed_id), feed_identifiers in identifiers.items():
+            txt_file_name = os.path.join(directory, f"{platform.upper()}_{feed_id}.txt")
+            existing = set()
+            if os.path.isfile(txt_file_name):
+                with open(txt_file_name) as txt_file:
+                    existing = {line.strip("\n") for line in txt_file}
+            missing = [x for x in feed_identifiers if x not in existing]
+            if missing:
+                with open(txt_file_name, "a") as txt_file:
+                    txt_file.writelines(f"{x}\n" for x in missing)
+            n_exported += len(missing)
+        return n_exported
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+
+def open_ledger(path):
+    """Use the ledger at path instead of the state text files."""
+    global _LEDGER
+    logger.info(f"Using the ledger {path}")
+    _LEDGER = Ledger(path)
+    return _LEDGER
+
+
+def worker_id():
+    """Return the ID of this bot instance for leases."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def claim_post(identifier, feed_id, prefix, duration, check_posted=True):
+    """Lease posting an analysis on a platform in the ledger, see Ledger.claim."""
+    return _LEDGER.claim(
+        identifier,
+        feed_id,
+        platform_name(prefix),
+        worker_id(),
+        duration,
+        check_posted=check_posted,
+    )
+
+
+def renew_post(identifier, feed_id, prefix, duration):
+    """Renew a lease obtained with claim_post before another attempt to post.
+
+    Retries can outlast the lease, after which another bot may take it
+    over. Returns False if that happened, True if the lease is still held
+    or no lease is used (duration is None).
+    """
+    if not duration or claim_post(
+        identifier, feed_id, prefix, duration, check_posted=False
+    ):
+        return True
+    logger.warning(f"Lost the lease of {identifier} on {platform_name(prefix)}")
     return False
 
 
-def store_id(identifier, feed_id, prefix=""):
-    """Store ID of the analysis in text file to avoid tweeting again."""
-    txt_file_name = f"{prefix}{feed_id}.txt"
-    with open(txt_file_name, "a") as txt_file:
-        txt_file.write("%s\n" % identifier)
+def release_post(identifier, feed_id, prefix):
+    """Release a lease obtained with claim_post."""
+    _LEDGER.release(identifier, feed_id, platform_name(prefix), worker_id())
 
 
-def main():
-    """Main function."""
-    dry_run = False  # run without tweeting
-    analysis_id = ""
-    keep_image_dir = False
-    list_analyses = False
-    post_gif = True
-    use_arxiv_link = False
+def check_id_exists(identifier, feed_id, prefix=""):
+    """Check with ID of the analysis already exists in text file to avoid tweeting again."""
+    if _LEDGER is not None:
+        return _LEDGER.exists(identifier, feed_id, platform_name(prefix))
+    # only read all identifiers if the Bloom filter cannot rule it out
+    if identifier not in posted_filter(feed_id, prefix):
+        return False
+    return identifier in posted_ids(feed_id, prefix)
+
+
+def store_id(identifier, feed_id, prefix="", title=None, **details):
+    """Store ID of the analysis in text file to avoid tweeting again.
+
+    If a ledger is used, the post is recorded there instead, together with
+    the details (see Ledger.record). If the post index is used, the
+    formatted title is added to it.
+    """
+    if _POST_INDEX is not None and title is not None:
+        _POST_INDEX.add(
+            identifier, feed_id, title, platform_name(prefix), details.get("post_id")
+        )
+    if _LEDGER is not None:
+        _LEDGER.record(identifier, feed_id, platform_name(prefix), **details)
+        return
+    # update the identifiers and the filter kept in memory, if loaded
+    txt_file_name = os.path.abspath(f"{prefix}{feed_id}.txt")
+    cached = _POSTED_IDS.pop(txt_file_name, None)
+    is_current = cached is not None and cached[0] == state_signature(prefix, feed_id)
+    append_state(prefix, feed_id, identifier)
+    if _STATE_JOURNAL is not None:
+        # a lost identifier means posting again, so sync after every post
+        _STATE_JOURNAL.commit()
+    if is_current:
+        cached[1].add(identifier)
+        _POSTED_IDS[txt_file_name] = (state_signature(prefix, feed_id), cached[1])
+    bloom_file_name = os.path.abspath(
+        os.path.join(BLOOM_DIR, f"{prefix}{feed_id}.bloom")
+    )
+    if bloom_file_name in _POSTED_FILTERS:
+        _POSTED_FILTERS[bloom_file_name][0].add(identifier)
+
+
+def response_post_id(response):
+    """Return the ID of a post from a Twitter, Mastodon or BlueSky response."""
+    # tweepy.Response
+    data = getattr(response, "data", None)
+    if isinstance(data, dict) and data.get("id"):
+        return str(data["id"])
+    if isinstance(response, dict):
+        for key in ("id", "uri"):
+            if response.get(key):
+                return str(response[key])
+    return None
+
+
+def post_details(response, thread, published, start, n_images):
+    """Return the details of a successful post to be recorded by store_id."""
+    return {
+        "post_id": response_post_id(response),
+        "thread_id": thread.get("root"),
+        "published": published,
+        "duration": round(time.monotonic() - start, 3),
+        "n_images": n_images,
+    }
+
+
+def configured_platforms(auth_dict):
+    """Return the state file prefixes of all platforms configured in auth_dict."""
+    prefixes = []
+    if "CONSUMER_KEY" in auth_dict:
+        prefixes.append("TWITTER_")
+    if "MASTODON_ACCESS_TOKEN" in auth_dict:
+        prefixes.append("MASTODON_")
+    if "BLUESKY_HANDLE" in auth_dict and "BLUESKY_APP_PASSWORD" in auth_dict:
+        prefixes.append("BLUESKY_")
+    return prefixes
+
+
+def load_watermark(feed_id, prefix="WATERMARK_"):
+    """Load the watermark of a feed.
+
+    The watermark consists of the publication time of the newest entry up to
+    which all entries have been handled, and the identifiers handled at
+    exactly that time. The file contains one "<timestamp> <identifier>" line
+    per identifier, so that the union of two watermark files (e.g. after
+    concurrent runs) still yields a valid, newer watermark.
+    """
+    published = None
+    identifiers = set()
+    for line in read_state(prefix, feed_id):
+        fields = line.split(None, 1)
+        if len(fields) != 2 or not fields[0].isdigit():
+            continue
+        timestamp = int(fields[0])
+        if published is None or timestamp > published:
+            published = timestamp
+            identifiers = set()
+        if timestamp == published:
+            identifiers.add(fields[1].strip())
+    return published, identifiers
+
+
+def store_watermark(feed_id, published, identifiers, prefix="WATERMARK_"):
+    """Store the watermark of a feed, replacing the previous one."""
+    write_state(
+        state_file(prefix, feed_id),
+        [f"{published} {identifier}" for identifier in sorted(identifiers)],
+    )
+
+
+def above_watermark(entry, watermark):
+    """Return True if the entry is not covered by the watermark."""
+    published, identifiers = watermark
+    timestamp = entry_timestamp(entry)
+    if published is None or timestamp is None:
+        return True
+    if timestamp == published:
+        return entry.get("dc_source") not in identifiers
+    return timestamp > published
+
+
+def advance_watermark(watermark, entries, handled):
+    """Return the watermark advanced over the handled entries.
+
+    Entries (FeedEntry objects) are walked in order of publication and the
+    watermark is moved forward until the first entry that has not been
+    handled, so that no unhandled entry ever ends up below the watermark.
+    """
+    published, identifiers = watermark
+    dated_entries = [(entry.timestamp, entry.source) for entry in entries]
+    for timestamp, source in sorted(x for x in dated_entries if x[0] is not None):
+        if source not in handled:
+            break
+        if published is None or timestamp > published:
+            published = timestamp
+            identifiers = set()
+        identifiers.add(source)
+    return published, identifiers
+
+
+def content_hash(entry):
+    """Return a hash of the title, link and media URLs of a FeedEntry.
+
+    A hash of the media URLs alone follows after a dash, so that changed
+    figures can be told apart from other changes (see media_changed).
+    """
+    media_urls = sorted({media_url.split("?", 1)[0] for media_url in entry.media_urls})
+    content = "\n".join([entry.title, entry.link] + media_urls)
+    media_digest = hashlib.sha1("\n".join(media_urls).encode("utf-8")).hexdigest()
+    return f"{hashlib.sha1(content.encode('utf-8')).hexdigest()}-{media_digest[:16]}"
+
+
+def media_changed(stored, digest):
+    """Return True if the media URLs of an entry differ from the stored hash.
+
+    Hashes stored without the media part never count as changed.
+    """
+    if not stored or not digest or "-" not in stored:
+        return False
+    return stored.split("-", 1)[1] != digest.split("-", 1)[1]
+
+
+def load_content_hashes(feed_id, prefix="CONTENT_"):
+    """Load the content hashes of the handled entries of a feed.
+
+    The file contains one "<identifier> <hash>" line per handled entry and
+    change of its content, the last line of an identifier wins.
+    """
+    content_hashes = {}
+    for line in read_state(prefix, feed_id):
+        fields = line.split()
+        if len(fields) == 2:
+            content_hashes[fields[0]] = fields[1]
+    return content_hashes
+
+
+def store_content_hash(feed_id, identifier, digest, prefix="CONTENT_"):
+    """Append the content hash of a handled entry."""
+    append_state(prefix, feed_id, f"{identifier} {digest}")
+
+
+def diff_entries(entries, content_hashes):
+    """Compare FeedEntry objects with the content hashes of handled entries.
+
+    content_hashes maps feed IDs to the output of load_content_hashes.
+    Returns a dictionary mapping the source identifier of each entry to its
+    status (ENTRY_NEW, ENTRY_UPDATED or ENTRY_UNCHANGED), content hash and
+    stored hash.
+    """
+    entry_diff = {}
+    for entry in entries:
+        digest = content_hash(entry)
+        stored = content_hashes.get(entry.feed_id, {}).get(entry.source)
+        if stored is None:
+            status = ENTRY_NEW
+        elif stored.split("-", 1)[0] != digest.split("-", 1)[0]:
+            status = ENTRY_UPDATED
+        else:
+            status = ENTRY_UNCHANGED
+        entry_diff[entry.source] = (status, digest, stored)
+    return entry_diff
 
-    # parse arguments
+
+def title_words(title):
+    """Return the set of lower-case words of a title for comparing titles."""
+    return frozenset(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def title_similarity(words, other_words):
+    """Return the Jaccard similarity of two sets of title words."""
+    if not words or not other_words:
+        return 0.0
+    return len(words & other_words) / len(words | other_words)
+
+
+def analysis_code(post):
+    """Return the CADI code of an entry from its links or PAS identifier, or None."""
+    if post.cadi_code:
+        return post.cadi_code
+    parse_result = PAS_CODE_PATTERN.match(post.identifier)
+    if parse_result:
+        return parse_result.group(1)
+    return None
+
+
+def minhash_signature(words, n_hashes=MINHASH_BANDS * MINHASH_ROWS):
+    """Return the minimum of n_hashes hash functions over a set of words.
+
+    The minima are returned as bytes of unsigned 64-bit integers.
+    """
+    hashes = []
+    for word in words:
+        digest = hashlib.shake_128(word.encode("utf-8")).digest(8 * n_hashes)
+        hashes.append(memoryview(digest).cast("Q"))
+    if len(hashes) == 1:
+        return hashes[0].tobytes()
+    return array.array("Q", map(min, *hashes)).tobytes() if hashes else b""
+
+
+def load_minhash_signatures(pickle_file_name):
+    """Return the signatures stored by store_minhash_signatures, or {}."""
+    if not os.path.isfile(pickle_file_name):
+        return {}
+    try:
+        with open(pickle_file_name, "rb") as pickle_file:
+            stored = pickle.load(pickle_file)
+        if stored["n_hashes"] != MINHASH_BANDS * MINHASH_ROWS:
+            return {}
+        return stored["signatures"]
+    except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError) as error:
+        logger.warning(f"Ignoring unreadable signatures {pickle_file_name}: {error}")
+        return {}
+
+
+def store_minhash_signatures(pickle_file_name, signatures):
+    """Write MinHash signatures by the sorted words joined by spaces."""
+    os.makedirs(os.path.dirname(pickle_file_name), exist_ok=True)
+    tmp_file = f"{pickle_file_name}.tmp"
+    try:
+        with open(tmp_file, "wb") as pickle_file:
+            pickle.dump(
+                {
+                    "n_hashes": MINHASH_BANDS * MINHASH_ROWS,
+                    "signatures": signatures,
+                },
+                pickle_file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_file, pickle_file_name)
+    except OSError as error:
+        logger.warning(f"Could not write signatures {pickle_file_name}: {error}")
+
+
+class MinHashIndex(object):
+    """Find sets of words similar to a given one without comparing to all.
+
+    Each set is summarised by its MinHash signature, which is split into
+    MINHASH_BANDS bands of MINHASH_ROWS hashes. Sets sharing a band are
+    candidates, whose Jaccard similarity is then computed. With 16 bands of
+    4 rows, a set with a similarity of 0.8 is a candidate with a
+    probability of 99.98%, one with a similarity of 0.3 with 12%.
+
+    Computing the signatures is the expensive part, so they can be kept in
+    a file (see store) and are then only computed for new sets of words.
+    The bands of all sets are concatenated per band, in the order the sets
+    were added, and searched for the bands of a query. They are only built
+    at the first query, which most runs without new entries never make.
+    """
+
+    __slots__ = ["words", "keys", "band_data", "n_pending", "path", "signatures"]
+
+    def __init__(self, path=None):
+        """Create an empty index, using the signatures stored at path if given."""
+        self.words = {}  # key -> set of words
+        self.keys = []  # keys in the order of the bands
+        self.band_data = [bytearray() for _ in range(MINHASH_BANDS)]
+        self.n_pending = 0  # keys at the end of keys not in band_data yet
+        self.path = path
+        # sorted words joined by spaces -> signature
+        self.signatures = load_minhash_signatures(path) if path else {}
+
+    def signature(self, words):
+        """Return the signature of words, computed only if it is not stored."""
+        name = " ".join(sorted(words))
+        signature = self.signatures.get(name)
+        if signature is None:
+            signature = minhash_signature(words)
+            self.signatures[name] = signature
+        return signature
+
+    def add(self, key, words):
+        """Add a set of words under key, sets without words are not indexed."""
+        if key in self.words or not words:
+            return
+        self.words[key] = words
+        self.keys.append(key)
+        self.n_pending += 1
+
+    def query(self, words, threshold):
+        """Return the keys of sets with a similarity of at least threshold.
+
+        The keys are sorted by decreasing similarity.
+        """
+        if not words:
+            return []
+        band_size = 8 * MINHASH_ROWS
+        if self.n_pending:
+            pending = self.keys[len(self.keys) - self.n_pending :]
+            signatures = [self.signature(self.words[key]) for key in pending]
+            for i, data in enumerate(self.band_data):
+                start, end = i * band_size, (i + 1) * band_size
+                data += b"".join([x[start:end] for x in signatures])
+            self.n_pending = 0
+        signature = self.signature(words)
+        candidates = set()
+        for i, data in enumerate(self.band_data):
+            band = signature[i * band_size : (i + 1) * band_size]
+            position = data.find(band)
+            while position >= 0:
+                # a match across two bands is no candidate
+                if position % band_size == 0:
+                    candidates.add(self.keys[position // band_size])
+                position = data.find(band, position + 1)
+        similarities = [
+            (title_similarity(words, self.words[key]), key) for key in candidates
+        ]
+        return [
+            key
+            for similarity, key in sorted(similarities, reverse=True)
+            if similarity >= threshold
+        ]
+
+    def store(self):
+        """Write the signatures of the indexed sets if any had to be computed."""
+        if self.path is None:
+            return
+        names = {" ".join(sorted(x)): x for x in self.words.values()}
+        if names.keys() == self.signatures.keys():
+            return
+        for words in names.values():
+            self.signature(words)
+        store_minhash_signatures(
+            self.path, {name: self.signatures[name] for name in names}
+        )
+
+
+class IdentityIndex(object):
+    """Link the identifiers under which the same analysis is published.
+
+    A PAS, its CERN-EP preprint and its arXiv entry are linked by the CADI
+    code (from the PAS identifier or the links to the results pages) or
+    else by the similarity of their titles. The index is kept in the state
+    files IDENTITY_<experiment>, one line per identifier with the analysis
+    it belongs to and its title words.
+    """
+
+    __slots__ = ["experiment", "analyses", "members", "titles"]
+
+    def __init__(self, experiment):
+        """Load the index of an experiment from its state files."""
+        self.experiment = experiment
+        self.analyses = {}  # identifier -> analysis
+        self.members = {}  # analysis -> {identifier: None}, in order of addition
+        self.titles = MinHashIndex(
+            os.path.join(MINHASH_DIR, f"IDENTITY_{experiment}.pickle")
+        )
+        for line in read_state("IDENTITY_", experiment):
+            fields = line.strip("\n").split(" ", 2)
+            if len(fields) < 2:
+                continue
+            words = title_words(fields[2]) if len(fields) > 2 else frozenset()
+            self.link(fields[0], fields[1], words)
+        self.titles.store()
+
+    def link(self, identifier, analysis, words):
+        """Add an identifier to an analysis in memory."""
+        previous = self.analyses.get(identifier)
+        if previous is not None:
+            self.members[previous].pop(identifier, None)
+        self.analyses[identifier] = analysis
+        self.members.setdefault(analysis, {})[identifier] = None
+        self.titles.add(identifier, words)
+
+    def find(self, post):
+        """Return the analysis an entry belongs to, or None if there is none yet."""
+        if post.identifier in self.analyses:
+            return self.analyses[post.identifier]
+        code = analysis_code(post)
+        if self.members.get(code):
+            return code
+        for key in self.titles.query(title_words(post.title), TITLE_SIMILARITY):
+            analysis = self.analyses[key]
+            # similar titles do not link analyses with different CADI codes
+            if code is None or not ANALYSIS_CODE_PATTERN.match(analysis):
+                return analysis
+        return code
+
+    def add(self, post, store=True):
+        """Add an entry to the index and return its analysis.
+
+        New entries are written to the state files unless store is False.
+        """
+        analysis = self.find(post) or post.identifier
+        if post.identifier not in self.analyses:
+            words = title_words(post.title)
+            self.link(post.identifier, analysis, words)
+            if store:
+                append_state(
+                    "IDENTITY_",
+                    self.experiment,
+                    f"{post.identifier} {analysis} {' '.join(sorted(words))}",
+                )
+        return analysis
+
+    def linked(self, identifier):
+        """Return the other identifiers of the analysis of identifier."""
+        analysis = self.analyses.get(identifier)
+        if analysis is None:
+            return []
+        return [x for x in self.members[analysis] if x != identifier]
+
+
+class PostIndex(object):
+    """Formatted titles and post IDs of all posted analyses.
+
+    The posts are kept in the state file POSTED_TITLES, one JSON line per
+    post, and added by store_id. Only the first post of an identifier
+    carries its feed and title. This allows finding the preliminary result
+    a paper supersedes by the similarity of the formatted titles, and
+    replying to its posts.
+    """
+
+    __slots__ = ["feeds", "posts", "titles"]
+
+    def __init__(self):
+        """Load the posts from the state files."""
+        self.feeds = {}  # identifier -> feed ID
+        self.posts = {}  # identifier -> {platform: ID of the last post}
+        self.titles = MinHashIndex(os.path.join(MINHASH_DIR, f"{POSTED_TITLES}.pickle"))
+        for line in read_state("", POSTED_TITLES):
+            try:
+                self.index(**json.loads(line))
+            except (ValueError, TypeError):
+                # line torn by a crash
+                continue
+        self.titles.store()
+
+    def index(self, identifier, platform, post_id, feed=None, title=None):
+        """Add a post to the index kept in memory."""
+        if title is not None:
+            self.feeds.setdefault(identifier, feed)
+            self.titles.add(identifier, title_words(title))
+        if post_id:
+            self.posts.setdefault(identifier, {})[platform] = post_id
+
+    def add(self, identifier, feed_id, title, platform, post_id):
+        """Add a post and write it to the state files.
+
+        Posts of an identifier already indexed only write their post ID.
+        """
+        if identifier in self.feeds:
+            if not post_id:
+                return
+            post = {"identifier": identifier, "platform": platform, "post_id": post_id}
+        else:
+            post = {
+                "identifier": identifier,
+                "feed": feed_id,
+                "title": title,
+                "platform": platform,
+                "post_id": post_id,
+            }
+        self.index(**post)
+        append_state("", POSTED_TITLES, json.dumps(post, ensure_ascii=False))
+
+    def counterpart(self, title, feed_ids, code=None):
+        """Return the posted preliminary result in feed_ids most similar to title.
+
+        Returns None if there is none with a title similarity of at least
+        TITLE_SIMILARITY. If the CADI code of the paper is given, PAS with a
+        different code are not considered.
+        """
+        for identifier in self.titles.query(title_words(title), TITLE_SIMILARITY):
+            other_code = PAS_CODE_PATTERN.match(identifier)
+            if code and other_code and other_code.group(1) != code:
+                continue
+            if self.feeds[identifier] in feed_ids and any(
+                item in identifier for item in PRELIM
+            ):
+                return identifier
+        return None
+
+
+def open_post_index():
+    """Load the titles of all posts and keep them up to date in store_id."""
+    global _POST_INDEX
+    _POST_INDEX = PostIndex()
+    logger.info(f"Loaded the titles of {len(_POST_INDEX.feeds)} posted analyses")
+    return _POST_INDEX
+
+
+def store_image_list(outdir, image_list):
+    """Write the list of downloaded images to a kept image directory."""
+    with open(os.path.join(outdir, IMAGE_LIST_FILE), "w") as txt_file:
+        txt_file.writelines(f"{image}\n" for image in image_list)
+
+
+def linked_images(identifiers, max_figures):
+    """Return the images kept (--keep) for the first of identifiers that has any."""
+    for identifier in identifiers:
+        txt_file_name = os.path.join(identifier.replace(":", "_"), IMAGE_LIST_FILE)
+        if not os.path.isfile(txt_file_name):
+            continue
+        with open(txt_file_name) as txt_file:
+            image_list = [x.strip("\n") for x in txt_file if x.strip()]
+        image_list = [x for x in image_list if os.path.isfile(x)][:max_figures]
+        if image_list:
+            logger.info(f"Reusing {len(image_list)} images of {identifier}")
+            return image_list
+    return []
+
+
+def linked_post(identifiers, prefix):
+    """Return the ID of the last post of any of identifiers on a platform, or None.
+
+    Post IDs are taken from the ledger or else from the post index.
+    """
+    if not identifiers:
+        return None
+    if _LEDGER is not None:
+        return _LEDGER.last_post(identifiers, platform_name(prefix))
+    if _POST_INDEX is not None:
+        for identifier in reversed(identifiers):
+            post_id = _POST_INDEX.posts.get(identifier, {}).get(platform_name(prefix))
+            if post_id:
+                return post_id
+    return None
+
+
+def is_handled(identifier, feed_id, prefixes):
+    """Return True if the analysis has been posted on all given platforms."""
+    return bool(prefixes) and all(
+        check_id_exists(identifier, feed_id, prefix=prefix) for prefix in prefixes
+    )
+
+
+def parse_arguments(argv=None):
+    """Parse the command line arguments."""
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "-d", "--dry", help="perform dry run without tweeting", action="store_true"
@@ -1323,7 +3680,11 @@ def main():
         default=20,
     )
     parser.add_argument(
-        "-e", "--experiment", help="experiment to tweet for", type=str, default="CMS"
+        "-e",
+        "--experiment",
+        help="experiment to tweet for, a comma-separated list, or ALL",
+        type=str,
+        default="CMS",
     )
     parser.add_argument(
         "-c",
@@ -1336,14 +3697,177 @@ def main():
         "--auth", help="name of auth config file", type=str, default="auth.ini"
     )
     parser.add_argument("--arXiv", help="use arXiv link", action="store_true")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--cache-dir",
+        help="directory for the conditional-GET feed cache",
+        type=str,
+        default=FEED_CACHE_DIR,
+    )
+    parser.add_argument(
+        "--no-cache", help="do not use the feed cache", action="store_true"
+    )
+    parser.add_argument(
+        "--parser",
+        help="feed parser to use, lxml is faster but only reads new entries",
+        choices=FEED_PARSERS,
+        default="feedparser",
+    )
+    parser.add_argument(
+        "--ledger",
+        help="record posts in this SQLite database instead of the TWITTER_/MASTODON_/BLUESKY_ text files",
+        type=str,
+    )
+    parser.add_argument(
+        "--state-segments",
+        help=f"write state to files unique to this run in {STATE_DIR}/, so that concurrent runs never conflict",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--no-journal",
+        help="append to the state files directly instead of through a journal synced after every post",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--compact-state",
+        help=f"fold the state segments in {STATE_DIR}/ into the state files, then quit",
+        action="store_true",
+    )
+    ledger_group = parser.add_mutually_exclusive_group()
+    ledger_group.add_argument(
+        "--import-ledger",
+        help="import the text files into the ledger, then quit",
+        action="store_true",
+    )
+    ledger_group.add_argument(
+        "--export-ledger",
+        help="append the posts in the ledger missing in the text files, then quit",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--http-engine",
+        help="HTTP client to use, httpx downloads media concurrently (and uses HTTP/2 if h2 is installed)",
+        choices=HTTP_ENGINES,
+        default="requests",
+    )
+    fixture_group = parser.add_mutually_exclusive_group()
+    fixture_group.add_argument(
+        "--record",
+        help="store all CDS responses (feeds, pages, media) in this directory",
+        type=str,
+    )
+    fixture_group.add_argument(
+        "--replay",
+        help="serve all CDS responses from a directory created with --record, implies --dry",
+        type=str,
+    )
+    parser.add_argument(
+        "--catchup",
+        help="page through up to this many pages of each CDS collection to find entries missed by the RSS feed",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--lease",
+        help="lease each post in the ledger for this many seconds, so that several bots can share it",
+        type=int,
+        default=0,
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--link-analyses",
+        help="link the PAS, preprint and arXiv entries of an analysis to reuse kept images (--keep) and to reply to earlier posts (--ledger)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--record-api",
+        help="find figures from the CDS record metadata instead of the feed",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        help="keep running and poll the feeds at an adaptive interval",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--min-interval",
+        help="shortest polling interval in seconds in watch mode",
+        type=int,
+        default=WATCH_MIN_INTERVAL,
+    )
+    parser.add_argument(
+        "--max-interval",
+        help="longest polling interval in seconds in watch mode",
+        type=int,
+        default=WATCH_MAX_INTERVAL,
+    )
+    parser.add_argument(
+        "--no-watermark",
+        help="process all feed entries instead of only those newer than the stored watermark",
+        action="store_true",
+    )
+    return parser.parse_args(argv)
+
+
+def get_experiments(experiment_arg, feed_file, auth_file):
+    """Return the experiments to run for.
+
+    experiment_arg is either a single experiment, a comma-separated list of
+    experiments, or ALL for all experiments that have both feeds and
+    credentials configured.
+    """
+    if experiment_arg.upper() != "ALL":
+        return [x.strip() for x in experiment_arg.split(",") if x.strip()]
+    feed_config = configparser.RawConfigParser()
+    feed_config.read(feed_file)
+    auth_config = configparser.RawConfigParser()
+    auth_config.read(auth_file)
+    experiments = []
+    for experiment in feed_config.sections():
+        if experiment in auth_config.sections():
+            experiments.append(experiment)
+        else:
+            logger.info(f"Skipping {experiment}, not found in {auth_file}")
+    return experiments
+
+
+def authenticate(auth_dict):
+    """Authenticate to all platforms configured in auth_dict."""
+    clients = {}
+    clients["twitter"] = twitter_auth(auth_dict)
+    clients["mastodon"] = mastodon_auth(auth_dict)
+    clients["bluesky"] = None
+    if BlueskyClient is not None:  # Check if atproto was imported
+        clients["bluesky"] = bluesky_auth(auth_dict)
+        if clients["bluesky"] is None:
+            logger.info(
+                "BlueSky client initialization failed, BlueSky features will be skipped."
+            )
+    else:
+        logger.info(
+            "BlueSky library (atproto) not installed at top level, skipping BlueSky features."
+        )
+    return clients
+
+
+def run_experiment(experiment, config, args, client_cache=None):
+    """Fetch the feeds of one experiment and post new analyses.
+
+    Authenticated clients are taken from client_cache (keyed by experiment)
+    if given, so that repeated runs do not log in again. Returns the number
+    of analyses posted, which is always zero in a dry run: nothing is stored
+    then, so the same analyses would be counted again on every poll.
+    """
+    dry_run = False  # run without tweeting
+    analysis_id = ""
+    keep_image_dir = False
+    list_analyses = False
+    post_gif = True
+    use_arxiv_link = False
     max_tweets = args.max
     max_figures = args.figmax
     if args.dry:
         dry_run = True
-    if args.verbose:
-        global logger
-        logger.setLevel(logging.DEBUG)
     if args.keep:
         keep_image_dir = True
     if args.list:
@@ -1354,118 +3878,229 @@ def main():
         analysis_id = args.analysis
         max_tweets = 1
         logger.info("Looking for analysis with ID %s" % analysis_id)
-    experiment = args.experiment
-    feed_file = args.config
-    auth_file = args.auth
     use_arxiv_link = args.arXiv
+    use_record_api = args.record_api
+    cache_dir = None if args.no_cache else args.cache_dir
+    # pick up the state segments written by other runs since the last poll
+    reset_segment_listings()
+
+    # entries that have been handled in previous runs are skipped
+    use_watermark = not (analysis_id or list_analyses or args.no_watermark)
+    watermarks = {}
+    if use_watermark:
+        for key in config["FEED_DICT"]:
+            watermarks[key] = load_watermark(key)
+
+    platform_prefixes = configured_platforms(config["AUTH"])
+    # entries handled before with the same content are skipped, entries
+    # whose content changed are handled again
+    use_content_diff = use_watermark
+    content_hashes = {}
+    # the watermark is not advanced over feeds that were not fully read
+    incomplete_feeds = set()
+    if use_content_diff:
+        content_hashes = {key: load_content_hashes(key) for key in config["FEED_DICT"]}
+    if args.catchup:
+        # pages are fetched while the previous ones are posted
+        def catchup_batches():
+            """Yield the pages of all feeds, noting feeds not caught up."""
+            for key in config["FEED_DICT"]:
+                try:
+                    yield from catchup_feed(
+                        key,
+                        config["FEED_DICT"][key],
+                        watermarks.get(key, (None, set())),
+                        lambda x: is_handled(
+                            x.identifier, x.feed_id, platform_prefixes
+                        ),
+                        args.catchup,
+                        parser=args.parser,
+                    )
+                except CatchupIncomplete as catchup_exception:
+                    logger.warning(f"Stopped catching up on {key}: {catchup_exception}")
+                    incomplete_feeds.add(key)
 
-    config = load_config(experiment, feed_file, auth_file)
-
-    feed_entries = []
-    for key in config["FEED_DICT"]:
-        logger.info(f"Getting feed for {key}")
-        this_feed = read_feed(config["FEED_DICT"][key])
-        if this_feed:
-            this_feed_entries = this_feed["entries"]
-            logger.info("Found %d items" % len(this_feed_entries))
-            # add feed info to entries so that we can loop more easily later
-            for index, _ in enumerate(this_feed_entries):
-                this_feed_entries[index]["feed_id"] = key
-            feed_entries += this_feed_entries
-        else:
-            logger.warning(f"Found no items for feed {key}")
+        entry_batches = catchup_batches()
+    else:
+        entry_batches = [
+            fetch_feeds(
+                config["FEED_DICT"],
+                cache_dir=cache_dir,
+                parser=args.parser,
+                watermarks=watermarks,
+                content_hashes=content_hashes,
+            )
+        ]
     if list_analyses:
+        feed_entries = [post for batch in entry_batches for post in batch]
         # sort by feed_id, then date
         logger.info("List of available analyses:")
         for post in sorted(
             feed_entries,
-            key=lambda x: (x["feed_id"], maya.parse(x["published"]).datetime()),
+            key=lambda x: (x.feed_id, x.timestamp or 0),
         ):
             logger.info(
                 " - {post_id} ({feed_id}), published {date}".format(
-                    post_id=post["dc_source"],
-                    feed_id=post["feed_id"],
-                    date=post["published"],
+                    post_id=post.source,
+                    feed_id=post.feed_id,
+                    date=post.published,
                 )
             )
-        return
-    twitter_client = twitter_auth(config["AUTH"])
-    mastodon_client = mastodon_auth(config["AUTH"])
-    bluesky_client = None
-    if BlueskyClient is not None:  # Check if atproto was imported
-        bluesky_client = bluesky_auth(config["AUTH"])
-        if bluesky_client is None:
-            logger.info(
-                "BlueSky client initialization failed, BlueSky features will be skipped."
-            )
-    else:
-        logger.info(
-            "BlueSky library (atproto) not installed at top level, skipping BlueSky features."
-        )
+        return 0
+    handled_entries = {key: set() for key in config["FEED_DICT"]}
+    identity_index = None
+    if args.link_analyses:
+        identity_index = IdentityIndex(experiment)
+    feed_entries = []
+    entry_diff = {}
+    all_fetched = False
+
+    def pending_posts():
+        """Yield the entries batch by batch, each batch sorted by date."""
+        nonlocal all_fetched
+        for batch in entry_batches:
+            feed_entries.extend(batch)
+            if use_content_diff:
+                batch_diff = diff_entries(batch, content_hashes)
+                entry_diff.update(batch_diff)
+                statuses = [x[0] for x in batch_diff.values()]
+                logger.info(
+                    f"Found {statuses.count(ENTRY_NEW)} new, "
+                    f"{statuses.count(ENTRY_UPDATED)} updated and "
+                    f"{statuses.count(ENTRY_UNCHANGED)} unchanged entries"
+                )
+            batch = sorted(batch, key=lambda x: x.timestamp or 0)
+            if identity_index is not None:
+                for post in batch:
+                    identity_index.add(post, store=not dry_run)
+            yield from batch
+        all_fetched = True
+
+    if client_cache is None:
+        client_cache = {}
+    if experiment not in client_cache:
+        client_cache[experiment] = authenticate(config["AUTH"])
+    clients = client_cache[experiment]
+    twitter_client = clients["twitter"]
+    mastodon_client = clients["mastodon"]
+    bluesky_client = clients["bluesky"]
 
     # loop over posts sorted by date
     tweet_count = 0
     toot_count = 0
     skeet_count = 0  # New counter for BlueSky
-    for post in sorted(
-        feed_entries, key=lambda x: maya.parse(x["published"]).datetime()
-    ):
+    for post in pending_posts():
         do_toot = True
         do_tweet = True
         do_skeet = True
+        claimed_prefixes = []
         downloaded_image_list = []
         n_figures = 0
         downloaded_doc_list = []
+        refresh = False
         logger.debug(post)
-        identifier = post["dc_source"]
-        # fix wrong PAS name:
-        parse_result = re.match(r"(CMS-PAS-).{3}-([A-Z]{3}-\d{2}-\d{3})-.*", identifier)
-        if parse_result:
-            new_identifier = parse_result.group(1) + parse_result.group(2)
-            logger.info(f"Replacing ID {identifier} by {new_identifier}")
-            identifier = new_identifier
+        status, digest, stored = entry_diff.get(post.source, (ENTRY_NEW, None, None))
+        identifier = post.identifier
+        if digest and digest != stored and status != ENTRY_UPDATED and not dry_run:
+            # hashes are stored when an entry is first seen, so that later
+            # changes are noticed also after it has been posted
+            store_content_hash(post.feed_id, post.source, digest)
+        if status == ENTRY_UNCHANGED and is_handled(
+            identifier, post.feed_id, platform_prefixes
+        ):
+            handled_entries[post.feed_id].add(post.source)
+            continue
+        if identifier != post.source:
+            logger.info(f"Replacing ID {post.source} by {identifier}")
         if analysis_id:
             if analysis_id not in identifier:
                 continue
             else:
-                logger.info("Found %s in feed %s" % (identifier, post["feed_id"]))
+                logger.info("Found %s in feed %s" % (identifier, post.feed_id))
         else:
             if twitter_client:
-                if check_id_exists(identifier, post["feed_id"], prefix="TWITTER_"):
+                if check_id_exists(identifier, post.feed_id, prefix="TWITTER_"):
                     logger.debug(
                         "%s has already been tweeted for feed %s"
-                        % (identifier, post["feed_id"])
+                        % (identifier, post.feed_id)
                     )
                     do_tweet = False
             else:
                 do_tweet = False
             if mastodon_client:
-                if check_id_exists(identifier, post["feed_id"], prefix="MASTODON_"):
+                if check_id_exists(identifier, post.feed_id, prefix="MASTODON_"):
                     logger.debug(
                         "%s has already been tooted for feed %s"
-                        % (identifier, post["feed_id"])
+                        % (identifier, post.feed_id)
                     )
                     do_toot = False
             else:
                 do_toot = False
 
             if bluesky_client:  # Only check if client is available
-                if check_id_exists(identifier, post["feed_id"], prefix="BLUESKY_"):
+                if check_id_exists(identifier, post.feed_id, prefix="BLUESKY_"):
                     logger.debug(
                         "%s has already been skeeted for feed %s"
-                        % (identifier, post["feed_id"])
+                        % (identifier, post.feed_id)
                     )
                     do_skeet = False
             else:  # If client is None (not configured or auth failed)
                 do_skeet = False
+            if (
+                not (do_tweet or do_toot or do_skeet)
+                and media_changed(stored, digest)
+                and is_handled(identifier, post.feed_id, platform_prefixes)
+            ):
+                # post the new figures as replies to the earlier posts;
+                # BlueSky posts always start a new thread, so not there
+                logger.info(f"The figures of {identifier} have changed")
+                refresh = True
+                do_tweet = twitter_client is not None
+                do_toot = mastodon_client is not None
+            # with several bots sharing the ledger, each post is leased to one
+            if args.lease and not dry_run:
+                claimed_prefixes = [
+                    prefix
+                    for prefix, do_post in zip(
+                        PLATFORM_PREFIXES, (do_tweet, do_toot, do_skeet)
+                    )
+                    if do_post
+                    and claim_post(
+                        identifier,
+                        post.feed_id,
+                        prefix,
+                        args.lease,
+                        check_posted=not refresh,
+                    )
+                ]
+                do_tweet = "TWITTER_" in claimed_prefixes
+                do_toot = "MASTODON_" in claimed_prefixes
+                do_skeet = "BLUESKY_" in claimed_prefixes
 
         if not do_toot and not do_tweet and not do_skeet:  # Updated condition
+            if is_handled(identifier, post.feed_id, platform_prefixes):
+                if status == ENTRY_UPDATED:
+                    # only new figures are posted again
+                    logger.info(f"{identifier} has changed but was posted already")
+                    if not dry_run:
+                        store_content_hash(post.feed_id, post.source, digest)
+                handled_entries[post.feed_id].add(post.source)
             continue
+        if status == ENTRY_UPDATED:
+            logger.info(f"{identifier} has changed since it was last handled")
         logger.info(
             "{id} - published: {date}".format(
-                id=identifier, date=maya.parse(post["published"]).datetime()
+                id=identifier, date=format_timestamp(post.timestamp)
             )
         )
+        linked_ids = []
+        if identity_index is not None:
+            linked_ids = identity_index.linked(identifier)
+            if linked_ids:
+                logger.info(f"Same analysis as {', '.join(linked_ids)}")
+        if refresh:
+            # reply to the last post of the entry itself
+            linked_ids.append(identifier)
 
         arxiv_id = ""
         # try to find arXiv ID
@@ -1474,82 +4109,72 @@ def main():
             logger.info("Found arXiv ID arXiv:%s" % arxiv_id)
             arxiv_link = "https://arxiv.org/abs/%s" % arxiv_id
             logger.debug(arxiv_link)
-            request = requests.get(arxiv_link)
-            if request.status_code >= 400:
+            try:
+                request = http_get(arxiv_link)
+                arxiv_link_valid = request.status_code < 400
+            except requests.RequestException as request_exception:
+                logger.warning(f"arXiv URL check failed: {request_exception}")
+                arxiv_link_valid = False
+            if not arxiv_link_valid:
                 logger.warning(f"arXiv URL {arxiv_link} seems invalid")
                 arxiv_link = None
 
         # looking for media
-        media_content = []
-        if "media_content" in post:
-            media_content += post["media_content"]
         outdir = identifier.replace(":", "_")
+        if status == ENTRY_UPDATED and os.path.exists(outdir):
+            # refresh media kept (--keep) from an earlier run
+            shutil.rmtree(outdir)
         if not os.path.exists(outdir):
             os.makedirs(outdir)
         logger.debug("Attempting to download media.")
         # media also includes on the physics
         phys_hashtags = ""
-        for media in media_content:
-            media_url = media["url"]
-            media_found = False
-            media_isimage = False
-            if media_url.find("cadi?ancode=") >= 0:
-                parse_result = re.match(r".*ancode=(\w{3})-\d{2}-\d{3}", media_url)
-                if parse_result:
-                    if parse_result[1] in CADI_TO_HASHTAG:
-                        phys_hashtags = CADI_TO_HASHTAG[parse_result[1]]
-                        logger.info(f"Found physics tag: {phys_hashtags}")
-            # consider only attached figures and main doc
-            if experiment == "CMS":
-                # CMS follows a certain standard
-                # but figures can be both PDF and PNG
-                if re.search(r"/files\/.*[Ff]igures?_", media_url):
-                    media_found = True
-                    media_isimage = True
-            elif experiment == "ATLAS":
-                # ATLAS seems to only use PNG format for plots
-                if media_url.lower().endswith(".png"):
-                    media_found = True
-                    media_isimage = True
-                elif re.search(
-                    r"^" + re.escape(post.link) + "/files\/(?![Ff]ig).*\.pdf$",
-                    media_url,
-                ):
-                    media_found = True
-            elif experiment == "LHCb":
-                # LHCb attaches figures as a ZIP file
-                if media_url.lower().endswith(".zip"):
-                    logger.info("Found ZIP file for LHCb: " + media_url)
-                    media_found = True
-                    media_isimage = True  # Treat ZIP as images for now
-            # check if media can be downloaded
+        if post.cadi_code and post.cadi_code[:3] in CADI_TO_HASHTAG:
+            phys_hashtags = CADI_TO_HASHTAG[post.cadi_code[:3]]
+            logger.info(f"Found physics tag: {phys_hashtags}")
+        media_urls = post.media_urls
+        media_captions = {}
+        if use_record_api:
+            manifest = record_manifest(post.link)
+            if manifest:
+                logger.info(f"Using the {len(manifest)} files of the CDS record.")
+                media_urls = [media["url"] for media in manifest]
+                media_captions = {
+                    os.path.splitext(media["name"])[0]: media["caption"]
+                    for media in manifest
+                    if media["caption"]
+                }
+        media_candidates = []
+        for media_url in media_urls:
+            media_found, media_isimage = select_media(experiment, media_url, post.link)
             if media_found:
                 media_url = media_url.split("?", 1)[0]
                 logger.debug("media: " + media_url)
-                request = requests.get(media_url, timeout=10)
-                if not request.status_code < 400:
-                    logger.error("media: " + media_url + " does not exist!")
-                    media_found = False
-            # download and categorise media
-            if media_found:
-                # download images
                 out_path = "{}/{}".format(outdir, media_url.rsplit("/", 1)[1])
-                request = requests.get(media_url, stream=True)
-                if request.status_code == 200:
-                    with open(out_path, "wb") as file_handler:
-                        request.raw.decode_content = True
-                        shutil.copyfileobj(request.raw, file_handler)
-                    if out_path.find("%") >= 0:
-                        continue
-                    if media_isimage:
-                        downloaded_image_list.append(out_path)
-                        logger.debug("image: " + out_path + " downloaded!")
-                        n_figures += 1
-                    else:
-                        downloaded_doc_list.append(out_path)
-                        logger.debug("doc: " + out_path + " downloaded!")
-            if n_figures >= max_figures:
-                break
+                media_candidates.append((media_url, out_path, media_isimage))
+        # download and categorise media, in batches of the number of images
+        # still needed so that no more files are fetched than before
+        while media_candidates and n_figures < max_figures:
+            n_needed = max_figures - n_figures
+            n_batch = len(media_candidates)
+            for index, candidate in enumerate(media_candidates):
+                n_needed -= candidate[2]
+                if n_needed == 0:
+                    n_batch = index + 1
+                    break
+            batch = media_candidates[:n_batch]
+            media_candidates = media_candidates[n_batch:]
+            downloaded = download_files([(x[0], x[1]) for x in batch])
+            for (_, out_path, media_isimage), success in zip(batch, downloaded):
+                if not success or out_path.find("%") >= 0:
+                    continue
+                if media_isimage:
+                    downloaded_image_list.append(out_path)
+                    logger.debug("image: " + out_path + " downloaded!")
+                    n_figures += 1
+                else:
+                    downloaded_doc_list.append(out_path)
+                    logger.debug("doc: " + out_path + " downloaded!")
 
         # ATLAS notes workaround
         if experiment == "ATLAS" and len(downloaded_image_list) == 0:
@@ -1558,7 +4183,11 @@ def main():
                 + identifier
                 + "/"
             )
-            linkedimages = read_html(confnotepageurl).xpath("//a[img]/@href")
+            confnotepage = read_html(confnotepageurl)
+            linkedimages = []
+            if confnotepage is not None:
+                linkedimages = confnotepage.xpath("//a[img]/@href")
+            media_downloads = []
             for image in linkedimages:
                 # ATLAS only uses PNG format for plots
                 if not image.lower().endswith(".png"):
@@ -1566,26 +4195,15 @@ def main():
                 # skip tables and aux for this purpose
                 if image.lower().startswith("tab") or "aux" in image.lower():
                     continue
-                # now this part is (for now) just a copy-n-paste from above (sorry about that)
-                media_found = True
                 media_url = confnotepageurl + image
                 logger.debug("media: " + media_url)
-                request = requests.get(media_url, timeout=10)
-                if not request.status_code < 400:
-                    logger.error("media: " + media_url + " does not exist!")
-                    media_found = False
-
-                if media_found:
-                    # download images
-                    out_path = "{}/{}".format(outdir, media_url.rsplit("/", 1)[1])
-                    request = requests.get(media_url, stream=True)
-                    if request.status_code == 200:
-                        with open(out_path, "wb") as file_handler:
-                            request.raw.decode_content = True
-                            shutil.copyfileobj(request.raw, file_handler)
-                        if out_path.find("%") >= 0:
-                            continue
-                        downloaded_image_list.append(out_path)
+                out_path = "{}/{}".format(outdir, media_url.rsplit("/", 1)[1])
+                media_downloads.append((media_url, out_path))
+            for (media_url, out_path), success in zip(
+                media_downloads, download_files(media_downloads)
+            ):
+                if success and out_path.find("%") < 0:
+                    downloaded_image_list.append(out_path)
 
         # if there's a zip file and only one PDF, the figures are probably in the zip file
         if any(".zip" in s for s in downloaded_image_list):
@@ -1608,13 +4226,18 @@ def main():
                 ):
                     downloaded_image_list.append(img_path)
 
+        if not downloaded_image_list and linked_ids and not refresh:
+            downloaded_image_list = linked_images(linked_ids, max_figures)
+        if keep_image_dir:
+            store_image_list(outdir, downloaded_image_list)
+
         twitter_image_ids = []
         mastodon_image_ids = []
         bluesky_image_blobs = []
 
         if downloaded_image_list:
             # Twitter processing and upload
-            if twitter_client:
+            if twitter_client and do_tweet:
                 try:
                     logger.info(
                         f"Twitter: Initial media processing & upload (post_gif={post_gif})."
@@ -1641,7 +4264,7 @@ def main():
                     twitter_image_ids = []
 
             # Mastodon processing and upload with fallback
-            if mastodon_client:
+            if mastodon_client and do_toot:
                 current_post_gif_for_mastodon = post_gif  # Start with global setting
                 processed_image_list_for_mastodon = []  # To hold images processed for Mastodon
 
@@ -1662,6 +4285,7 @@ def main():
                         mastodon_client,
                         processed_image_list_for_mastodon,
                         current_post_gif_for_mastodon,
+                        captions=media_captions,
                     )
                 except mastodon.MastodonError as e:  # Catch any MastodonError first
                     logger.warning(
@@ -1693,6 +4317,7 @@ def main():
                                 mastodon_client,
                                 processed_image_list_for_mastodon,
                                 current_post_gif_for_mastodon,
+                                captions=media_captions,
                             )
                         except (
                             mastodon.MastodonError
@@ -1739,7 +4364,10 @@ def main():
                             # Try uploading the MP4
                             media_list_for_bluesky = [mp4_path]
                             bluesky_image_blobs = bluesky_upload_media(
-                                bluesky_client, media_list_for_bluesky, identifier
+                                bluesky_client,
+                                media_list_for_bluesky,
+                                identifier,
+                                captions=media_captions,
                             )
 
                     if not bluesky_image_blobs:
@@ -1752,7 +4380,10 @@ def main():
                         )
                         if image_list_for_bluesky:
                             bluesky_image_blobs = bluesky_upload_media(
-                                bluesky_client, image_list_for_bluesky, identifier
+                                bluesky_client,
+                                image_list_for_bluesky,
+                                identifier,
+                                captions=media_captions,
                             )
                 except Exception as e:
                     logger.error(f"BlueSky: Error during media processing/upload: {e}")
@@ -1767,17 +4398,15 @@ def main():
         if use_arxiv_link and arxiv_id:
             link = arxiv_link
 
-        prelim_result = False
-        for item in PRELIM:
-            if identifier.find(item) >= 0:
-                prelim_result = True
-                logger.info("This is a preliminary result.")
+        prelim_result = post.prelim
+        if prelim_result:
+            logger.info("This is a preliminary result.")
 
         conf_hashtags = ""
         # use only for PAS/CONF notes:
         if prelim_result:
             conf_hashtags = " ".join(
-                filter(None, (conf.is_now(post["published"]) for conf in CONFERENCES))
+                filter(None, (conf.is_now(post.timestamp) for conf in CONFERENCES))
             )
             logger.info(f"Conference hashtags: {conf_hashtags}")
 
@@ -1797,32 +4426,55 @@ def main():
                 "CERN-EP"
             ):
                 type_hashtag += " soon on arXiv"
+        if refresh:
+            type_hashtag += " with updated figures"
 
         title_formatted = format_title(title)
         if sys.version_info[0] < 3:
             title_formatted = title_formatted.encode("utf8")
+        if _POST_INDEX is not None and not prelim_result and not refresh:
+            # reply to the posts of the preliminary result this supersedes
+            counterpart = _POST_INDEX.counterpart(
+                title_formatted, config["FEED_DICT"], analysis_code(post)
+            )
+            if counterpart and counterpart not in linked_ids:
+                logger.info(f"Supersedes {counterpart}")
+                linked_ids.append(counterpart)
 
         # title_temp = type_hashtag + ": " + title_formatted + " (" + identifier + ") " + link + " " + conf_hashtags
         # logger.info(title_temp)
 
-        # skip entries without media for ATLAS
-        if downloaded_image_list or experiment != "ATLAS":
-            if twitter_client:
+        # skip entries without media for ATLAS, and refreshes without figures
+        if downloaded_image_list or (experiment != "ATLAS" and not refresh):
+            if twitter_client and do_tweet:
                 tweet_count += 1
                 if not dry_run:
-                    tweet_response = tweet(
-                        twitter_client["v2"],
-                        type_hashtag,
-                        title_formatted,
-                        identifier,
-                        link,
-                        conf_hashtags,
-                        phys_hashtags,
-                        twitter_image_ids,
-                        post_gif,
-                        config["AUTH"]["BOT_HANDLE"],
+                    post_start = time.monotonic()
+                    twitter_thread = {"reply_to": linked_post(linked_ids, "TWITTER_")}
+                    tweet_response = None
+                    # preparing the media may have outlasted the lease
+                    leased = renew_post(
+                        identifier, post.feed_id, "TWITTER_", args.lease
                     )
-                    if not tweet_response:
+                    if leased:
+                        tweet_response = tweet(
+                            twitter_client["v2"],
+                            type_hashtag,
+                            title_formatted,
+                            identifier,
+                            link,
+                            conf_hashtags,
+                            phys_hashtags,
+                            twitter_image_ids,
+                            post_gif,
+                            config["AUTH"]["BOT_HANDLE"],
+                            thread=twitter_thread,
+                        )
+                    if (
+                        not tweet_response
+                        and leased
+                        and renew_post(identifier, post.feed_id, "TWITTER_", args.lease)
+                    ):
                         # try to recover since something went wrong
                         # first, try to use individual images instead of GIF
                         if post_gif:
@@ -1845,8 +4497,11 @@ def main():
                                     twitter_image_ids,
                                     post_gif=False,
                                     bot_handle=config["AUTH"]["BOT_HANDLE"],
+                                    thread=twitter_thread,
                                 )
-                        if not tweet_response:
+                        if not tweet_response and renew_post(
+                            identifier, post.feed_id, "TWITTER_", args.lease
+                        ):
                             # second, try to tweet without image
                             logger.info("Trying to tweet without images")
                             tweet_response = tweet(
@@ -1860,9 +4515,22 @@ def main():
                                 image_ids=[],
                                 post_gif=False,
                                 bot_handle=config["AUTH"]["BOT_HANDLE"],
+                                thread=twitter_thread,
                             )
                     if tweet_response:
-                        store_id(identifier, post["feed_id"], prefix="TWITTER_")
+                        store_id(
+                            identifier,
+                            post.feed_id,
+                            prefix="TWITTER_",
+                            title=title_formatted,
+                            **post_details(
+                                tweet_response,
+                                twitter_thread,
+                                post.timestamp,
+                                post_start,
+                                len(downloaded_image_list),
+                            ),
+                        )
                 else:
                     logger.info("Tweet information:")
                     logger.info(title_formatted)
@@ -1871,7 +4539,7 @@ def main():
                     logger.info("type_hashtag: " + type_hashtag)
                     logger.info("conf_hashtags: " + conf_hashtags)
                     logger.info("phys_hashtags: " + phys_hashtags)
-            if mastodon_client:
+            if mastodon_client and do_toot:
                 toot_count += 1
                 if not dry_run:
                     logger.info(
@@ -1899,6 +4567,7 @@ def main():
                                 mastodon_client,
                                 image_list_for_mastodon,
                                 actual_post_gif_for_mastodon,
+                                captions=media_captions,
                             )
                         except (
                             mastodon.MastodonError
@@ -1931,6 +4600,7 @@ def main():
                                         mastodon_client,
                                         image_list_for_mastodon_fallback,
                                         post_gif=False,
+                                        captions=media_captions,
                                     )
                                 except mastodon.MastodonError as e2:
                                     logger.error(
@@ -1952,8 +4622,18 @@ def main():
 
                 # Proceed with tooting attempts
                 toot_response = None
+                post_start = time.monotonic()
+                mastodon_thread = {
+                    "reply_to": linked_post(linked_ids, "MASTODON_")
+                }
                 max_retry = 10
+                leased = True
                 for attempt_num in range(max_retry):
+                    leased = renew_post(
+                        identifier, post.feed_id, "MASTODON_", args.lease
+                    )
+                    if not leased:
+                        break
                     toot_response = toot(
                         mastodon_client,
                         type_hashtag,
@@ -1965,9 +4645,22 @@ def main():
                         mastodon_image_ids,  # Use the (possibly empty or fallback) list of IDs
                         actual_post_gif_for_mastodon,  # Use the final decision on GIF status
                         config["AUTH"]["MASTODON_BOT_HANDLE"],
+                        thread=mastodon_thread,
                     )
                     if toot_response:
-                        store_id(identifier, post["feed_id"], prefix="MASTODON_")
+                        store_id(
+                            identifier,
+                            post.feed_id,
+                            prefix="MASTODON_",
+                            title=title_formatted,
+                            **post_details(
+                                toot_response,
+                                mastodon_thread,
+                                post.timestamp,
+                                post_start,
+                                len(downloaded_image_list),
+                            ),
+                        )
                         break
                     # If toot failed, and it's not the last attempt, log and wait
                     if not toot_response and attempt_num < max_retry - 1:
@@ -1977,7 +4670,12 @@ def main():
                         time.sleep(10)
 
                 # Final fallback: If all toot attempts failed and images were originally present (implying media was intended)
-                if not toot_response and downloaded_image_list:
+                if (
+                    not toot_response
+                    and downloaded_image_list
+                    and leased
+                    and renew_post(identifier, post.feed_id, "MASTODON_", args.lease)
+                ):
                     logger.info(
                         "Mastodon: All toot attempts (possibly with media) failed. Attempting a final toot explicitly without media."
                     )
@@ -1992,9 +4690,22 @@ def main():
                         image_ids=[],  # Explicitly no media
                         post_gif=False,  # GIF status irrelevant here
                         bot_handle=config["AUTH"]["MASTODON_BOT_HANDLE"],
+                        thread=mastodon_thread,
                     )
                     if final_fallback_toot_response:
-                        store_id(identifier, post["feed_id"], prefix="MASTODON_")
+                        store_id(
+                            identifier,
+                            post.feed_id,
+                            prefix="MASTODON_",
+                            title=title_formatted,
+                            **post_details(
+                                final_fallback_toot_response,
+                                mastodon_thread,
+                                post.timestamp,
+                                post_start,
+                                0,
+                            ),
+                        )
 
         if bluesky_client and do_skeet:
             skeet_count += 1
@@ -2004,19 +4715,31 @@ def main():
                 )
                 time.sleep(5)
 
-                skeet_response = skeet(
-                    bluesky_client,
-                    type_hashtag,
-                    title_formatted,
-                    identifier,
-                    link,
-                    conf_hashtags,
-                    phys_hashtags,
-                    bluesky_image_blobs,
-                    config["AUTH"].get("BLUESKY_HANDLE", ""),
-                )
+                post_start = time.monotonic()
+                bluesky_thread = {}
+                skeet_response = None
+                # the tweets and toots before may have outlasted the lease
+                leased = renew_post(identifier, post.feed_id, "BLUESKY_", args.lease)
+                if leased:
+                    skeet_response = skeet(
+                        bluesky_client,
+                        type_hashtag,
+                        title_formatted,
+                        identifier,
+                        link,
+                        conf_hashtags,
+                        phys_hashtags,
+                        bluesky_image_blobs,
+                        config["AUTH"].get("BLUESKY_HANDLE", ""),
+                        thread=bluesky_thread,
+                    )
 
-                if not skeet_response and bluesky_image_blobs:
+                if (
+                    not skeet_response
+                    and bluesky_image_blobs
+                    and leased
+                    and renew_post(identifier, post.feed_id, "BLUESKY_", args.lease)
+                ):
                     logger.info(
                         "BlueSky: Skeet with media failed. Attempting skeet without media."
                     )
@@ -2031,10 +4754,23 @@ def main():
                         phys_hashtags,
                         [],
                         config["AUTH"].get("BLUESKY_HANDLE", ""),
+                        thread=bluesky_thread,
                     )
 
                 if skeet_response:
-                    store_id(identifier, post["feed_id"], prefix="BLUESKY_")
+                    store_id(
+                        identifier,
+                        post.feed_id,
+                        prefix="BLUESKY_",
+                        title=title_formatted,
+                        **post_details(
+                            skeet_response,
+                            bluesky_thread,
+                            post.timestamp,
+                            post_start,
+                            len(bluesky_image_blobs),
+                        ),
+                    )
                     logger.info(
                         f"BlueSky: Successfully skeeted. URI: {skeet_response.get('uri')}"
                     )
@@ -2065,13 +4801,175 @@ def main():
         if not keep_image_dir:
             # clean up images
             shutil.rmtree(outdir)
+        for prefix in claimed_prefixes:
+            release_post(identifier, post.feed_id, prefix)
+        if is_handled(identifier, post.feed_id, platform_prefixes):
+            handled_entries[post.feed_id].add(post.source)
+            if status == ENTRY_UPDATED and not dry_run:
+                store_content_hash(post.feed_id, post.source, digest)
         if (
             tweet_count >= max_tweets
             or toot_count >= max_tweets
             or skeet_count >= max_tweets
         ):  # Updated condition
             logger.info(f"Reached max posts limit ({max_tweets}). Exiting.")
-            return
+            break
+
+    if _STATE_JOURNAL is not None:
+        _STATE_JOURNAL.checkpoint()
+    # only advance the watermark if all configured platforms are usable, and
+    # not over catch-up pages that were never fetched
+    if use_watermark and not dry_run and platform_prefixes and all_fetched:
+        for key in config["FEED_DICT"]:
+            if key in incomplete_feeds:
+                logger.info(f"Keeping the watermark of {key}")
+                continue
+            this_feed_entries = [x for x in feed_entries if x.feed_id == key]
+            watermark = advance_watermark(
+                watermarks[key], this_feed_entries, handled_entries[key]
+            )
+            if watermark != watermarks[key]:
+                logger.info(f"Advancing watermark of {key} to {watermark[0]}")
+                store_watermark(key, *watermark)
+    if dry_run:
+        return 0
+    return max(tweet_count, toot_count, skeet_count)
+
+
+def next_poll_interval(
+    interval,
+    n_posted,
+    timestamp,
+    min_interval=WATCH_MIN_INTERVAL,
+    max_interval=WATCH_MAX_INTERVAL,
+):
+    """Return the number of seconds to wait before polling the feeds again.
+
+    New results tend to come in bursts, so the interval is reset to the
+    minimum after a poll that found something and doubled after an idle
+    poll. During conferences, the interval is capped at
+    WATCH_CONFERENCE_INTERVAL.
+    """
+    if n_posted:
+        interval = min_interval
+    else:
+        interval = min(2 * interval, max_interval)
+    if any(conf.is_ongoing(timestamp) for conf in CONFERENCES):
+        interval = min(interval, WATCH_CONFERENCE_INTERVAL)
+    return max(interval, min_interval)
+
+
+def watch(experiments, args):
+    """Poll the feeds of all experiments until SIGINT or SIGTERM is received.
+
+    Configs, authenticated clients, the HTTP session and the feed cache are
+    kept between polls. A signal lets the current poll finish, so that all
+    state files are written, before the loop ends.
+    """
+    stop_event = threading.Event()
+
+    def request_stop(signum, _frame):
+        logger.info(f"Received signal {signum}, stopping after the current poll.")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    configs = {}
+    client_cache = {}
+    interval = args.min_interval
+    while not stop_event.is_set():
+        n_posted = 0
+        for experiment in experiments:
+            if stop_event.is_set():
+                break
+            try:
+                if experiment not in configs:
+                    configs[experiment] = load_config(
+                        experiment, args.config, args.auth
+                    )
+                n_posted += run_experiment(
+                    experiment, configs[experiment], args, client_cache
+                )
+            except Exception as poll_exception:  # pylint: disable=broad-except
+                logger.error(f"Error while polling {experiment}: {poll_exception}")
+            except SystemExit:
+                # the posting functions exit on failed uploads, which must
+                # not end the loop
+                logger.error(f"Aborted polling {experiment}, trying again later")
+        interval = next_poll_interval(
+            interval, n_posted, time.time(), args.min_interval, args.max_interval
+        )
+        if not stop_event.is_set():
+            logger.info(f"Next poll in {interval} seconds.")
+            stop_event.wait(interval)
+    close_state_journal()
+    close_http()
+    logger.info("Stopped watching the feeds.")
+
+
+def main():
+    """Main function."""
+    args = parse_arguments()
+    if args.verbose:
+        global logger
+        logger.setLevel(logging.DEBUG)
+    if args.replay:
+        # recorded responses must never lead to actual posts
+        args.dry = True
+    if args.compact_state:
+        replay_journal()
+        logger.info(f"Removed {compact_state()} state segments")
+        return
+    if args.state_segments:
+        enable_state_segments()
+    if args.import_ledger or args.export_ledger:
+        if not args.ledger:
+            logger.error("Please specify the ledger with --ledger")
+            sys.exit(1)
+        ledger = open_ledger(args.ledger)
+        if args.import_ledger:
+            logger.info(f"Imported {ledger.import_text_files()} posts")
+        else:
+            logger.info(f"Exported {ledger.export_text_files()} posts")
+        ledger.close()
+        return
+    if args.lease and not args.ledger:
+        logger.error("Leases are stored in the ledger, please specify it with --ledger")
+        sys.exit(1)
+    if args.ledger:
+        open_ledger(args.ledger)
+    if args.no_journal:
+        # the journals of killed runs are still applied
+        replay_journal()
+    else:
+        open_state_journal()
+    if args.link_analyses:
+        open_post_index()
+    configure_http(
+        record_dir=args.record, replay_dir=args.replay, engine=args.http_engine
+    )
+    # all experiments share the HTTP session and the feed cache, while
+    # credentials, state files and post limits are kept per experiment
+    experiments = get_experiments(args.experiment, args.config, args.auth)
+    if args.watch:
+        watch(experiments, args)
+        return
+    # an error in one experiment does not keep the others from being posted
+    failed = []
+    try:
+        for experiment in experiments:
+            logger.info(f"Processing experiment {experiment}")
+            try:
+                config = load_config(experiment, args.config, args.auth)
+                run_experiment(experiment, config, args)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(f"Error while processing {experiment}")
+                failed.append(experiment)
+    finally:
+        close_state_journal()
+        close_http()
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
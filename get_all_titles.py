@@ -1,10 +1,24 @@
-"""Get all titles currently in the RSS feeds for testing purposes."""
+"""Get all titles currently in the RSS feeds for testing purposes.
+
+The feeds are fetched concurrently and the titles formatted in a process
+pool. Besides printing the titles in a format useful for dumping into
+test_format_title.py, a JSONL snapshot is written: a header line with the
+snapshot version, followed by one line per entry with the raw title, the
+formatted title, the feed and the identifier. Use load_snapshot to read it.
+"""
+import argparse
 import configparser
+import datetime
+import json
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import daiquiri
-from cds_paper_bot import read_feed, format_title
+from cds_paper_bot import configure_http, fetch_feeds, format_title
 
-daiquiri.setup(level=logging.ERROR)
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE = os.path.join("tests", "title_snapshot.jsonl")
 
 
 def load_config(feed_file):
@@ -19,27 +33,90 @@ def load_config(feed_file):
     return config_dict
 
 
+def load_snapshot(snapshot_file=SNAPSHOT_FILE):
+    """Return the header and the list of entries of a title snapshot."""
+    with open(snapshot_file, encoding="utf-8") as json_file:
+        header = json.loads(json_file.readline())
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"{snapshot_file} has version {header.get('version')}, "
+                f"expected {SNAPSHOT_VERSION}"
+            )
+        entries = [json.loads(line) for line in json_file if line.strip()]
+    return header, entries
+
+
+def write_snapshot(snapshot_file, entries):
+    """Write the entries with a header line to snapshot_file."""
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "entries": len(entries),
+    }
+    tmp_file = f"{snapshot_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as json_file:
+        for line in [header] + entries:
+            json_file.write(json.dumps(line, ensure_ascii=False) + "\n")
+    os.replace(tmp_file, snapshot_file)
+
+
+def parse_arguments():
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-c", "--config", default="feeds.ini")
+    parser.add_argument(
+        "-s", "--snapshot", default=SNAPSHOT_FILE, help="JSONL snapshot to write"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not print the titles"
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="number of processes")
+    fixture_group = parser.add_mutually_exclusive_group()
+    fixture_group.add_argument(
+        "--record", help="store all CDS responses in this directory"
+    )
+    fixture_group.add_argument(
+        "--replay",
+        help="serve all CDS responses from a directory created with --record",
+    )
+    return parser.parse_args()
+
+
 def main():
     """Load the feeds, print all titles in a format useful for dumping into test_format_title.py."""
-    config = load_config("feeds.ini")
-    # print(config)
+    daiquiri.setup(level=logging.ERROR)
+    args = parse_arguments()
+    configure_http(record_dir=args.record, replay_dir=args.replay)
+    config = load_config(args.config)
+    feed_dict = {}
     for experiment in config:
         for pub_type in config[experiment]:
-            print(f"            # {experiment} {pub_type}")
-            this_feed = read_feed(config[experiment][pub_type])
-            if this_feed:
-                this_feed_entries = this_feed["entries"]
-                # print("Found %d items" % len(this_feed_entries))
-                for entry in this_feed_entries:
-                    # print(entry.dc_source)
-                    input_title = entry.title.replace("\\", "\\\\")
-                    formatted_title = format_title(entry.title).replace("\\", "\\\\")
-                    print(
-                        f'            ("{input_title}",\n            "{formatted_title}"),'
-                    )
-                    # print()
-            # break
-        # break
+            feed_dict[f"{experiment} {pub_type}"] = config[experiment][pub_type]
+    feed_entries = fetch_feeds(feed_dict, max_workers=8)
+    titles = [entry.title for entry in feed_entries]
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        formatted_titles = list(executor.map(format_title, titles, chunksize=16))
+
+    snapshot = []
+    feed_id = None
+    for entry, formatted_title in zip(feed_entries, formatted_titles):
+        snapshot.append(
+            {
+                "title": entry.title,
+                "formatted_title": formatted_title,
+                "feed": entry.feed_id,
+                "identifier": entry.source,
+            }
+        )
+        if args.quiet:
+            continue
+        if entry.feed_id != feed_id:
+            feed_id = entry.feed_id
+            print(f"            # {feed_id}")
+        input_title = entry.title.replace("\\", "\\\\")
+        formatted_title = formatted_title.replace("\\", "\\\\")
+        print(f'            ("{input_title}",\n            "{formatted_title}"),')
+    write_snapshot(args.snapshot, snapshot)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+"""Test the Bloom filter of the posted identifiers."""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class TestBloomFilter(object):
+    """Identifiers that were never posted are ruled out by the filter."""
+
+    def test_filter(self):
+        """No false negatives and few false positives."""
+        bloom = cds_paper_bot.BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f"CMS-PAS-HIG-23-{i:03d}")
+        assert all(f"CMS-PAS-HIG-23-{i:03d}" in bloom for i in range(1000))
+        false_positives = sum(f"CMS-PAS-TOP-23-{i:03d}" in bloom for i in range(1000))
+        assert false_positives < 50
+        copy = cds_paper_bot.BloomFilter.from_dict(bloom.to_dict())
+        assert "CMS-PAS-HIG-23-001" in copy
+
+    def test_posted_filter(self, tmp_path, monkeypatch):
+        """Only appended lines are read, a replaced file is read again."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_FILTERS", {})
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("A\nB\n")
+        assert "A" in cds_paper_bot.posted_filter("TEST_FEED", "TWITTER_")
+        assert (tmp_path / cds_paper_bot.BLOOM_DIR / "TWITTER_TEST_FEED.bloom").exists()
+
+        # a new run starts from the stored filter and reads the new line only
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_FILTERS", {})
+        with open("TWITTER_TEST_FEED.txt", "a") as txt_file:
+            txt_file.write("C\nD")
+        bloom = cds_paper_bot.posted_filter("TEST_FEED", "TWITTER_")
+        assert "C" in bloom and "B" in bloom
+        assert bloom.n_items == 3
+        assert cds_paper_bot.check_id_exists("C", "TEST_FEED", "TWITTER_")
+        assert not cds_paper_bot.check_id_exists("D", "TEST_FEED", "TWITTER_")
+
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("E\n")
+        bloom = cds_paper_bot.posted_filter("TEST_FEED", "TWITTER_")
+        assert "E" in bloom and bloom.n_items == 1
+
+    def test_rewritten_file(self, tmp_path, monkeypatch):
+        """A line inserted before the covered lines is found."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_FILTERS", {})
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_IDS", {})
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("B-ID\n")
+        assert not cds_paper_bot.check_id_exists("A-ID", "TEST_FEED", "TWITTER_")
+        # e.g. rebased onto a commit of another run
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("A-ID\nB-ID\n")
+        assert cds_paper_bot.check_id_exists("A-ID", "TEST_FEED", "TWITTER_")
+        # also when starting from the stored filter
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_FILTERS", {})
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("C-ID\nA-ID\nB-ID\n")
+        assert cds_paper_bot.check_id_exists("C-ID", "TEST_FEED", "TWITTER_")
+
+        # a line inserted before the checked tail of a longer file
+        lines = [f"ID-{i}\n" for i in range(2000)]
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("".join(lines))
+        assert cds_paper_bot.posted_filter("TEST_FEED", "TWITTER_").n_items == 2000
+        lines.insert(1000, "D-ID\n")
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("".join(lines) + "E-ID\n")
+        assert cds_paper_bot.check_id_exists("D-ID", "TEST_FEED", "TWITTER_")
+        assert cds_paper_bot.posted_filter("TEST_FEED", "TWITTER_").n_items == 2002
@@ -0,0 +1,170 @@
+"""Test paging through a CDS collection."""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+from test_http_replay import add_fixture  # pylint: disable=wrong-import-position
+
+RSS_URL = "https://cds.cern.ch/rss?cc=CMS%20Physics%20Analysis%20Summaries"
+ITEM = """<item>
+<title>Analysis {index}</title>
+<link>https://cds.cern.ch/record/{index}</link>
+<pubDate>{date}</pubDate>
+<dc:source>CMS-PAS-EXO-23-{index:03d}</dc:source>
+</item>
+"""
+
+
+def make_page(indices):
+    """Create a CDS RSS page with one item per index, newest first."""
+    items = "".join(
+        ITEM.format(index=x, date=f"Tue, 10 Oct 2023 10:{x:02d}:00 GMT")
+        for x in indices
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        "<channel>\n" + items + "</channel>\n</rss>\n"
+    ).encode("utf-8")
+
+
+class TestCatchup(object):
+    """Paging stops at the watermark."""
+
+    def test_page_url(self):
+        """The rg and jrec parameters select the page."""
+        assert cds_paper_bot.feed_page_url(RSS_URL + "&rg=10", 2, 50) == (
+            RSS_URL + "&rg=50&jrec=101"
+        )
+
+    def test_catchup(self, tmp_path, monkeypatch):
+        """Entries are collected page by page until the watermark is reached."""
+        monkeypatch.setattr(cds_paper_bot, "_HTTP_SESSION", None)
+        pages = [[20, 19, 18], [18, 17, 16], [15, 14, 13], [12, 11, 10]]
+        for page, indices in enumerate(pages):
+            add_fixture(
+                tmp_path, cds_paper_bot.feed_page_url(RSS_URL, page), make_page(indices)
+            )
+        cds_paper_bot.configure_http(replay_dir=str(tmp_path))
+
+        watermark = (
+            cds_paper_bot.parse_rfc822("Tue, 10 Oct 2023 10:14:00 GMT"),
+            {"CMS-PAS-EXO-23-014"},
+        )
+        found = list(
+            cds_paper_bot.catchup_feed(
+                "CMS_PAS_FEED", RSS_URL, watermark, lambda x: False, 10, max_workers=2
+            )
+        )
+        assert [[x.source[-2:] for x in page] for page in found] == [
+            ["20", "19", "18"],
+            ["17", "16"],
+            ["15"],
+        ]
+
+        found = list(
+            cds_paper_bot.catchup_feed(
+                "CMS_PAS_FEED",
+                RSS_URL,
+                (None, set()),
+                lambda x: x.source.endswith("17"),
+                10,
+            )
+        )
+        assert sum(len(x) for x in found) == 4
+
+    def test_pages_are_streamed(self, tmp_path, monkeypatch):
+        """run_experiment handles each page before the next one is fetched."""
+        monkeypatch.chdir(tmp_path)
+        events = []
+
+        def catchup_feed(feed_id, *args, **kwargs):
+            for page in range(2):
+                events.append(f"page {page}")
+                yield [
+                    cds_paper_bot.FeedEntry.from_feed(
+                        {"dc_source": f"CMS-PAS-EXO-23-{page}{index}"}, feed_id
+                    )
+                    for index in range(2)
+                ]
+
+        def is_handled(identifier, *args):
+            events.append(identifier)
+            return False
+
+        monkeypatch.setattr(cds_paper_bot, "catchup_feed", catchup_feed)
+        monkeypatch.setattr(cds_paper_bot, "is_handled", is_handled)
+        monkeypatch.setattr(
+            cds_paper_bot,
+            "authenticate",
+            lambda auth: {"twitter": None, "mastodon": None, "bluesky": None},
+        )
+        args = cds_paper_bot.parse_arguments(["--dry", "--catchup", "2"])
+        config = {"FEED_DICT": {"CMS_PAS_FEED": RSS_URL}, "AUTH": {}}
+        cds_paper_bot.run_experiment("CMS", config, args)
+        assert events == [
+            "page 0",
+            "CMS-PAS-EXO-23-00",
+            "CMS-PAS-EXO-23-01",
+            "page 1",
+            "CMS-PAS-EXO-23-10",
+            "CMS-PAS-EXO-23-11",
+        ]
+
+    def test_failed_page(self, tmp_path, monkeypatch):
+        """A page that cannot be read does not count as the end of the feed."""
+        monkeypatch.setattr(cds_paper_bot, "_HTTP_SESSION", None)
+        for page, indices in enumerate([[20, 19, 18], None, [14, 13, 12]]):
+            if indices:
+                add_fixture(
+                    tmp_path,
+                    cds_paper_bot.feed_page_url(RSS_URL, page),
+                    make_page(indices),
+                )
+        cds_paper_bot.configure_http(replay_dir=str(tmp_path))
+        found = []
+        with pytest.raises(cds_paper_bot.CatchupIncomplete):
+            for page_entries in cds_paper_bot.catchup_feed(
+                "CMS_PAS_FEED", RSS_URL, (None, set()), lambda x: False, 10
+            ):
+                found.append(page_entries)
+        assert [[x.source[-2:] for x in page] for page in found] == [["20", "19", "18"]]
+
+    def test_incomplete_keeps_watermark(self, tmp_path, monkeypatch):
+        """The watermark of a feed that was not fully read is not advanced."""
+        monkeypatch.chdir(tmp_path)
+        stored = []
+
+        def catchup_feed(feed_id, *args, **kwargs):
+            yield [
+                cds_paper_bot.FeedEntry.from_feed(
+                    {
+                        "dc_source": f"{feed_id}-1",
+                        "published": "Tue, 10 Oct 2023 10:00:00 GMT",
+                    },
+                    feed_id,
+                )
+            ]
+            if feed_id == "CMS_PAS_FEED":
+                raise cds_paper_bot.CatchupIncomplete("Could not read page 1")
+
+        monkeypatch.setattr(cds_paper_bot, "catchup_feed", catchup_feed)
+        monkeypatch.setattr(cds_paper_bot, "is_handled", lambda *args: True)
+        monkeypatch.setattr(
+            cds_paper_bot, "store_watermark", lambda key, *args: stored.append(key)
+        )
+        monkeypatch.setattr(
+            cds_paper_bot,
+            "authenticate",
+            lambda auth: {"twitter": None, "mastodon": None, "bluesky": None},
+        )
+        args = cds_paper_bot.parse_arguments(["--catchup", "2"])
+        config = {
+            "FEED_DICT": {"CMS_PAS_FEED": RSS_URL, "CMS_PAPER_FEED": RSS_URL},
+            "AUTH": {"CONSUMER_KEY": ""},
+        }
+        cds_paper_bot.run_experiment("CMS", config, args)
+        assert stored == ["CMS_PAPER_FEED"]
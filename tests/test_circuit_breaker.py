@@ -0,0 +1,56 @@
+"""Test the circuit breaker and the fallback to cached feeds."""
+import sys
+import os
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+# a host no other test contacts, so that no request still running from an
+# earlier test closes the circuit
+RSS_URL = "https://cds.example.org/rss?cc=CMS%20Papers"
+
+
+class TestCircuitBreaker(object):
+    """Failing hosts are not contacted again until the reset time has passed."""
+
+    def test_open_and_reset(self, monkeypatch):
+        """The circuit opens at the threshold and lets one request through later."""
+        now = [1000.0]
+        monkeypatch.setattr(cds_paper_bot.time, "monotonic", lambda: now[0])
+        breaker = cds_paper_bot.CircuitBreaker(max_failures=2, reset_after=60)
+        breaker.record_failure("cds.cern.ch")
+        assert breaker.allow("cds.cern.ch")
+        breaker.record_failure("cds.cern.ch")
+        assert not breaker.allow("cds.cern.ch")
+        assert breaker.allow("arxiv.org")
+        now[0] += 61
+        assert breaker.allow("cds.cern.ch")
+        assert not breaker.allow("cds.cern.ch")
+        breaker.record_success("cds.cern.ch")
+        assert breaker.allow("cds.cern.ch")
+
+    def test_stale_feed(self, tmp_path, monkeypatch):
+        """A failed fetch falls back to the cached entries, then fails fast."""
+        calls = []
+
+        def failing_get(url, **kwargs):
+            calls.append(url)
+            raise requests.ConnectionError("connection refused")
+
+        monkeypatch.setattr(
+            cds_paper_bot, "_CIRCUIT_BREAKER", cds_paper_bot.CircuitBreaker(2, 60)
+        )
+        monkeypatch.setattr(cds_paper_bot.get_http_session(), "get", failing_get)
+        entries = [{"dc_source": "CMS-HIG-23-001"}]
+        cds_paper_bot.store_feed_cache(str(tmp_path), RSS_URL, None, None, entries)
+
+        for _ in range(3):
+            feed = cds_paper_bot.read_feed(RSS_URL, cache_dir=str(tmp_path))
+            assert feed["entries"] == entries
+        assert len(calls) == 2
+        assert cds_paper_bot.read_feed(RSS_URL) is None
+        with pytest.raises(cds_paper_bot.CircuitOpen):
+            cds_paper_bot.http_get(RSS_URL)
@@ -0,0 +1,145 @@
+"""Test classifying feed entries by their content hashes."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+def make_entry(source, title="Title", media_urls=None):
+    """Create a FeedEntry with the given content."""
+    return cds_paper_bot.FeedEntry(
+        source,
+        "TEST_FEED",
+        title,
+        f"https://cds.cern.ch/record/{source}",
+        "",
+        None,
+        media_urls or [],
+    )
+
+
+class TestContentDiff(object):
+    """Entries are new, updated or unchanged."""
+
+    def test_media_order(self):
+        """The hash does not depend on the order or query of the media URLs."""
+        figures = [
+            "https://cds.cern.ch/files/Figure_1.png",
+            "https://cds.cern.ch/files/Figure_2.png",
+        ]
+        assert cds_paper_bot.content_hash(
+            make_entry("A", media_urls=figures)
+        ) == cds_paper_bot.content_hash(
+            make_entry("A", media_urls=[figures[1] + "?subformat=icon"] + figures)
+        )
+
+    def test_diff(self, tmp_path, monkeypatch):
+        """Compare the entries with the stored hashes, the last hash wins."""
+        monkeypatch.chdir(tmp_path)
+        figure = ["https://cds.cern.ch/files/Figure_1.png"]
+        for entry in [make_entry("A"), make_entry("B"), make_entry("B", "Old")]:
+            cds_paper_bot.store_content_hash(
+                "TEST_FEED", entry.source, cds_paper_bot.content_hash(entry)
+            )
+        content_hashes = {"TEST_FEED": cds_paper_bot.load_content_hashes("TEST_FEED")}
+        entries = [
+            make_entry("A", media_urls=figure),
+            make_entry("B", "Old"),
+            make_entry("C"),
+        ]
+        entry_diff = cds_paper_bot.diff_entries(entries, content_hashes)
+        assert {key: value[0] for key, value in entry_diff.items()} == {
+            "A": cds_paper_bot.ENTRY_UPDATED,
+            "B": cds_paper_bot.ENTRY_UNCHANGED,
+            "C": cds_paper_bot.ENTRY_NEW,
+        }
+
+    def test_media_changed(self):
+        """Only changed media URLs count, not a changed title or an old hash."""
+        figure = ["https://cds.cern.ch/files/Figure_1.png"]
+        stored = cds_paper_bot.content_hash(make_entry("A"))
+        assert not cds_paper_bot.media_changed(
+            stored, cds_paper_bot.content_hash(make_entry("A", "New"))
+        )
+        assert cds_paper_bot.media_changed(
+            stored, cds_paper_bot.content_hash(make_entry("A", media_urls=figure))
+        )
+        assert not cds_paper_bot.media_changed(
+            stored.split("-")[0],
+            cds_paper_bot.content_hash(make_entry("A", media_urls=figure)),
+        )
+
+    def test_refresh(self, tmp_path, monkeypatch):
+        """Changed figures of a posted entry are downloaded and posted as replies."""
+        monkeypatch.chdir(tmp_path)
+        ledger = cds_paper_bot.Ledger(str(tmp_path / "ledger.sqlite"))
+        monkeypatch.setattr(cds_paper_bot, "_LEDGER", ledger)
+        monkeypatch.setattr(cds_paper_bot, "_POST_INDEX", None)
+        figures = ["https://cds.cern.ch/files/Figure_1.png"]
+        entry = make_entry("A", media_urls=figures)
+        cds_paper_bot.store_content_hash(
+            "TEST_FEED", "A", cds_paper_bot.content_hash(make_entry("A"))
+        )
+        ledger.record("A", "TEST_FEED", "twitter", post_id="1")
+        ledger.record("A", "TEST_FEED", "mastodon", post_id="2")
+        events = []
+
+        def download_files(downloads):
+            events.append(("download", [x[0] for x in downloads]))
+            return [True] * len(downloads)
+
+        def post(platform, post_id):
+            def post_function(*args, thread=None, **kwargs):
+                events.append((platform, args[1], thread["reply_to"]))
+                return {"id": post_id}
+
+            return post_function
+
+        monkeypatch.setattr(
+            cds_paper_bot, "fetch_feeds", lambda *args, **kwargs: [entry]
+        )
+        monkeypatch.setattr(
+            cds_paper_bot,
+            "authenticate",
+            lambda auth: {
+                "twitter": {"v1": None, "v2": None},
+                "mastodon": object(),
+                "bluesky": None,
+            },
+        )
+        monkeypatch.setattr(cds_paper_bot, "select_media", lambda *args: (True, True))
+        monkeypatch.setattr(cds_paper_bot, "download_files", download_files)
+        monkeypatch.setattr(cds_paper_bot, "process_images", lambda x, y, z: y)
+        monkeypatch.setattr(
+            cds_paper_bot, "twitter_upload_images", lambda *args: ["media"]
+        )
+        monkeypatch.setattr(
+            cds_paper_bot, "mastodon_upload_images", lambda *args, **kwargs: ["media"]
+        )
+        monkeypatch.setattr(cds_paper_bot, "tweet", post("twitter", "3"))
+        monkeypatch.setattr(cds_paper_bot, "toot", post("mastodon", "4"))
+        monkeypatch.setattr(cds_paper_bot.time, "sleep", lambda x: None)
+        args = cds_paper_bot.parse_arguments([])
+        config = {
+            "FEED_DICT": {"TEST_FEED": "https://cds.cern.ch/rss"},
+            "AUTH": {
+                "CONSUMER_KEY": "",
+                "MASTODON_ACCESS_TOKEN": "",
+                "BOT_HANDLE": "",
+                "MASTODON_BOT_HANDLE": "",
+            },
+        }
+        assert cds_paper_bot.run_experiment("TEST", config, args) == 1
+        assert events == [
+            ("download", figures),
+            ("twitter", "#TESTpaper with updated figures", "1"),
+            ("mastodon", "#TESTpaper with updated figures", "2"),
+        ]
+        assert ledger.get("A", "TEST_FEED", "twitter")["post_id"] == "3"
+
+        # the new hash is stored, so the figures are posted only once
+        del events[:]
+        assert cds_paper_bot.run_experiment("TEST", config, args) == 0
+        assert events == []
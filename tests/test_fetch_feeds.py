@@ -0,0 +1,28 @@
+"""Test fetching the feeds of an experiment concurrently."""
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class TestFetchFeeds(object):
+    """A hanging feed is given up at the deadline."""
+
+    def test_deadline(self, monkeypatch):
+        """The other feeds are returned and the hung worker is a daemon."""
+        release = threading.Event()
+
+        def read_feed(rss_url, *args):
+            if rss_url == "hang":
+                release.wait()
+            return {"entries": [{"dc_source": "CMS-PAS-EXO-23-001"}]}
+
+        monkeypatch.setattr(cds_paper_bot, "read_feed", read_feed)
+        monkeypatch.setattr(cds_paper_bot, "FEED_FETCH_DEADLINE", 0.2)
+        entries = cds_paper_bot.fetch_feeds({"SLOW": "hang", "FAST": "ok"})
+        assert [entry.feed_id for entry in entries] == ["FAST"]
+        workers = [x for x in threading.enumerate() if x.name == "feed-fetch"]
+        assert workers and all(worker.daemon for worker in workers)
+        release.set()
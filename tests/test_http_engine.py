@@ -0,0 +1,107 @@
+"""Test the httpx engine against a local HTTP server."""
+
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+pytest.importorskip("httpx")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class FigureHandler(BaseHTTPRequestHandler):
+    """Serve /files/<name> with the name as body, everything else is missing.
+
+    /busy/<n> fails with 503 n times before it is served.
+    """
+
+    busy_counts = {}
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer a GET request."""
+        if self.path.startswith("/busy/"):
+            count = self.busy_counts.get(self.path, 0)
+            self.busy_counts[self.path] = count + 1
+            if count < int(self.path.rsplit("/", 1)[1]):
+                self.send_error(503)
+                return
+        elif not self.path.startswith("/files/"):
+            self.send_error(404)
+            return
+        body = self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Do not log requests."""
+
+
+class FigureServer(ThreadingHTTPServer):
+    """Server accepting many connections at once."""
+
+    request_queue_size = 64
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url(monkeypatch):
+    """Run the server and the httpx engine for one test."""
+    server = FigureServer(("127.0.0.1", 0), FigureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(cds_paper_bot, "_HTTP_SESSION", None)
+    monkeypatch.setattr(
+        cds_paper_bot, "_CIRCUIT_BREAKER", cds_paper_bot.CircuitBreaker()
+    )
+    cds_paper_bot.configure_http(engine="httpx")
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    cds_paper_bot.close_http()
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpEngine(object):
+    """The httpx engine behaves like the requests session."""
+
+    def test_get(self, server_url):
+        """Responses are converted to requests responses."""
+        response = cds_paper_bot.http_get(f"{server_url}/files/Figure_001.png")
+        assert isinstance(response, requests.Response)
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"v1"'
+        assert response.content == b"/files/Figure_001.png"
+        assert cds_paper_bot.http_get(f"{server_url}/missing").status_code == 404
+
+    def test_download_files(self, server_url, tmp_path):
+        """Files are downloaded concurrently, failures are reported per file."""
+        downloads = [
+            (f"{server_url}/files/Figure_{index:03d}.png", str(tmp_path / f"{index}"))
+            for index in range(20)
+        ]
+        downloads.append((f"{server_url}/missing.png", str(tmp_path / "missing")))
+        assert cds_paper_bot.download_files(downloads) == [True] * 20 + [False]
+        assert (tmp_path / "7").read_bytes() == b"/files/Figure_007.png"
+        assert not (tmp_path / "missing").exists()
+
+    def test_retry(self, server_url, monkeypatch):
+        """Server errors are retried like with the requests session."""
+        monkeypatch.setattr(cds_paper_bot, "HTTP_BACKOFF_FACTOR", 0)
+        monkeypatch.setattr(cds_paper_bot, "HTTP_BACKOFF_JITTER", 0)
+        response = cds_paper_bot.http_get(f"{server_url}/busy/2")
+        assert response.status_code == 200
+        assert response.content == b"/busy/2"
+        assert cds_paper_bot.http_get(f"{server_url}/busy/9").status_code == 503
+        assert FigureHandler.busy_counts["/busy/9"] == cds_paper_bot.HTTP_RETRIES + 1
+
+    def test_connection_error(self, server_url):
+        """httpx errors are raised as requests exceptions."""
+        with pytest.raises(requests.ConnectionError):
+            cds_paper_bot.http_get("http://127.0.0.1:1/files/Figure_001.png")
+        assert server_url
@@ -0,0 +1,114 @@
+"""Test serving HTTP responses from a fixture directory."""
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+FIGURE_URL = "https://cds.cern.ch/record/2000001/files/Figure_001.png"
+MARCXML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<collection xmlns="http://www.loc.gov/MARC21/slim">
+<record>
+  <controlfield tag="001">2000001</controlfield>
+  <datafield tag="037" ind1=" " ind2=" ">
+    <subfield code="a">CMS-PAS-HIG-23-001</subfield>
+  </datafield>
+  <datafield tag="856" ind1="4" ind2=" ">
+    <subfield code="s">12345</subfield>
+    <subfield code="u">https://cds.cern.ch/record/2000001/files/Figure_001.png</subfield>
+    <subfield code="y">00001 Invariant mass distribution.</subfield>
+  </datafield>
+  <datafield tag="856" ind1="4" ind2=" ">
+    <subfield code="u">https://cds.cern.ch/record/2000001/files/Figure_001.gif?subformat=icon</subfield>
+    <subfield code="x">icon</subfield>
+  </datafield>
+  <datafield tag="856" ind1="4" ind2=" ">
+    <subfield code="u">https://cds.cern.ch/record/2000001/files/HIG-23-001-pas.pdf</subfield>
+  </datafield>
+  <datafield tag="856" ind1="4" ind2=" ">
+    <subfield code="u">https://cms-results.web.cern.ch/cms-results/public-results/preliminary-results/HIG-23-001/</subfield>
+  </datafield>
+</record>
+</collection>
+"""
+
+
+def add_fixture(fixture_dir, url, body, headers=None):
+    """Store a response in the fixture directory like RecordingAdapter does."""
+    body_path, meta_path = cds_paper_bot.fixture_paths(str(fixture_dir), url)
+    with open(body_path, "wb") as body_file:
+        body_file.write(body)
+    with open(meta_path, "w") as meta_file:
+        json.dump(
+            {"url": url, "status": 200, "reason": "OK", "headers": headers or {}},
+            meta_file,
+        )
+
+
+class TestReplay(object):
+    """Responses are served from the fixture directory only."""
+
+    def test_replay(self, tmp_path, monkeypatch):
+        """Replay a media download, a conditional GET and a missing URL."""
+        monkeypatch.setattr(cds_paper_bot, "_HTTP_SESSION", None)
+        add_fixture(tmp_path, FIGURE_URL, b"\x89PNG figure", {"ETag": '"abc"'})
+        cds_paper_bot.configure_http(replay_dir=str(tmp_path))
+
+        out_path = tmp_path / "figure.png"
+        assert cds_paper_bot.download_file(FIGURE_URL, str(out_path))
+        assert out_path.read_bytes() == b"\x89PNG figure"
+
+        response = cds_paper_bot.http_get(
+            FIGURE_URL, headers={"If-None-Match": '"abc"'}
+        )
+        assert response.status_code == 304
+
+        response = cds_paper_bot.http_get("https://cds.cern.ch/record/1")
+        assert response.status_code == 404
+
+    def test_record_manifest(self, tmp_path, monkeypatch):
+        """Build the figure manifest from a recorded MARCXML export."""
+        monkeypatch.setattr(cds_paper_bot, "_HTTP_SESSION", None)
+        add_fixture(tmp_path, "https://cds.cern.ch/record/2000001?of=xm", MARCXML)
+        cds_paper_bot.configure_http(replay_dir=str(tmp_path))
+
+        manifest = cds_paper_bot.record_manifest("https://cds.cern.ch/record/2000001")
+        assert manifest == [
+            {
+                "url": FIGURE_URL,
+                "name": "Figure_001.png",
+                "caption": "Invariant mass distribution.",
+            },
+            {
+                "url": "https://cds.cern.ch/record/2000001/files/HIG-23-001-pas.pdf",
+                "name": "HIG-23-001-pas.pdf",
+                "caption": "",
+            },
+        ]
+        assert cds_paper_bot.record_manifest("https://cds.cern.ch/record/1") is None
+
+    def test_atlas_pdf_other_host(self):
+        """The main document of ATLAS records is found on any host."""
+        record_link = "https://cds.cern.ch/record/2000001"
+        for media_url in [
+            "https://cds.cern.ch/record/2000001/files/ATLAS-CONF-2023-001.pdf",
+            "http://cdsweb.cern.ch/record/2000001/files/ATLAS-CONF-2023-001.pdf",
+        ]:
+            assert cds_paper_bot.select_media("ATLAS", media_url, record_link) == (
+                True,
+                False,
+            )
+        assert cds_paper_bot.select_media(
+            "ATLAS", "https://cds.cern.ch/record/2000001/files/fig_01.pdf", record_link
+        ) == (False, False)
+
+    def test_image_alt_text(self):
+        """Captions of the record are used for the processed images."""
+        captions = {"Figure_001": "Invariant mass distribution."}
+        figure_1 = "CMS-PAS-HIG-23-001/Figure_001_.png"
+        figure_2 = "CMS-PAS-HIG-23-001/Figure_002_.png"
+        alt_text = cds_paper_bot.image_alt_text
+        assert alt_text(figure_1, captions, "Image") == "Invariant mass distribution."
+        assert alt_text(figure_2, captions, "Image") == "Image"
+        assert alt_text(figure_1, captions, "Image", 10) == "Invaria..."
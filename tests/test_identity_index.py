@@ -0,0 +1,85 @@
+"""Test linking the identifiers of the same analysis."""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+TITLE = "Search for a heavy Higgs boson decaying to a pair of top quarks"
+CADI_LINK = "https://cms.cern.ch/iCMS/analysisadmin/cadi?ancode=HIG-23-001"
+
+
+def make_entry(source, title=TITLE, media_urls=None):
+    """Create a FeedEntry with the given identifier and title."""
+    return cds_paper_bot.FeedEntry(
+        source, "CMS_FEED", title, "", "", None, media_urls or []
+    )
+
+
+class TestIdentityIndex(object):
+    """PAS, preprint and arXiv entries of one analysis are linked."""
+
+    def test_link(self, tmp_path, monkeypatch):
+        """Link by the PAS identifier, the CADI link and the title."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        index = cds_paper_bot.IdentityIndex("CMS")
+        assert index.add(make_entry("CMS-PAS-XXX-HIG-23-001-005")) == "HIG-23-001"
+        assert index.add(make_entry("CERN-EP-2024-001", "", [CADI_LINK])) == (
+            "HIG-23-001"
+        )
+        assert index.add(make_entry("arXiv:2401.00001", TITLE + " at 13 TeV")) == (
+            "HIG-23-001"
+        )
+        assert index.add(make_entry("CMS-PAS-TOP-23-002", "Top quark mass")) == (
+            "TOP-23-002"
+        )
+        assert index.add(make_entry("arXiv:2401.00002", "Something else")) == (
+            "arXiv:2401.00002"
+        )
+        assert index.linked("arXiv:2401.00001") == [
+            "CMS-PAS-HIG-23-001",
+            "CERN-EP-2024-001",
+        ]
+        assert index.linked("arXiv:2401.00002") == []
+        assert index.linked("unknown") == []
+
+        # the index is read back from the state file
+        index = cds_paper_bot.IdentityIndex("CMS")
+        assert len(index.analyses) == 5
+        assert index.find(make_entry("arXiv:2401.00003", TITLE)) == "HIG-23-001"
+        # a known CADI code takes precedence over a similar title
+        top_link = CADI_LINK.replace("HIG-23-001", "TOP-23-002")
+        assert index.find(make_entry("arXiv:2401.00004", TITLE, [top_link])) == (
+            "TOP-23-002"
+        )
+
+    def test_different_codes(self, tmp_path, monkeypatch):
+        """Analyses with different CADI codes are not linked by their titles."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        index = cds_paper_bot.IdentityIndex("CMS")
+        assert index.add(make_entry("CMS-PAS-HIG-23-001")) == "HIG-23-001"
+        similar_title = TITLE.replace("decaying to", "decaying into")
+        assert index.add(make_entry("CMS-PAS-HIG-25-007", similar_title)) == (
+            "HIG-25-007"
+        )
+        assert index.add(make_entry("arXiv:2401.00001", "Something else")) == (
+            "arXiv:2401.00001"
+        )
+        # an entry with a code joins an analysis without one
+        assert index.add(make_entry("CMS-PAS-TOP-23-002", "Something else")) == (
+            "arXiv:2401.00001"
+        )
+        assert index.linked("CMS-PAS-HIG-25-007") == []
+
+    def test_linked_post(self, tmp_path, monkeypatch):
+        """The last post of a linked analysis is found in the ledger."""
+        monkeypatch.setattr(cds_paper_bot, "_LEDGER", None)
+        assert cds_paper_bot.linked_post(["CMS-PAS-HIG-23-001"], "TWITTER_") is None
+        ledger = cds_paper_bot.open_ledger(str(tmp_path / "posts.sqlite"))
+        ledger.record("CMS-PAS-HIG-23-001", "CMS_PAS_FEED", "twitter", post_id="11")
+        ledger.record("CMS-PAS-HIG-23-001", "CMS_PAS_FEED", "mastodon", post_id="21")
+        assert cds_paper_bot.linked_post(["CMS-PAS-HIG-23-001"], "TWITTER_") == "11"
+        assert cds_paper_bot.linked_post(["CMS-PAS-HIG-23-002"], "TWITTER_") is None
+        ledger.close()
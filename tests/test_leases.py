@@ -0,0 +1,62 @@
+"""Test leasing posts to one of several bots sharing a ledger."""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+ANALYSIS = ("CMS-PAS-HIG-23-001", "CMS_PAS_FEED", "twitter")
+
+
+class TestLeases(object):
+    """Only one worker at a time holds the lease of a post."""
+
+    def test_claim(self, tmp_path, monkeypatch):
+        """Leases are exclusive until they expire or the post is recorded."""
+        path = str(tmp_path / "posts.sqlite")
+        ledger = cds_paper_bot.Ledger(path)
+        other_ledger = cds_paper_bot.Ledger(path)
+        assert ledger.claim(*ANALYSIS, "host-1", 600)
+        assert not other_ledger.claim(*ANALYSIS, "host-2", 600)
+        # renewing the own lease
+        assert ledger.claim(*ANALYSIS, "host-1", 600)
+        # the lease of a crashed worker expires
+        now = cds_paper_bot.time.time()
+        monkeypatch.setattr(cds_paper_bot.time, "time", lambda: now + 601)
+        assert other_ledger.claim(*ANALYSIS, "host-2", 600)
+        assert not ledger.claim(*ANALYSIS, "host-1", 600)
+
+        other_ledger.record(*ANALYSIS, post_id="1")
+        other_ledger.release(*ANALYSIS, "host-2")
+        assert not ledger.claim(*ANALYSIS, "host-1", 600)
+        assert ledger.connection.execute("SELECT * FROM leases").fetchall() == []
+        ledger.close()
+        other_ledger.close()
+
+    def test_release(self, tmp_path):
+        """Only the holder releases a lease."""
+        ledger = cds_paper_bot.Ledger(str(tmp_path / "posts.sqlite"))
+        assert ledger.claim(*ANALYSIS, "host-1", 600)
+        ledger.release(*ANALYSIS, "host-2")
+        assert not ledger.claim(*ANALYSIS, "host-2", 600)
+        ledger.release(*ANALYSIS, "host-1")
+        assert ledger.claim(*ANALYSIS, "host-2", 600)
+        ledger.close()
+
+    def test_renew(self, tmp_path, monkeypatch):
+        """A retry renews the lease, unless another worker took it over."""
+        monkeypatch.setattr(cds_paper_bot, "_LEDGER", None)
+        ledger = cds_paper_bot.open_ledger(str(tmp_path / "posts.sqlite"))
+        identifier, feed_id = ANALYSIS[:2]
+        assert cds_paper_bot.renew_post(identifier, feed_id, "TWITTER_", None)
+        assert cds_paper_bot.claim_post(identifier, feed_id, "TWITTER_", 600)
+        now = cds_paper_bot.time.time()
+        monkeypatch.setattr(cds_paper_bot.time, "time", lambda: now + 500)
+        assert cds_paper_bot.renew_post(identifier, feed_id, "TWITTER_", 600)
+        # still held 601 seconds after the claim
+        monkeypatch.setattr(cds_paper_bot.time, "time", lambda: now + 601)
+        assert not ledger.claim(*ANALYSIS, "host-2", 600)
+        monkeypatch.setattr(cds_paper_bot.time, "time", lambda: now + 1101)
+        assert ledger.claim(*ANALYSIS, "host-2", 600)
+        assert not cds_paper_bot.renew_post(identifier, feed_id, "TWITTER_", 600)
+        ledger.close()
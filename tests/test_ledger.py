@@ -0,0 +1,47 @@
+"""Test the SQLite posting ledger."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class TestLedger(object):
+    """Posts are recorded in the ledger and exchanged with the text files."""
+
+    def test_store_and_check(self, tmp_path, monkeypatch):
+        """With a ledger, check_id_exists and store_id do not use text files."""
+        monkeypatch.chdir(tmp_path)
+        ledger = cds_paper_bot.Ledger(str(tmp_path / "ledger.sqlite"))
+        monkeypatch.setattr(cds_paper_bot, "_LEDGER", ledger)
+        assert not cds_paper_bot.check_id_exists("A", "TEST_FEED", "TWITTER_")
+        cds_paper_bot.store_id(
+            "A", "TEST_FEED", prefix="TWITTER_", post_id="2", thread_id="1"
+        )
+        assert cds_paper_bot.check_id_exists("A", "TEST_FEED", "TWITTER_")
+        assert not cds_paper_bot.check_id_exists("A", "TEST_FEED", "BLUESKY_")
+        row = ledger.get("A", "TEST_FEED", "twitter")
+        assert (row["post_id"], row["thread_id"]) == ("2", "1")
+        assert not (tmp_path / "TWITTER_TEST_FEED.txt").exists()
+
+    def test_import_export(self, tmp_path):
+        """Identifiers survive a round trip through the ledger."""
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("A\nB\n")
+        (tmp_path / "BLUESKY_TEST_FEED.txt").write_text("A\n")
+        ledger = cds_paper_bot.Ledger(str(tmp_path / "ledger.sqlite"))
+        assert ledger.import_text_files(str(tmp_path)) == 3
+        assert ledger.import_text_files(str(tmp_path)) == 0
+        assert ledger.exists("B", "TEST_FEED", "twitter")
+        ledger.record("C", "TEST_FEED", "twitter", post_id="3")
+        ledger.record("C", "TEST_FEED", "mastodon", post_id="4")
+        assert ledger.export_text_files(str(tmp_path)) == 2
+        assert (tmp_path / "TWITTER_TEST_FEED.txt").read_text() == "A\nB\nC\n"
+        assert (tmp_path / "MASTODON_TEST_FEED.txt").read_text() == "C\n"
+        assert (tmp_path / "BLUESKY_TEST_FEED.txt").read_text() == "A\n"
+
+    def test_response_post_id(self):
+        """Post IDs are taken from the responses of all platforms."""
+        assert cds_paper_bot.response_post_id({"id": 123}) == "123"
+        assert cds_paper_bot.response_post_id({"uri": "at://x", "cid": "y"}) == "at://x"
+        assert cds_paper_bot.response_post_id(None) is None
@@ -0,0 +1,113 @@
+"""Test the streaming CDS RSS parser against feedparser."""
+import sys
+import os
+from io import BytesIO
+
+import feedparser
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+RSS_URL = "https://cds.cern.ch/rss?cc=CMS%20Physics%20Analysis%20Summaries"
+CDS_RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"
+     xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel>
+<title>CDS: CMS Physics Analysis Summaries</title>
+<link>https://cds.cern.ch</link>
+<item>
+<title>Search for $\\mathrm{H} \\to \\mu^+\\mu^-$ at $\\sqrt{s} &lt; 14$ TeV</title>
+<link>https://cds.cern.ch/record/2000003</link>
+<description>Abstract</description>
+<pubDate>Wed, 11 Oct 2023 09:15:00 +0200</pubDate>
+<dc:source>CMS-PAS-HIG-23-003</dc:source>
+<media:content url="https://cms-results.web.cern.ch/cms-results/public-results/preliminary-results/cadi?ancode=HIG-23-003" />
+<media:content url="https://cds.cern.ch/record/2000003/files/Figure_001.pdf" />
+<media:content url="https://cds.cern.ch/record/2000003/files/Figure_001.png?subformat=icon" />
+</item>
+<item>
+<title>Search for new physics</title>
+<link>https://cds.cern.ch/record/2000002</link>
+<pubDate>Tue, 10 Oct 2023 10:00:00 GMT</pubDate>
+<dc:source>CMS-PAS-EXO-23-002</dc:source>
+</item>
+<item>
+<title>Measurement of something</title>
+<link>https://cds.cern.ch/record/2000001</link>
+<pubDate>Mon, 09 Oct 2023 08:30:00 GMT</pubDate>
+<dc:source>CMS-PAS-SMP-23-001</dc:source>
+<media:content url="https://cds.cern.ch/record/2000001/files/Figure_001.png" />
+</item>
+</channel>
+</rss>
+"""
+
+
+class TestParseCdsRss(object):
+    """The fields used by the bot must agree with feedparser."""
+
+    def test_same_fields_as_feedparser(self):
+        """Compare all fields used by the bot."""
+        reference = feedparser.parse(BytesIO(CDS_RSS))["entries"]
+        entries = cds_paper_bot.parse_cds_rss(CDS_RSS)["entries"]
+        assert len(entries) == len(reference)
+        for entry, expected in zip(entries, reference):
+            assert entry.title == expected.title
+            assert entry.link == expected.link
+            assert entry["dc_source"] == expected["dc_source"]
+            assert entry["published"] == expected["published"]
+            assert entry["published_parsed"] == expected["published_parsed"]
+            assert [x["url"] for x in entry["media_content"]] == [
+                x["url"] for x in expected.get("media_content", [])
+            ]
+
+    def test_stops_below_watermark(self):
+        """Parsing stops at the first entry older than the watermark."""
+        watermark = (
+            cds_paper_bot.parse_rfc822("Tue, 10 Oct 2023 10:00:00 GMT"),
+            {"CMS-PAS-EXO-23-002"},
+        )
+        entries = cds_paper_bot.parse_cds_rss(CDS_RSS, watermark=watermark)
+        # entries at the watermark time are kept, they may not all be handled
+        assert [x["dc_source"] for x in entries["entries"]] == [
+            "CMS-PAS-HIG-23-003",
+            "CMS-PAS-EXO-23-002",
+        ]
+        assert entries["truncated"]
+        assert not cds_paper_bot.parse_cds_rss(CDS_RSS)["truncated"]
+
+    def test_out_of_order(self):
+        """Older entries do not stop parsing before a known entry is reached."""
+        head, *items = CDS_RSS.split(b"<item>")
+        items[-1], tail = items[-1].split(b"</channel>")
+        content = b"<item>".join([head, items[2], items[0], items[1]]) + (
+            b"</channel>" + tail
+        )
+        watermark = (
+            cds_paper_bot.parse_rfc822("Tue, 10 Oct 2023 10:00:00 GMT"),
+            {"CMS-PAS-EXO-23-002"},
+        )
+        entries = cds_paper_bot.parse_cds_rss(content, watermark=watermark)
+        assert [x["dc_source"] for x in entries["entries"]] == [
+            "CMS-PAS-SMP-23-001",
+            "CMS-PAS-HIG-23-003",
+            "CMS-PAS-EXO-23-002",
+        ]
+        assert not entries["truncated"]
+
+    def test_truncated_feed_not_cached(self, tmp_path, monkeypatch):
+        """Only a complete parse is stored in the feed cache."""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = CDS_RSS  # pylint: disable=protected-access
+        monkeypatch.setattr(cds_paper_bot, "http_get", lambda *a, **k: response)
+        watermark = (
+            cds_paper_bot.parse_rfc822("Tue, 10 Oct 2023 10:00:00 GMT"),
+            {"CMS-PAS-EXO-23-002"},
+        )
+        cds_paper_bot.read_feed(RSS_URL, str(tmp_path), "lxml", watermark)
+        assert cds_paper_bot.load_feed_cache(str(tmp_path), RSS_URL) is None
+        cds_paper_bot.read_feed(RSS_URL, str(tmp_path), "lxml")
+        cached = cds_paper_bot.load_feed_cache(str(tmp_path), RSS_URL)
+        assert len(cached["entries"]) == 3
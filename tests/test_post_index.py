@@ -0,0 +1,109 @@
+"""Test finding the preliminary result a paper supersedes."""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+PAS_TITLE = (
+    "Search for a heavy Higgs boson decaying to a pair of top quarks at √(s) = 13 TeV"
+)
+PAPER_TITLE = (
+    "Search for heavy Higgs bosons decaying to a pair of top quarks at √(s) = 13 TeV"
+)
+
+
+class TestPostIndex(object):
+    """Posts are indexed by their formatted titles."""
+
+    def test_minhash_index(self):
+        """Similar sets of words are found, dissimilar ones are not."""
+        index = cds_paper_bot.MinHashIndex()
+        index.add("pas", cds_paper_bot.title_words(PAS_TITLE))
+        index.add("other", cds_paper_bot.title_words("Measurement of the W boson mass"))
+        index.add("empty", frozenset())
+        index.add("short", cds_paper_bot.title_words("Luminosity"))
+        assert index.query(cds_paper_bot.title_words(PAS_TITLE), 0.8) == ["pas"]
+        assert index.query(cds_paper_bot.title_words("Top quark mass"), 0.8) == []
+        assert index.query(frozenset(), 0.8) == []
+        assert index.query(frozenset(["luminosity"]), 0.8) == ["short"]
+
+    def test_counterpart(self, tmp_path, monkeypatch):
+        """store_id updates the index, which is read back from the state file."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        monkeypatch.setattr(cds_paper_bot, "_LEDGER", None)
+        monkeypatch.setattr(cds_paper_bot, "_POST_INDEX", None)
+        cds_paper_bot.open_post_index()
+        cds_paper_bot.store_id(
+            "CMS-PAS-HIG-23-001",
+            "CMS_PAS_FEED",
+            "MASTODON_",
+            title=PAS_TITLE,
+            post_id="110",
+        )
+        cds_paper_bot.store_id(
+            "CMS-PAS-HIG-23-001",
+            "CMS_PAS_FEED",
+            "TWITTER_",
+            title=PAS_TITLE,
+            post_id="120",
+        )
+        cds_paper_bot.store_id(
+            "CERN-EP-2024-001", "CMS_PAPER_FEED", "MASTODON_", title=PAPER_TITLE
+        )
+        cds_paper_bot.store_id(
+            "CERN-EP-2024-001", "CMS_PAPER_FEED", "TWITTER_", title=PAPER_TITLE
+        )
+        # the title is written once per identifier
+        lines = (tmp_path / "POSTED_TITLES.txt").read_text().splitlines()
+        assert [PAS_TITLE in x or PAPER_TITLE in x for x in lines] == [
+            True,
+            False,
+            True,
+        ]
+        feeds = ["CMS_PAS_FEED", "CMS_PAPER_FEED"]
+
+        index = cds_paper_bot.open_post_index()
+        assert index.counterpart(PAPER_TITLE, feeds) == "CMS-PAS-HIG-23-001"
+        # papers and results of other experiments are no counterparts
+        assert index.counterpart(PAPER_TITLE, ["ATLAS_CONF_FEED"]) is None
+        assert index.counterpart("Measurement of the W boson mass", feeds) is None
+        assert cds_paper_bot.linked_post(["CMS-PAS-HIG-23-001"], "MASTODON_") == "110"
+        assert cds_paper_bot.linked_post(["CMS-PAS-HIG-23-001"], "TWITTER_") == "120"
+        assert cds_paper_bot.linked_post(["CMS-PAS-HIG-23-001"], "BLUESKY_") is None
+
+    def test_stored_signatures(self, tmp_path, monkeypatch):
+        """Signatures are only computed for titles added since the last start."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        index = cds_paper_bot.PostIndex()
+        index.add("CMS-PAS-HIG-23-001", "CMS_PAS_FEED", PAS_TITLE, "mastodon", "110")
+        # the signatures of new titles are stored at the next start
+        cds_paper_bot.PostIndex()
+        assert (tmp_path / cds_paper_bot.MINHASH_DIR / "POSTED_TITLES.pickle").exists()
+        computed = []
+        minhash_signature = cds_paper_bot.minhash_signature
+        monkeypatch.setattr(
+            cds_paper_bot,
+            "minhash_signature",
+            lambda words: computed.append(words) or minhash_signature(words),
+        )
+        index = cds_paper_bot.PostIndex()
+        assert not computed
+        assert index.counterpart(PAPER_TITLE, ["CMS_PAS_FEED"]) == (
+            "CMS-PAS-HIG-23-001"
+        )
+        assert len(computed) == 1
+
+    def test_different_code(self, tmp_path, monkeypatch):
+        """A paper does not supersede a PAS with another CADI code."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        index = cds_paper_bot.PostIndex()
+        index.add("CMS-PAS-HIG-23-001", "CMS_PAS_FEED", PAS_TITLE, "mastodon", "110")
+        feeds = ["CMS_PAS_FEED"]
+        assert index.counterpart(PAPER_TITLE, feeds, "HIG-23-001") == (
+            "CMS-PAS-HIG-23-001"
+        )
+        assert index.counterpart(PAPER_TITLE, feeds, "HIG-25-007") is None
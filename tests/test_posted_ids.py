@@ -0,0 +1,28 @@
+"""Test the posted identifiers kept in memory."""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class TestPostedIds(object):
+    """The text files are read once and written through."""
+
+    def test_store_and_check(self, tmp_path, monkeypatch):
+        """Stored identifiers are found and appended to the text file."""
+        monkeypatch.chdir(tmp_path)
+        assert not cds_paper_bot.check_id_exists("A", "TEST_FEED", "TWITTER_")
+        cds_paper_bot.store_id("A", "TEST_FEED", "TWITTER_")
+        cds_paper_bot.store_id("B", "TEST_FEED", "TWITTER_")
+        assert cds_paper_bot.check_id_exists("A", "TEST_FEED", "TWITTER_")
+        assert not cds_paper_bot.check_id_exists("A", "TEST_FEED", "MASTODON_")
+        assert (tmp_path / "TWITTER_TEST_FEED.txt").read_text() == "A\nB\n"
+
+    def test_external_change(self, tmp_path, monkeypatch):
+        """Changes of the file by another process are picked up."""
+        monkeypatch.chdir(tmp_path)
+        assert not cds_paper_bot.check_id_exists("C", "TEST_FEED", "TWITTER_")
+        with open("TWITTER_TEST_FEED.txt", "a") as txt_file:
+            txt_file.write("C\n")
+        assert cds_paper_bot.check_id_exists("C", "TEST_FEED", "TWITTER_")
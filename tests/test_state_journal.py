@@ -0,0 +1,98 @@
+"""Test the write-ahead journal of the state files."""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class TestStateJournal(object):
+    """Appended lines reach the state files at a checkpoint or on replay."""
+
+    def test_checkpoint(self, tmp_path, monkeypatch):
+        """Journaled lines are visible before they are written to the files."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_IDS", {})
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        cds_paper_bot.open_state_journal()
+        cds_paper_bot.store_id("CMS-PAS-HIG-23-001", "CMS_PAS_FEED", "TWITTER_")
+        cds_paper_bot.store_content_hash("CMS_PAS_FEED", "2000001", "abc")
+        state_file = tmp_path / "TWITTER_CMS_PAS_FEED.txt"
+        assert not state_file.exists() or state_file.read_text() == ""
+        assert cds_paper_bot.check_id_exists(
+            "CMS-PAS-HIG-23-001", "CMS_PAS_FEED", "TWITTER_"
+        )
+        assert cds_paper_bot.load_content_hashes("CMS_PAS_FEED") == {"2000001": "abc"}
+
+        cds_paper_bot.close_state_journal()
+        assert not list(tmp_path.glob(cds_paper_bot.STATE_JOURNAL + "*"))
+        assert (tmp_path / "TWITTER_CMS_PAS_FEED.txt").read_text() == (
+            "CMS-PAS-HIG-23-001\n"
+        )
+        assert (tmp_path / "CONTENT_CMS_PAS_FEED.txt").read_text() == "2000001 abc\n"
+        assert cds_paper_bot.check_id_exists(
+            "CMS-PAS-HIG-23-001", "CMS_PAS_FEED", "TWITTER_"
+        )
+
+    def test_replay(self, tmp_path, monkeypatch):
+        """Committed lines of a killed run are applied, a torn record is not."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_IDS", {})
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        # the previous run was killed while appending to the state file
+        (tmp_path / "TWITTER_CMS_PAS_FEED.txt").write_text("CMS-PAS-HIG-23-001\nCMS")
+        journal = cds_paper_bot.open_state_journal()
+        cds_paper_bot.store_id("CMS-PAS-HIG-23-002", "CMS_PAS_FEED", "TWITTER_")
+        journal.journal_file.write(b'{"file": "TWITTER_CMS_PAS_FEED.txt", "li')
+        journal.journal_file.flush()
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        # the lock is released when the process dies
+        journal.journal_file.close()
+
+        assert cds_paper_bot.replay_journal() == 1
+        assert not list(tmp_path.glob(cds_paper_bot.STATE_JOURNAL + "*"))
+        assert (tmp_path / "TWITTER_CMS_PAS_FEED.txt").read_text() == (
+            "CMS-PAS-HIG-23-001\nCMS\nCMS-PAS-HIG-23-002\n"
+        )
+
+    def test_running_journal(self, tmp_path, monkeypatch):
+        """The journal of a process that is still running is left alone."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_POSTED_IDS", {})
+        monkeypatch.setattr(cds_paper_bot, "_STATE_JOURNAL", None)
+        other = cds_paper_bot.StateJournal(cds_paper_bot.STATE_JOURNAL + "-other-1")
+        other.append("TWITTER_", "CMS_PAS_FEED", "CMS-PAS-HIG-23-001")
+        other.commit()
+
+        journal = cds_paper_bot.open_state_journal()
+        assert journal.path != other.path
+        journal.close()
+        assert not (tmp_path / "TWITTER_CMS_PAS_FEED.txt").exists()
+        other.close()
+        assert (tmp_path / "TWITTER_CMS_PAS_FEED.txt").read_text() == (
+            "CMS-PAS-HIG-23-001\n"
+        )
+
+    def test_sync_only_new_lines(self, tmp_path, monkeypatch):
+        """Commits and checkpoints without new lines do not sync."""
+        monkeypatch.chdir(tmp_path)
+        synced = []
+        fsync = os.fsync
+
+        def count_fsync(fd):
+            synced.append(fd)
+            fsync(fd)
+
+        monkeypatch.setattr(cds_paper_bot.os, "fsync", count_fsync)
+        state_journal = cds_paper_bot.StateJournal()
+        state_journal.append("TWITTER_", "CMS_PAS_FEED", "CMS-PAS-HIG-23-001")
+        state_journal.commit()
+        assert len(synced) == 1
+        state_journal.commit()
+        assert len(synced) == 1
+        state_journal.checkpoint()
+        n_synced = len(synced)
+        state_journal.commit()
+        state_journal.checkpoint()
+        assert len(synced) == n_synced
+        state_journal.close()
@@ -0,0 +1,51 @@
+"""Test state segments written by concurrent runs."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class TestStateSegments(object):
+    """Segments are merged on load and folded by compact_state."""
+
+    def test_merge_and_compact(self, tmp_path, monkeypatch):
+        """Two runs write their own segments, which readers merge."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "TWITTER_TEST_FEED.txt").write_text("A\n")
+        cds_paper_bot.store_watermark("TEST_FEED", 100, {"A"})
+        for run, identifier, published in [("run1", "B", 200), ("run2", "C", 150)]:
+            monkeypatch.setattr(cds_paper_bot, "_STATE_SEGMENT", run)
+            cds_paper_bot.store_id(identifier, "TEST_FEED", prefix="TWITTER_")
+            cds_paper_bot.store_watermark("TEST_FEED", published, {identifier})
+            cds_paper_bot.store_content_hash("TEST_FEED", "A", run)
+        assert (tmp_path / "TWITTER_TEST_FEED.txt").read_text() == "A\n"
+        assert (tmp_path / "state" / "TWITTER_TEST_FEED" / "run2.txt").exists()
+        assert cds_paper_bot.posted_ids("TEST_FEED", "TWITTER_") == {"A", "B", "C"}
+        assert cds_paper_bot.load_watermark("TEST_FEED") == (200, {"B"})
+        assert cds_paper_bot.load_content_hashes("TEST_FEED") == {"A": "run2"}
+
+        assert cds_paper_bot.compact_state() == 6
+        assert (tmp_path / "TWITTER_TEST_FEED.txt").read_text() == "A\nB\nC\n"
+        assert (tmp_path / "WATERMARK_TEST_FEED.txt").read_text() == "200 B\n"
+        assert (tmp_path / "CONTENT_TEST_FEED.txt").read_text() == "A run2\n"
+        assert not list((tmp_path / "state").rglob("*.txt"))
+        assert cds_paper_bot.check_id_exists("C", "TEST_FEED", "TWITTER_")
+
+    def test_listing_once_per_run(self, tmp_path, monkeypatch):
+        """Segments of other runs are listed once, the own one is always read."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(cds_paper_bot, "_STATE_SEGMENT", "run1")
+        monkeypatch.setattr(cds_paper_bot, "_SEGMENT_LISTINGS", {})
+        segment_dir = tmp_path / "state" / "TWITTER_TEST_FEED"
+        segment_dir.mkdir(parents=True)
+        (segment_dir / "run0.txt").write_text("A\n")
+        assert cds_paper_bot.check_id_exists("A", "TEST_FEED", "TWITTER_")
+        # written by a concurrent run after this run has started
+        (segment_dir / "run2.txt").write_text("C\n")
+        cds_paper_bot.store_id("B", "TEST_FEED", prefix="TWITTER_")
+        assert cds_paper_bot.check_id_exists("B", "TEST_FEED", "TWITTER_")
+        assert not cds_paper_bot.check_id_exists("C", "TEST_FEED", "TWITTER_")
+        cds_paper_bot.reset_segment_listings()
+        assert cds_paper_bot.check_id_exists("C", "TEST_FEED", "TWITTER_")
@@ -0,0 +1,39 @@
+"""Test publication date parsing and conference hashtags."""
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+class TestTimestamps(object):
+    """RSS dates are converted to seconds since the epoch."""
+
+    @pytest.mark.parametrize(
+        "published, expected",
+        [
+            ("Tue, 10 Oct 2023 10:00:00 GMT", 1696932000),
+            ("Tue, 10 Oct 2023 12:00:00 +0200", 1696932000),
+            ("Tue, 10 Oct 2023 10:00:00 -0000", 1696932000),
+            ("not a date", None),
+            ("", None),
+        ],
+    )
+    def test_parse_rfc822(self, published, expected):
+        """Test the list above."""
+        assert cds_paper_bot.parse_rfc822(published) == expected
+
+    @pytest.mark.parametrize(
+        "published, expected",
+        [
+            ("Sat, 20 Jul 2024 10:00:00 GMT", "#ICHEP2024"),
+            ("Tue, 16 Jul 2024 00:00:00 GMT", "#ICHEP2024"),
+            ("Fri, 26 Jul 2024 00:00:01 GMT", ""),
+            ("Mon, 15 Jul 2024 23:59:59 GMT", ""),
+        ],
+    )
+    def test_conference(self, published, expected):
+        """Conference date ranges start and end at midnight UTC."""
+        conf = cds_paper_bot.Conference("ICHEP2024", "2024-07-16", "2024-07-26")
+        assert conf.is_now(cds_paper_bot.parse_rfc822(published)) == expected
@@ -0,0 +1,44 @@
+"""Test title formatting against a snapshot written by get_all_titles.py."""
+
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+import get_all_titles  # pylint: disable=wrong-import-position,import-error
+
+SNAPSHOT_FILE = os.path.join(os.path.dirname(__file__), "title_snapshot.jsonl")
+
+
+def snapshot_entries():
+    """Return the entries of the snapshot, if there is one."""
+    if not os.path.isfile(SNAPSHOT_FILE):
+        return []
+    return get_all_titles.load_snapshot(SNAPSHOT_FILE)[1]
+
+
+class TestTitleSnapshot(object):
+    """Formatted titles do not change unnoticed."""
+
+    def test_write_and_load(self, tmp_path):
+        """The header carries the version and the number of entries."""
+        entries = [
+            {
+                "title": "Search at $\\sqrt{s}=13$ TeV",
+                "formatted_title": "Search at √s = 13 TeV",
+                "feed": "CMS cms_pas_feed",
+                "identifier": "CMS-PAS-EXO-23-001",
+            }
+        ]
+        snapshot_file = str(tmp_path / "snapshot.jsonl")
+        get_all_titles.write_snapshot(snapshot_file, entries)
+        header, loaded = get_all_titles.load_snapshot(snapshot_file)
+        assert header["version"] == get_all_titles.SNAPSHOT_VERSION
+        assert header["entries"] == 1
+        assert loaded == entries
+
+    @pytest.mark.parametrize("entry", snapshot_entries(), ids=lambda x: x["identifier"])
+    def test_snapshot(self, entry):
+        """Test the titles of the snapshot, if it exists."""
+        assert cds_paper_bot.format_title(entry["title"]) == entry["formatted_title"]
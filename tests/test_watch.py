@@ -0,0 +1,108 @@
+"""Test the polling loop of watch mode."""
+import sys
+import os
+import argparse
+import signal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+MIN_INTERVAL = 120
+MAX_INTERVAL = 1800
+
+
+class TestWatch(object):
+    """The interval adapts to new results and conferences."""
+
+    def test_next_poll_interval(self, monkeypatch):
+        """Reset after posts, doubled up to the maximum when idle."""
+        monkeypatch.setattr(cds_paper_bot, "CONFERENCES", [])
+        timestamp = cds_paper_bot.date_to_timestamp("2023-10-10")
+        intervals = [MIN_INTERVAL]
+        for _ in range(6):
+            intervals.append(
+                cds_paper_bot.next_poll_interval(
+                    intervals[-1], 0, timestamp, MIN_INTERVAL, MAX_INTERVAL
+                )
+            )
+        assert intervals == [120, 240, 480, 960, 1800, 1800, 1800]
+        assert (
+            cds_paper_bot.next_poll_interval(
+                MAX_INTERVAL, 2, timestamp, MIN_INTERVAL, MAX_INTERVAL
+            )
+            == MIN_INTERVAL
+        )
+
+    def test_conference_cap(self, monkeypatch):
+        """While a conference is ongoing, the interval is capped."""
+        conference = cds_paper_bot.Conference("LHCP", "2023-10-09", "2023-10-13")
+        monkeypatch.setattr(cds_paper_bot, "CONFERENCES", [conference])
+        timestamp = cds_paper_bot.date_to_timestamp("2023-10-10")
+        assert (
+            cds_paper_bot.next_poll_interval(
+                MAX_INTERVAL, 0, timestamp, MIN_INTERVAL, MAX_INTERVAL
+            )
+            == cds_paper_bot.WATCH_CONFERENCE_INTERVAL
+        )
+        later = cds_paper_bot.date_to_timestamp("2023-10-20")
+        assert (
+            cds_paper_bot.next_poll_interval(
+                MAX_INTERVAL, 0, later, MIN_INTERVAL, MAX_INTERVAL
+            )
+            == MAX_INTERVAL
+        )
+
+    def test_exit_does_not_stop_loop(self, monkeypatch):
+        """A failed upload exiting in one experiment does not end the loop."""
+        polled = []
+
+        def run_experiment(experiment, *args):
+            polled.append(experiment)
+            if experiment == "CMS":
+                sys.exit(1)
+            signal.raise_signal(signal.SIGTERM)
+            return 0
+
+        handlers = {x: signal.getsignal(x) for x in (signal.SIGINT, signal.SIGTERM)}
+        monkeypatch.setattr(cds_paper_bot, "run_experiment", run_experiment)
+        monkeypatch.setattr(cds_paper_bot, "load_config", lambda *args: {})
+        monkeypatch.setattr(cds_paper_bot, "close_http", lambda: None)
+        args = argparse.Namespace(
+            config="", auth="", min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL
+        )
+        try:
+            cds_paper_bot.watch(["CMS", "ATLAS"], args)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        assert polled == ["CMS", "ATLAS"]
+
+    def test_error_does_not_stop_main(self, tmp_path, monkeypatch):
+        """An error in one experiment is logged and the others are still run."""
+        monkeypatch.chdir(tmp_path)
+        polled = []
+        closed = []
+
+        def run_experiment(experiment, *args):
+            polled.append(experiment)
+            if experiment == "CMS":
+                raise ValueError("broken feed")
+            return 0
+
+        monkeypatch.setattr(sys, "argv", ["cds_paper_bot.py", "--dry"])
+        monkeypatch.setattr(cds_paper_bot, "run_experiment", run_experiment)
+        monkeypatch.setattr(
+            cds_paper_bot, "get_experiments", lambda *args: ["CMS", "ATLAS"]
+        )
+        monkeypatch.setattr(cds_paper_bot, "load_config", lambda *args: {})
+        monkeypatch.setattr(
+            cds_paper_bot, "close_state_journal", lambda: closed.append("journal")
+        )
+        monkeypatch.setattr(cds_paper_bot, "close_http", lambda: closed.append("http"))
+        with pytest.raises(SystemExit) as exit_info:
+            cds_paper_bot.main()
+        assert exit_info.value.code == 1
+        assert polled == ["CMS", "ATLAS"]
+        assert closed == ["journal", "http"]
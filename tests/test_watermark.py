@@ -0,0 +1,54 @@
+"""Test the per-feed watermark."""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cds_paper_bot  # pylint: disable=wrong-import-position,import-error
+
+
+def make_entry(identifier, timestamp):
+    """Create a minimal feed entry."""
+    return {"dc_source": identifier, "published_parsed": time.gmtime(timestamp)}
+
+
+def make_feed_entries(entries):
+    """Convert feed entries to FeedEntry objects."""
+    return [cds_paper_bot.FeedEntry.from_feed(x, "TEST_FEED") for x in entries]
+
+
+class TestWatermark(object):
+    """Advancing, storing and applying the watermark."""
+
+    def test_advance_stops_at_first_unhandled(self):
+        """Entries after an unhandled one must stay above the watermark."""
+        entries = [make_entry("A", 100), make_entry("B", 200), make_entry("C", 300)]
+        watermark = cds_paper_bot.advance_watermark(
+            (None, set()), make_feed_entries(entries), {"A", "C"}
+        )
+        assert watermark == (100, {"A"})
+        assert [
+            x["dc_source"]
+            for x in entries
+            if cds_paper_bot.above_watermark(x, watermark)
+        ] == ["B", "C"]
+
+    def test_same_timestamp(self):
+        """Entries published at the watermark time are filtered by identifier."""
+        entries = [make_entry("A", 100), make_entry("B", 100)]
+        watermark = cds_paper_bot.advance_watermark(
+            (None, set()), make_feed_entries(entries), {"A"}
+        )
+        assert watermark == (100, {"A"})
+        assert not cds_paper_bot.above_watermark(entries[0], watermark)
+        assert cds_paper_bot.above_watermark(entries[1], watermark)
+
+    def test_store_and_merge(self, tmp_path, monkeypatch):
+        """A union of two watermark files yields the newer watermark."""
+        monkeypatch.chdir(tmp_path)
+        cds_paper_bot.store_watermark("TEST_FEED", 100, {"A"})
+        older = (tmp_path / "WATERMARK_TEST_FEED.txt").read_text()
+        cds_paper_bot.store_watermark("TEST_FEED", 200, {"B", "C"})
+        with open("WATERMARK_TEST_FEED.txt", "a") as txt_file:
+            txt_file.write(older)
+        assert cds_paper_bot.load_watermark("TEST_FEED") == (200, {"B", "C"})